@@ -8,16 +8,16 @@ GOTO :CMDSCRIPT
 
 set -eux
 
-uv run autoflake -i -r app.py
-uv run isort app.py
-uv run black app.py
-uv run ruff format app.py
+uv run autoflake -i -r app.py wsc
+uv run isort app.py wsc
+uv run black app.py wsc
+uv run ruff format app.py wsc
 
 exit 0
 
 :CMDSCRIPT
 
-uv run autoflake -i -r app.py
-uv run isort app.py
-uv run black app.py
-uv run ruff format app.py
+uv run autoflake -i -r app.py wsc
+uv run isort app.py wsc
+uv run black app.py wsc
+uv run ruff format app.py wsc
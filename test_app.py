@@ -1,7 +1,21 @@
 # -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
 from app import DataCollector
 from unittest import TestCase
 
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps([elapsed, sorted(sys.modules)]))
+"""
+
 
 class TestDartBalloonGame(TestCase):
 
@@ -19,9 +33,12 @@ class TestDartBalloonGame(TestCase):
 
     def test_update_atlas_png_file(self):
         src = "./example/南瓜瓶/南瓜瓶子_接水.atlas"
-        dst = "./temp/1.atlas"
-        png_name = "心形瓶子_接水.png"
-        DataCollector._replace_atlas_png_file(src, dst, png_name)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            dst = os.path.join(temp_dir, "1.atlas")
+            webp_name = "心形瓶子_接水.webp"
+            DataCollector._replace_atlas_webp_file(src, dst, webp_name)
+            with open(src, "r", encoding="utf-8") as f1, open(dst, "r", encoding="utf-8") as f2:
+                self.assertEqual(f1.read().replace("南瓜瓶子_接水.png", webp_name), f2.read())
 
     def test_list_atlas_files(self):
         src_dir = "./example/南瓜瓶"
@@ -34,3 +51,24 @@ class TestDartBalloonGame(TestCase):
         atlas_files = DataCollector._list_glob_files(src_dir, "png")
         print(atlas_files)
         self.assertEqual(4, len(atlas_files))
+
+
+class TestStartup(TestCase):
+    # loaded on first use, never by just starting the app or the command line
+    LAZY_MODULES = ["PySide6", "PIL", "numpy", "multiprocessing", "zipfile", "wsc.gui", "wsc.solver"]
+    BUDGET_MS = 300
+
+    def probe(self, module: str):
+        runs = []
+        for _ in range(3):
+            code = _IMPORT_PROBE.format(module=module)
+            output = subprocess.check_output([sys.executable, "-c", code], text=True, cwd=os.getcwd())
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        return min(elapsed for elapsed, _ in runs), runs[0][1]
+
+    def test_import_budget(self):
+        for module in ["app", "wsc.cli"]:
+            elapsed, modules = self.probe(module)
+            loaded = [m for m in modules if m.split(".")[0] in self.LAZY_MODULES or m in self.LAZY_MODULES]
+            self.assertEqual([], loaded, module)
+            self.assertLess(elapsed, self.BUDGET_MS, module)
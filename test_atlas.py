@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import time
+from unittest import TestCase
+
+from wsc.atlas import SpineAtlas
+
+_MULTI_PAGE = """\ufeff\r
+\r
+page1.png\r
+size: 64,32\r
+format: RGBA8888\r
+filter: Linear,Linear\r
+repeat: none\r
+a\r
+  rotate: false\r
+  xy: 0, 0\r
+  size: 10, 20\r
+  orig: 10, 20\r
+  offset: 0, 0\r
+  index: -1\r
+b\r
+  rotate: true\r
+  xy: 50, 0\r
+  size: 20, 10\r
+  orig: 20, 10\r
+  offset: 0, 0\r
+  index: -1\r
+\r
+page2.png\r
+size: 16,16\r
+format: RGBA8888\r
+filter: Nearest,Nearest\r
+repeat: none\r
+c\r
+  rotate: false\r
+  xy: 4, 4\r
+  size: 8, 8\r
+  orig: 8, 8\r
+  offset: 0, 0\r
+  index: 3\r
+"""
+
+
+class TestSpineAtlas(TestCase):
+
+    def test_round_trip(self):
+        atlas = SpineAtlas.loads(_MULTI_PAGE)
+        self.assertEqual(_MULTI_PAGE, atlas.dumps())
+        self.assertTrue(atlas.bom)
+        self.assertEqual(["page1.png", "page2.png"], [p.name for p in atlas.pages])
+        self.assertEqual((16, 16), atlas.pages[1].size)
+        self.assertEqual(("Nearest", "Nearest"), atlas.pages[1].filter)
+
+    def test_regions(self):
+        atlas = SpineAtlas.loads(_MULTI_PAGE)
+        a, b, c = atlas.regions()
+        self.assertEqual(((0, 0), (10, 20), 0), (a.xy, a.size, a.rotate))
+        self.assertEqual((10, 20), b.packed_size)
+        self.assertEqual(3, c.index)
+        self.assertIs(atlas.pages[1], c.page)
+
+    def test_rename_and_drop(self):
+        atlas = SpineAtlas.loads(_MULTI_PAGE)
+        atlas.pages[0].rename("new.webp")
+        self.assertEqual(1, atlas.drop_regions(["b"]))
+        text = atlas.dumps()
+        self.assertIn("\r\nnew.webp\r\nsize: 64,32\r\n", text)
+        self.assertNotIn("\r\nb\r\n", text)
+        self.assertEqual(text, SpineAtlas.loads(text).dumps())
+
+    def test_validate(self):
+        atlas = SpineAtlas.loads(_MULTI_PAGE)
+        self.assertEqual([], atlas.validate())
+        c = atlas.pages[1].regions[0]
+        c.set_rect(12, 10, rotate=False)
+        self.assertIn("  xy: 12, 10\r\n", c.lines)
+        self.assertEqual(1, len(atlas.validate()))
+
+    def test_example(self):
+        path = "./example/南瓜瓶/南瓜瓶子_接水.atlas"
+        atlas = SpineAtlas.load(path)
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            self.assertEqual(f.read(), atlas.dumps())
+        self.assertEqual(19, len(list(atlas.regions())))
+        self.assertEqual([], atlas.validate())
+
+    def test_large_atlas(self):
+        lines = ["page.png", "size: 4096,4096", "format: RGBA8888", "filter: Linear,Linear", "repeat: none"]
+        for i in range(20000):
+            lines += [
+                f"r{i}",
+                "  rotate: false",
+                f"  xy: {i % 4000}, {i % 4000}",
+                "  size: 8, 8",
+                "  index: -1",
+            ]
+        text = "\n".join(lines) + "\n"
+        start = time.perf_counter()
+        atlas = SpineAtlas.loads(text)
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertEqual(20000, len(atlas.pages[0].regions))
+        self.assertEqual(text, atlas.dumps())
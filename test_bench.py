@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import copy
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from wsc.bench import (
+    BENCH_SCALES,
+    PHASES,
+    compare_results,
+    run_benchmark,
+)
+from wsc.cli import ExitCodeEnum, main
+
+
+class TestBench(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # big enough for the example atlas regions, small enough for a unit test
+        self.scale = dict(BENCH_SCALES["small"], regions=50, levels=5, title=[32, 16], image=[32, 32])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_run_and_compare(self):
+        result = run_benchmark(self.scale, self.tmp.name, repeat=1)
+        self.assertEqual(PHASES, list(result["phases"]))
+        for phase in result["phases"].values():
+            self.assertGreater(phase["files"], 0)
+            self.assertGreater(phase["seconds"], 0)
+            self.assertIsNotNone(phase["peak_alloc_mb"])
+        self.assertEqual([], compare_results(result, result))
+
+        # a baseline twice as fast with a tiny footprint flags every phase and the process peak
+        baseline = copy.deepcopy(result)
+        for phase in baseline["phases"].values():
+            phase["seconds"] = phase["seconds"] / 2 - 1
+            phase["peak_alloc_mb"] = 0
+        baseline["peak_rss_mb"] = 1
+        grown = copy.deepcopy(result)
+        for phase in grown["phases"].values():
+            phase["peak_alloc_mb"] += 100
+        self.assertEqual(len(PHASES) * 2 + 1, len(compare_results(grown, baseline)))
+
+        baseline["params"] = dict(self.scale, levels=6)
+        with self.assertRaises(ValueError):
+            compare_results(result, baseline)
+
+    def test_cli(self):
+        work_dir = os.path.join(self.tmp.name, "work")
+        baseline = os.path.join(self.tmp.name, "baseline.json")
+        args = ["bench", "--repeat", "1", "--workdir", work_dir]
+        self.assertEqual(ExitCodeEnum.OK, main(args + ["--save", baseline]))
+        with open(baseline, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual("small", data["scale"])
+
+        # the generated project is reused for the comparison run
+        self.assertEqual(ExitCodeEnum.OK, main(args + ["--baseline", baseline, "--tolerance", "10"]))
+        for phase in data["phases"].values():
+            phase["seconds"] = 0
+            phase["peak_alloc_mb"] = 0
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        self.assertEqual(ExitCodeEnum.CHECK, main(args + ["--baseline", baseline]))
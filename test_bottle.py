@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from wsc.bottle import BottleLevels
+from wsc.core import DataCollector, ErrorCodeEnum, PropKeyEnum
+from wsc.hashing import HashCache, get_hash_cache, set_hash_cache
+
+_EXAMPLE_CSV = "./example/南瓜瓶/特殊玩法水位 - 南瓜瓶子.csv"
+
+
+class TestBottleLevels(TestCase):
+
+    def test_load_example(self):
+        levels = BottleLevels.load(_EXAMPLE_CSV)
+        self.assertEqual(["层级", "Y轴（本地坐标）", "X轴（本地缩放）"], levels.header)
+        self.assertEqual([], levels.validate())
+        self.assertEqual(15, len(levels.states))
+        self.assertEqual(
+            ("待机_3", -134, 1.06), (levels.states[3].name, levels.states[3].y, levels.states[3].x)
+        )
+
+    def test_table(self):
+        levels = BottleLevels.loads("\ufeff层级,Y,X\r\n待机_0,-10,1\r\n待机_1,10,0.5\r\n待机_2,20,0.5\r\n")
+        table = levels.to_table(steps=4)
+        self.assertEqual(3, table["states"])
+        self.assertEqual(["y", "x"], table["fields"])
+        # (states - 1) * steps + 1 samples, the states themselves fall on every fourth one
+        data = table["data"]
+        self.assertEqual(2 * 9, len(data))
+        self.assertEqual([-10, 1], data[0:2])
+        self.assertEqual([0, 0.75], data[4:6])
+        self.assertEqual([10, 0.5], data[8:10])
+        self.assertEqual([20, 0.5], data[-2:])
+        self.assertNotIn(" ", levels.dumps_table(steps=4))
+
+    def test_validate(self):
+        text = "层级,Y,X\n待机_0,0,1\n待机_2,-5,1\n待机_3,abc,1\n空闲_4,10,0\n待机_5,1\n"
+        problems = BottleLevels.loads(text).validate()
+        self.assertEqual(6, len(problems), problems)
+        self.assertTrue(any("数值无效" in p for p in problems))
+        self.assertTrue(any("3 列" in p for p in problems))
+        self.assertTrue(any("名称不一致" in p for p in problems))
+        self.assertTrue(any("序号应为 1" in p for p in problems))
+        self.assertTrue(any("没有高于" in p for p in problems))
+        self.assertTrue(any("必须大于 0" in p for p in problems))
+        with self.assertRaises(ValueError):
+            BottleLevels.loads(text).sample()
+
+
+class TestBottleExport(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_cache = get_hash_cache()
+        set_hash_cache(HashCache())
+        self.yxp_dir = os.path.join(self.tmp.name, "yxp")
+        self.out = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.yxp_dir)
+        os.makedirs(self.out)
+        for name in [
+            "南瓜瓶子_接水.atlas",
+            "南瓜瓶子_接水.skel",
+            "南瓜瓶子_接水.png",
+            "特殊玩法水位 - 南瓜瓶子.csv",
+        ]:
+            with open(f"./example/南瓜瓶/{name}", "rb") as fsrc:
+                with open(os.path.join(self.yxp_dir, name), "wb") as fdst:
+                    fdst.write(fsrc.read())
+        self.csv = os.path.join(self.yxp_dir, "特殊玩法水位 - 南瓜瓶子.csv")
+
+    def tearDown(self):
+        set_hash_cache(self.old_cache)
+        self.tmp.cleanup()
+
+    def test_export_table(self):
+        props = {PropKeyEnum.G5_YXP_DIR: self.yxp_dir}
+        DataCollector().store_yxp_files(props, self.out)
+        self.assertEqual([], [name for name in os.listdir(self.out) if name.endswith(".csv")])
+        with open(os.path.join(self.out, "SpecialBottleTable.json"), "r", encoding="utf-8") as f:
+            table = json.load(f)
+        self.assertEqual(15, table["states"])
+        self.assertEqual(BottleLevels.load(self.csv).sample(table["steps"]), table["data"])
+
+    def test_config_reference(self):
+        props = {PropKeyEnum.G5_YXP_DIR: self.yxp_dir}
+        DataCollector().store_config(props, self.out)
+        with open(os.path.join(self.out, "GameConfig.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.assertEqual("SpecialBottleTable", config["specialBottleTable"])
+
+        DataCollector().store_config({}, self.out)
+        with open(os.path.join(self.out, "GameConfig.json"), "r", encoding="utf-8") as f:
+            self.assertNotIn("specialBottleTable", json.load(f))
+
+    def test_check_invalid(self):
+        with open(self.csv, "w", encoding="utf-8-sig") as f:
+            f.write("层级,Y轴（本地坐标）,X轴（本地缩放）\n待机_0,-368,0.64\n待机_1,-400,0.64\n")
+        collector = DataCollector()
+        self.assertFalse(collector.check_yxp_folder({PropKeyEnum.G5_YXP_DIR: self.yxp_dir}))
+        self.assertEqual([ErrorCodeEnum.E_BOTTLE], [e.code for e in collector.errors])
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import base64
+import json
+import os
+import re
+import zipfile
+
+from testutil import ProjectTestCase
+from wsc.bundle import BundleWriter
+from wsc.cli import ExitCodeEnum, main
+from wsc.core import DataCollector
+
+
+class TestBundleExport(ProjectTestCase):
+
+    def export(self, name: str, **options):
+        target = os.path.join(self.tmp.name, name)
+        self.assertEqual(target, DataCollector(**options).export(self.props, target))
+        with open(target, "rb") as f:
+            return f.read()
+
+    def test_zip(self):
+        first = self.export("a.zip")
+        os.utime(self.level, ns=(0, 0))
+        self.assertEqual(first, self.export("b.zip"))
+
+        folder = os.path.join(self.tmp.name, "out")
+        os.makedirs(folder)
+        DataCollector().export(self.props, folder)
+
+        with zipfile.ZipFile(os.path.join(self.tmp.name, "a.zip")) as zf:
+            names = zf.namelist()
+            self.assertEqual(sorted(names), names)
+            self.assertEqual(sorted(f for f in os.listdir(folder) if not f.startswith(".")), names)
+            info = zf.getinfo("心形瓶子_接水.webp")
+            self.assertEqual(zipfile.ZIP_STORED, info.compress_type)
+            self.assertEqual(zipfile.ZIP_DEFLATED, zf.getinfo("lv1-1.json").compress_type)
+            with open(os.path.join(folder, "心形瓶子_接水.atlas"), "rb") as f:
+                self.assertEqual(f.read(), zf.read("心形瓶子_接水.atlas"))
+            config = json.loads(zf.read("GameConfig.json"))
+            self.assertEqual(1, config["LevelLength"])
+
+    def test_html(self):
+        template = os.path.join(self.tmp.name, "index.html")
+        with open(template, "w", encoding="utf-8") as f:
+            f.write("<html><head><!-- wsc-assets --></head><body>ad</body></html>")
+
+        text = self.export("a.html", html_template=template).decode("utf-8")
+        self.assertEqual(text, self.export("b.html", html_template=template).decode("utf-8"))
+        self.assertTrue(text.endswith("</head><body>ad</body></html>"))
+
+        assets = json.loads(re.search(r"window.WSC_ASSETS=(\{.*\});</script>", text, re.S).group(1))
+        prefix, data = assets["lv1-1.json"].split(",", 1)
+        self.assertEqual("data:application/json;base64", prefix)
+        with open(self.level, "rb") as f:
+            self.assertEqual(f.read(), base64.b64decode(data))
+        self.assertTrue(assets["心形瓶子_接水.webp"].startswith("data:image/webp;base64,"))
+
+    def test_bad_template(self):
+        target = os.path.join(self.tmp.name, "a.html")
+        collector = DataCollector(html_template=os.path.join(self.tmp.name, "missing.html"))
+        self.assertIsNone(collector.export(self.props, target))
+        self.assertFalse(os.path.exists(target))
+
+    def test_abstract_writer(self):
+        class PlainBundleWriter(BundleWriter):
+            pass
+
+        with self.assertRaises(TypeError):
+            PlainBundleWriter(os.path.join(self.tmp.name, "a.bin"))
+
+    def test_cli(self):
+        project = os.path.join(self.tmp.name, "project.json")
+        with open(project, "w", encoding="utf-8") as f:
+            json.dump({"G2_LEVEL_FILES": ["lv.json"]}, f)
+        target = os.path.join(self.tmp.name, "dist", "game.zip")
+        self.assertEqual(ExitCodeEnum.OK, main(["export", project, "--out", target, "--json"]))
+        self.assertTrue(zipfile.is_zipfile(target))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import zipfile
+from unittest import TestCase
+
+from wsc.cli import ExitCodeEnum, main
+from wsc.core import PropKeyEnum, load_props
+
+
+class TestHeadlessExport(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.project = os.path.join(self.tmp.name, "project.json")
+        self.out = os.path.join(self.tmp.name, "out")
+        self.level = os.path.join(self.tmp.name, "lv.json")
+        with open(self.level, "w", encoding="utf-8") as f:
+            f.write("{}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_project(self, data):
+        with open(self.project, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def test_no_qt_import(self):
+        code = "import sys, wsc.cli; print(any(m.startswith('PySide6') for m in sys.modules))"
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+        self.assertEqual("False", output.strip())
+
+    def test_load_props(self):
+        self.write_project({"G2_FILE_01": "lv.json", "G3_OPT_TYPE": "a", "G3_OPT_NUMBER": 3})
+        props = load_props(self.project)
+        self.assertEqual(self.level, props[PropKeyEnum.G2_FILE_01])
+        self.assertEqual("a", props[PropKeyEnum.G3_OPT_TYP])
+
+    def test_export(self):
+        self.write_project(
+            {
+                "G2_FILE_01": "lv.json",
+                "G1_IMG_DIR": os.path.abspath("./example/多语言标题"),
+            }
+        )
+        code = main(["export", self.project, "--out", self.out, "--json"])
+        self.assertEqual(ExitCodeEnum.OK, code)
+        self.assertTrue(os.path.exists(os.path.join(self.out, "lv1-1.json")))
+        self.assertTrue(os.path.exists(os.path.join(self.out, "TitleBg-英语.png")))
+        with open(os.path.join(self.out, "GameConfig.json"), "r", encoding="utf-8") as f:
+            self.assertEqual(1, json.load(f)["LevelLength"])
+
+    def test_export_check_failed(self):
+        self.write_project({"G3_OPT_TYPE": "a"})
+        code = main(["export", self.project, "--out", self.out, "--json"])
+        self.assertEqual(ExitCodeEnum.CHECK, code)
+
+    def test_export_bad_project(self):
+        self.write_project({"UNKNOWN_KEY": 1})
+        code = main(["export", self.project, "--out", self.out, "--json"])
+        self.assertEqual(ExitCodeEnum.PROJECT, code)
+
+    def test_export_per_language(self):
+        self.write_project(
+            {
+                "G2_FILE_01": "lv.json",
+                "G1_IMG_DIR": os.path.abspath("./example/多语言标题"),
+            }
+        )
+        code = main(["export", self.project, "--out", f"{self.out}.zip", "--per-language", "--json"])
+        self.assertEqual(ExitCodeEnum.OK, code)
+        self.assertTrue(os.path.exists(f"{self.out}-ja.zip"))
+        with zipfile.ZipFile(f"{self.out}-ja.zip") as zf:
+            titles = sorted(name for name in zf.namelist() if name.startswith("TitleBg"))
+        self.assertEqual(["TitleBg-日语.png", "TitleBg-英语.png"], titles)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import filecmp
+import os
+import tempfile
+from unittest import TestCase
+
+from wsc.copier import CopyExecutor, CopyModeEnum, CopyStrategyEnum, copy_file
+
+
+class TestCopyExecutor(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = "./example/南瓜瓶/南瓜瓶子_接水.png"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_copy_modes(self):
+        for mode in CopyModeEnum:
+            dst = os.path.join(self.tmp.name, f"{mode}.png")
+            strategy = copy_file(self.src, dst, mode)
+            self.assertIn(strategy, list(CopyStrategyEnum))
+            self.assertTrue(filecmp.cmp(self.src, dst, shallow=False))
+
+    def test_hardlink_not_overwrite_source(self):
+        src = os.path.join(self.tmp.name, "src.txt")
+        dst = os.path.join(self.tmp.name, "dst.txt")
+        with open(src, "w") as f:
+            f.write("hello")
+        copy_file(src, dst, CopyModeEnum.HARDLINK)
+        with open(src, "w") as f:
+            f.write("world!")
+        copy_file(src, dst, CopyModeEnum.COPY)
+        with open(src, "r") as f:
+            self.assertEqual("world!", f.read())
+
+    def test_executor_stats(self):
+        executor = CopyExecutor(CopyModeEnum.COPY, max_workers=2)
+        for i in range(5):
+            executor.submit(self.src, os.path.join(self.tmp.name, f"{i}.png"))
+        executor.shutdown()
+        stats = executor.stats
+        self.assertEqual(5, sum(item["files"] for item in stats.values()))
+        self.assertEqual(5 * os.path.getsize(self.src), sum(item["bytes"] for item in stats.values()))
+
+    def test_executor_error(self):
+        executor = CopyExecutor()
+        executor.submit(self.src, os.path.join(self.tmp.name, "missing", "1.png"))
+        with self.assertRaises(OSError):
+            executor.shutdown()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import TestCase, mock
+
+from testutil import random_level
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _permuted(bottles, seed: int):
+    rnd = random.Random(seed)
+    colors = sorted({c for b in bottles for c in b})
+    mapping = dict(zip(colors, rnd.sample(colors, len(colors))))
+    bottles = [[mapping[c] for c in b] for b in bottles]
+    rnd.shuffle(bottles)
+    return bottles
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestCanonicalHash(TestCase):
+
+    def test_isomorphic(self):
+        from wsc.corpus import canonical_hash
+
+        for seed in range(50):
+            bottles = random_level(3 + seed % 10, 2, seed=seed)
+            expected = canonical_hash(tuple(map(tuple, bottles)))
+            self.assertTrue(expected.startswith("c:"))
+            other = _permuted(bottles, seed + 100)
+            self.assertEqual(expected, canonical_hash(tuple(map(tuple, other))))
+
+    def test_distinct(self):
+        from wsc.corpus import canonical_hash
+
+        a = canonical_hash(((1, 2), (2, 1), ()))
+        b = canonical_hash(((1, 1), (2, 2), ()))
+        c = canonical_hash(((1, 2), (1, 2), ()))
+        self.assertEqual(3, len({a, b, c}))
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestLevelIndex(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.levels = {
+            "lv1.json": {"bottles": [[1, 1, 1], [2, 2, 2], []]},
+            "lv2.json": {"bottles": [[1, 2, 1], [2, 1, 2], [], []]},
+            "lv3.json": {"bottles": [[1, 2, 1], [2, 1, 2], [], []]},
+            "lv4.json": {"bottles": [[], ["b", "a", "b"], [], ["a", "b", "a"]]},
+            "lv5.json": {"bottles": random_level(12, 2, seed=5)},
+            "lv6.json": {"id": 6},
+        }
+        for name, data in self.levels.items():
+            with open(os.path.join(self.folder, name), "w", encoding="utf-8") as f:
+                json.dump(data, f)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_metrics(self):
+        from wsc.corpus import (
+            encode_levels,
+            level_metrics,
+        )
+
+        levels = [[[1, 1, 1], [2, 2, 2], []], [[1, 2, 1], [2, 1, 2], [], []]]
+        array = encode_levels(levels)
+        self.assertEqual((2, 4, 3), array.shape)
+        metrics = level_metrics(array, np.array([3, 4]), np.array([3, 3]))
+        self.assertEqual([1, 2], metrics["empty_bottles"].tolist())
+        self.assertEqual([2, 2], metrics["colors"].tolist())
+        self.assertEqual([0.0, 1.0], metrics["mixedness"].tolist())
+        self.assertEqual(0.0, metrics["entropy"][0])
+        self.assertAlmostEqual(0.9183, metrics["entropy"][1], places=4)
+        self.assertEqual([0, 4], metrics["lower_bound"].tolist())
+
+    def test_scan(self):
+        from wsc.corpus import LevelIndex
+
+        index = LevelIndex.scan_dir(self.folder)
+        records = {os.path.basename(r["path"]): r for r in index.records}
+        self.assertIn("error", records["lv6.json"])
+        self.assertIsNone(records["lv2.json"]["duplicate_of"])
+        self.assertEqual(records["lv2.json"]["path"], records["lv3.json"]["duplicate_of"])
+        self.assertIsNone(records["lv4.json"]["duplicate_of"])
+        self.assertEqual(records["lv2.json"]["path"], records["lv4.json"]["isomorphic_of"])
+        self.assertEqual(14, records["lv5.json"]["bottles"])
+
+        found = index.query(["bottles>=4"], unique=True)
+        self.assertEqual(["lv2.json", "lv5.json"], [os.path.basename(r["path"]) for r in found])
+        self.assertEqual(["lv1.json"], [os.path.basename(r["path"]) for r in index.query(["mixedness==0"])])
+        with self.assertRaises(ValueError):
+            index.query(["bottles"])
+
+    def test_scan_fallback_hash(self):
+        from wsc import corpus
+
+        # levels are analyzed in this process so the search limit applies
+        with (
+            mock.patch.object(corpus, "_SEARCH_LIMIT", 0),
+            mock.patch.object(corpus, "run_jobs", lambda fn, jobs: [fn(*job) for job in jobs]),
+        ):
+            index = corpus.LevelIndex.scan_dir(self.folder)
+        records = {os.path.basename(r["path"]): r for r in index.records}
+        self.assertIn(":w:", records["lv4.json"]["canonical"])
+        self.assertIsNone(records["lv4.json"]["isomorphic_of"])
+        self.assertEqual(records["lv2.json"]["path"], records["lv3.json"]["duplicate_of"])
+
+    def test_cli(self):
+        from wsc.cli import ExitCodeEnum, main
+
+        index_file = os.path.join(self.folder, "index.json")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(ExitCodeEnum.OK, main(["index", self.folder, "--out", index_file]))
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = main(["query", index_file, "--where", "colors>=12", "--json"])
+        self.assertEqual(ExitCodeEnum.OK, code)
+        self.assertEqual(["lv5.json"], [os.path.basename(r["path"]) for r in json.loads(out.getvalue())])
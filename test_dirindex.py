@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from wsc import dirindex
+from wsc.core import DataCollector, PropKeyEnum
+from wsc.dirindex import (
+    get_dir_index,
+    invalidate_dir_index,
+    set_dir_watched,
+)
+
+
+class TestDirectoryIndex(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        for name in ["b.png", "a.png", "c.webp", ".hidden.png", "d.atlas"]:
+            with open(os.path.join(self.folder, name), "w") as f:
+                f.write(name)
+        os.makedirs(os.path.join(self.folder, "dir.png"))
+        self.age_folder()
+
+    def tearDown(self):
+        invalidate_dir_index()
+        self.tmp.cleanup()
+
+    def age_folder(self, seconds: int = 60):
+        # move the folder mtime out of the coarse timestamp window
+        st = os.stat(self.folder)
+        os.utime(self.folder, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 1_000_000_000))
+
+    def test_buckets(self):
+        index = get_dir_index(self.folder)
+        self.assertEqual(["a.png", "b.png"], [os.path.basename(p) for p in index.files("png")])
+        self.assertEqual(["c.webp"], [e.name for e in index.entries("webp")])
+        self.assertEqual([], index.files("skel"))
+        self.assertIsNone(get_dir_index(os.path.join(self.folder, "missing")))
+
+    def test_single_scan(self):
+        with mock.patch.object(dirindex.os, "scandir", wraps=os.scandir) as scandir:
+            DataCollector().check_yxp_folder({PropKeyEnum.G5_YXP_DIR: self.folder})
+            DataCollector().check_multi_lang_folder({PropKeyEnum.G1_IMG_DIR: self.folder})
+            self.assertEqual(1, scandir.call_count)
+
+    def test_invalidate_on_change(self):
+        index = get_dir_index(self.folder)
+        self.assertIs(index, get_dir_index(self.folder))
+
+        with open(os.path.join(self.folder, "e.png"), "w") as f:
+            f.write("e")
+        self.assertEqual(3, len(get_dir_index(self.folder).files("png")))
+
+    def test_watched(self):
+        set_dir_watched(self.folder, True)
+        try:
+            index = get_dir_index(self.folder)
+            with open(os.path.join(self.folder, "e.png"), "w") as f:
+                f.write("e")
+            self.assertIs(index, get_dir_index(self.folder))
+            invalidate_dir_index(self.folder)
+            self.assertEqual(3, len(get_dir_index(self.folder).files("png")))
+        finally:
+            set_dir_watched(self.folder, False)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import filecmp
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from unittest import TestCase
+
+from wsc.copier import CopyModeEnum, CopyStrategyEnum, copy_file
+from wsc.core import DataCollector, PropKeyEnum
+from wsc.hashing import (
+    HashCache,
+    calc_file_digest,
+    calc_fingerprints,
+    copy_and_hash,
+    get_hash_cache,
+    set_hash_cache,
+)
+
+
+class TestHashCache(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmp.name, "cache", "hash_cache.json")
+        self.old_cache = get_hash_cache()
+        set_hash_cache(HashCache(self.cache_file))
+        self.src = os.path.join(self.tmp.name, "src.png")
+        with open("./example/南瓜瓶/南瓜瓶子_接水.png", "rb") as f:
+            self.data = f.read()
+        with open(self.src, "wb") as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        set_hash_cache(self.old_cache)
+        self.tmp.cleanup()
+
+    def test_copy_and_hash(self):
+        dst = os.path.join(self.tmp.name, "dst.png")
+        digest = copy_and_hash(self.src, dst)
+        self.assertEqual(hashlib.md5(self.data).hexdigest(), digest)
+        self.assertTrue(filecmp.cmp(self.src, dst, shallow=False))
+        self.assertEqual(digest, get_hash_cache().lookup(self.src))
+
+    def test_persist(self):
+        digest = calc_file_digest(self.src)
+        get_hash_cache().save()
+        cache = HashCache(self.cache_file)
+        self.assertEqual(digest, cache.lookup(self.src))
+
+    def test_concurrent_save(self):
+        cache = get_hash_cache()
+        st = os.stat(self.src)
+        errors = []
+
+        def _store(n):
+            try:
+                for i in range(2000):
+                    cache.store(f"{self.src}.{n}.{i}", "x", st=st)
+            except Exception as e:
+                errors.append(e)
+
+        def _save():
+            try:
+                for _ in range(20):
+                    cache.store(self.src, "y", st=st)
+                    cache.save()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_store, args=(n,)) for n in range(2)]
+        threads += [threading.Thread(target=_save) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(["hash_cache.json"], os.listdir(os.path.dirname(self.cache_file)))
+        self.assertEqual("y", HashCache(self.cache_file).lookup(self.src))
+
+    def test_invalidate(self):
+        calc_file_digest(self.src)
+        with open(self.src, "ab") as f:
+            f.write(b"\0")
+        self.assertIsNone(get_hash_cache().lookup(self.src))
+        self.assertEqual(hashlib.md5(self.data + b"\0").hexdigest(), calc_file_digest(self.src))
+
+    def test_copy_fused_when_hash_missing(self):
+        dst = os.path.join(self.tmp.name, "dst.png")
+        strategy = copy_file(self.src, dst, CopyModeEnum.COPY, need_hash=True)
+        self.assertEqual(CopyStrategyEnum.FUSED, strategy)
+        strategy = copy_file(self.src, dst, CopyModeEnum.COPY, need_hash=True)
+        self.assertNotEqual(CopyStrategyEnum.FUSED, strategy)
+
+
+class TestFingerprints(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_cache = get_hash_cache()
+        set_hash_cache(HashCache())
+        self.button = os.path.join(self.tmp.name, "button.png")
+        with open(self.button, "wb") as f:
+            f.write(b"button")
+        self.level = os.path.join(self.tmp.name, "lv.json")
+        with open(self.level, "w", encoding="utf-8") as f:
+            f.write("{}")
+        self.out = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.out)
+
+    def tearDown(self):
+        set_hash_cache(self.old_cache)
+        self.tmp.cleanup()
+
+    def test_calc_fingerprints(self):
+        hashes = calc_fingerprints({"b.json": b"{}", "a.png": self.button, "c.png": self.button})
+        self.assertEqual(["a.png", "b.json", "c.png"], list(hashes.keys()))
+        self.assertEqual(hashlib.blake2b(b"button").hexdigest()[:16], hashes["a.png"])
+        self.assertEqual(hashes["a.png"], hashes["c.png"])
+        self.assertEqual(hashlib.blake2b(b"{}").hexdigest()[:16], hashes["b.json"])
+
+    def test_stable_config(self):
+        props = {
+            PropKeyEnum.G4_FILE_01: self.button,
+            PropKeyEnum.G2_LEVELS: [self.level],
+            PropKeyEnum.G5_STABLE_MD5: True,
+            PropKeyEnum.G5_ASSET_HASH: True,
+        }
+        config_file = os.path.join(self.out, "GameConfig.json")
+        DataCollector(incremental=False).store_assets(props, self.out)
+        with open(config_file, "rb") as f:
+            first = f.read()
+        DataCollector(incremental=False).store_assets(props, self.out)
+        with open(config_file, "rb") as f:
+            self.assertEqual(first, f.read())
+
+        hashes = json.loads(first)["assetHashes"]
+        self.assertEqual(["DownButtomBg.png", "lv1-1.json"], sorted(hashes))
+        self.assertEqual(hashlib.blake2b(b"button").hexdigest()[:16], hashes["DownButtomBg.png"])
+
+        with open(self.button, "ab") as f:
+            f.write(b"!")
+        DataCollector(incremental=False).store_assets(props, self.out)
+        with open(config_file, "r", encoding="utf-8") as f:
+            self.assertNotEqual(hashes["DownButtomBg.png"], json.load(f)["assetHashes"]["DownButtomBg.png"])
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+
+from wsc.core import DataCollector, PropKeyEnum
+from wsc.hashing import HashCache, get_hash_cache, set_hash_cache
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+@unittest.skipIf(Image is None, "pillow is not installed")
+class TestWebpTranscode(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_env = os.environ.get("WSC_CACHE_DIR")
+        os.environ["WSC_CACHE_DIR"] = os.path.join(self.tmp.name, "cache")
+        self.old_cache = get_hash_cache()
+        set_hash_cache(HashCache())
+
+        self.yxp_dir = os.path.join(self.tmp.name, "yxp")
+        self.out = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.yxp_dir)
+        os.makedirs(self.out)
+        for name in ["南瓜瓶子_接水.atlas", "南瓜瓶子_接水.skel", "特殊玩法水位 - 南瓜瓶子.csv"]:
+            with open(f"./example/南瓜瓶/{name}", "rb") as fsrc:
+                with open(os.path.join(self.yxp_dir, name), "wb") as fdst:
+                    fdst.write(fsrc.read())
+        img = Image.new("RGBA", (64, 32), (255, 0, 0, 128))
+        img.save(os.path.join(self.yxp_dir, "南瓜瓶子_接水.png"))
+
+    def tearDown(self):
+        set_hash_cache(self.old_cache)
+        if self.old_env is None:
+            del os.environ["WSC_CACHE_DIR"]
+        else:
+            os.environ["WSC_CACHE_DIR"] = self.old_env
+        self.tmp.cleanup()
+
+    def test_png_to_webp(self):
+        props = {PropKeyEnum.G5_YXP_DIR: self.yxp_dir, PropKeyEnum.G5_WEBP_QA: 0}
+        collector = DataCollector()
+        self.assertTrue(collector.check_yxp_folder(props))
+        collector.store_assets(props, self.out)
+
+        webp_file = os.path.join(self.out, "心形瓶子_接水.webp")
+        with Image.open(webp_file) as img:
+            self.assertEqual("WEBP", img.format)
+            self.assertEqual((64, 32), img.size)
+            self.assertEqual((255, 0, 0, 128), img.convert("RGBA").getpixel((0, 0)))
+
+    def test_reuse_cached_output(self):
+        props = {PropKeyEnum.G5_YXP_DIR: self.yxp_dir, PropKeyEnum.G5_WEBP_QA: 75}
+        DataCollector(incremental=False).store_assets(props, self.out)
+        cache_dir = os.path.join(os.environ["WSC_CACHE_DIR"], "store", "objects")
+        cached = [os.path.join(d, f) for d, _, files in os.walk(cache_dir) for f in files]
+        self.assertEqual(1, len(cached))
+
+        mtime = os.stat(cached[0]).st_mtime_ns
+        DataCollector(incremental=False).store_assets(props, os.path.join(self.tmp.name))
+        self.assertEqual(mtime, os.stat(cached[0]).st_mtime_ns)
+
+
+@unittest.skipIf(Image is None, "pillow is not installed")
+class TestTitleAtlas(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_env = os.environ.get("WSC_CACHE_DIR")
+        os.environ["WSC_CACHE_DIR"] = os.path.join(self.tmp.name, "cache")
+        self.old_cache = get_hash_cache()
+        set_hash_cache(HashCache())
+
+        self.lang_dir = os.path.join(self.tmp.name, "lang")
+        self.out = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.lang_dir)
+        os.makedirs(self.out)
+        colors = {"英语": (255, 0, 0, 255), "法语": (0, 255, 0, 255), "日语": (0, 0, 255, 128)}
+        for name, color in colors.items():
+            Image.new("RGBA", (40, 20), color).save(os.path.join(self.lang_dir, f"TitleBg-{name}.png"))
+
+    def tearDown(self):
+        set_hash_cache(self.old_cache)
+        if self.old_env is None:
+            del os.environ["WSC_CACHE_DIR"]
+        else:
+            os.environ["WSC_CACHE_DIR"] = self.old_env
+        self.tmp.cleanup()
+
+    def load_config(self):
+        with open(os.path.join(self.out, "GameConfig.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_pack_titles(self):
+        props = {PropKeyEnum.G1_IMG_DIR: self.lang_dir, PropKeyEnum.G1_PACK_LANG: True}
+        collector = DataCollector(incremental=False)
+        self.assertTrue(collector.check_lang_images(props))
+        collector.store_assets(props, self.out)
+
+        self.assertEqual(
+            ["GameConfig.json", "TitleBg-atlas.png"],
+            sorted(f for f in os.listdir(self.out) if not f.startswith(".")),
+        )
+        atlas = self.load_config()["titleImageAtlas"]
+        self.assertEqual("TitleBg-atlas", atlas["image"])
+        # english is the default too, both codes point at the same region
+        self.assertEqual({"default", "en", "fr", "ja"}, set(atlas["regions"]))
+        self.assertEqual(atlas["regions"]["default"], atlas["regions"]["en"])
+
+        with Image.open(os.path.join(self.out, "TitleBg-atlas.png")) as img:
+            self.assertEqual((atlas["width"], atlas["height"]), img.size)
+            img = img.convert("RGBA")
+            for code, color in [
+                ("en", (255, 0, 0, 255)),
+                ("fr", (0, 255, 0, 255)),
+                ("ja", (0, 0, 255, 128)),
+            ]:
+                region = atlas["regions"][code]
+                self.assertEqual((40, 20), (region["w"], region["h"]))
+                center = (region["x"] + region["w"] // 2, region["y"] + region["h"] // 2)
+                self.assertEqual(color, img.getpixel(center))
+
+    def test_single_language(self):
+        props = {PropKeyEnum.G1_IMG_DIR: self.lang_dir}
+        DataCollector(incremental=False, languages=["fr"]).store_assets(props, self.out)
+
+        self.assertEqual(
+            ["GameConfig.json", "TitleBg-法语.png", "TitleBg-英语.png"], sorted(os.listdir(self.out))
+        )
+        titles = self.load_config()["titleImageMultiLanguage"]
+        self.assertEqual({"default": "TitleBg-英语", "fr": "TitleBg-法语"}, titles)
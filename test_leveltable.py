@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from wsc.core import (
+    DataCollector,
+    ErrorCodeEnum,
+    PropKeyEnum,
+    load_props,
+)
+from wsc.leveltable import LevelTable
+
+
+class TestLevelTable(TestCase):
+
+    def test_table(self):
+        table = LevelTable([("k", "a.json"), ("k", ""), ("k", "c.json"), ("k", None)])
+        self.assertEqual(4, len(table))
+        self.assertEqual(2, table.count)
+        self.assertEqual(3, table.first_gap.id)
+        self.assertEqual("lv3-1.json", table.get(3).asset_name)
+        self.assertIsNone(table.get(5))
+        self.assertEqual([1, 3], [e.id for e in table.configured()])
+
+        table = LevelTable([("k", f"{i}.json") for i in range(50)] + [("k", "")])
+        self.assertEqual(50, table.count)
+        self.assertIsNone(table.first_gap)
+
+
+class TestLevelExport(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.out)
+        self.levels = []
+        for i in range(12):
+            path = os.path.join(self.tmp.name, f"level{i}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"bottles": [[1, 2, 1], [2, 1, 2], []]}, f)
+            self.levels.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_config(self):
+        with open(os.path.join(self.out, "GameConfig.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_many_levels(self):
+        collector = DataCollector()
+        self.assertIsNotNone(collector.export({PropKeyEnum.G2_LEVELS: self.levels}, self.out))
+
+        config = self.read_config()
+        self.assertEqual(12, config["LevelLength"])
+        self.assertEqual({"id": 12, "levle": "12-1"}, config["LevelData"][-1])
+        for i in range(12):
+            self.assertTrue(os.path.exists(os.path.join(self.out, f"lv{i + 1}-1.json")))
+
+    def test_legacy_keys(self):
+        collector = DataCollector()
+        props = {PropKeyEnum.G2_FILE_01: self.levels[0], PropKeyEnum.G2_FILE_02: self.levels[1]}
+        self.assertIsNotNone(collector.export(props, self.out))
+
+        config = self.read_config()
+        self.assertEqual(2, config["LevelLength"])
+        self.assertEqual(["1-1", "2-1", ""], [d["levle"] for d in config["LevelData"]])
+
+    def test_gap(self):
+        collector = DataCollector()
+        levels = self.levels[:4] + [""] + self.levels[5:]
+        self.assertIsNone(collector.export({PropKeyEnum.G2_LEVELS: levels}, self.out))
+        self.assertEqual([ErrorCodeEnum.E_LEVEL_GAP], [e.code for e in collector.errors if e.fatal])
+
+    def test_load_props(self):
+        project = os.path.join(self.tmp.name, "project.json")
+        with open(project, "w", encoding="utf-8") as f:
+            json.dump({"G2_LEVEL_FILES": ["level0.json", "", "level2.json"]}, f)
+
+        props = load_props(project)
+        self.assertEqual([self.levels[0], "", self.levels[2]], props[PropKeyEnum.G2_LEVELS])
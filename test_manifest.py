@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from wsc.core import DataCollector, PropKeyEnum
+from wsc.manifest import ExportManifest
+
+
+class TestExportManifest(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lang_dir = os.path.join(self.tmp.name, "lang")
+        self.out = os.path.join(self.tmp.name, "out")
+        shutil.copytree("./example/多语言标题", self.lang_dir)
+        os.makedirs(self.out)
+        self.props = {PropKeyEnum.G1_IMG_DIR: self.lang_dir}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def export(self):
+        collector = DataCollector()
+        collector.store_assets(self.props, self.out)
+        return collector._manifest.stats
+
+    def test_skip_unchanged(self):
+        self.assertEqual(4, self.export()["copied"])
+        stats = self.export()
+        self.assertEqual(0, stats["copied"])
+        self.assertEqual(4, stats["skipped"])
+        self.assertTrue(os.path.exists(os.path.join(self.out, ExportManifest.FILE_NAME)))
+
+    def test_rewrite_changed(self):
+        self.export()
+        with open(os.path.join(self.lang_dir, "TitleBg-日语.png"), "ab") as f:
+            f.write(b"\0")
+        stats = self.export()
+        self.assertEqual(1, stats["copied"])
+        self.assertEqual(3, stats["skipped"])
+
+    def test_touched_not_changed(self):
+        self.export()
+        src = os.path.join(self.lang_dir, "TitleBg-日语.png")
+        st = os.stat(src)
+        os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(0, self.export()["copied"])
+
+    def test_remove_stale(self):
+        self.export()
+        os.remove(os.path.join(self.lang_dir, "TitleBg-俄语.png"))
+        stats = self.export()
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(os.path.exists(os.path.join(self.out, "TitleBg-俄语.png")))
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import tempfile
+import unittest
+from unittest import TestCase
+
+from wsc.atlas import SpineAtlas
+from wsc.core import (
+    DataCollector,
+    PropKeyEnum,
+    RepackModeEnum,
+)
+from wsc.hashing import (
+    HashCache,
+    get_hash_cache,
+    set_hash_cache,
+)
+from wsc.packer import pack_rects
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+_LOOSE_ATLAS = """
+loose.png
+size: 256,256
+format: RGBA8888
+filter: Linear,Linear
+repeat: none
+a
+  rotate: false
+  xy: 0, 0
+  size: 40, 20
+  orig: 40, 20
+  offset: 0, 0
+  index: -1
+b
+  rotate: true
+  xy: 100, 100
+  size: 30, 10
+  orig: 30, 10
+  offset: 0, 0
+  index: -1
+c
+  rotate: false
+  xy: 200, 200
+  size: 16, 16
+  orig: 16, 16
+  offset: 0, 0
+  index: -1
+c_alias
+  rotate: false
+  xy: 200, 200
+  size: 16, 16
+  orig: 16, 16
+  offset: 0, 0
+  index: -1
+"""
+
+
+def _upright(img, region):
+    w, h = region.packed_size
+    x, y = region.xy
+    crop = img.crop((x, y, x + w, y + h))
+    return crop.transpose(Image.Transpose.ROTATE_270) if region.rotate else crop
+
+
+class TestPackRects(TestCase):
+
+    def assert_valid(self, sizes, width, height, placements, padding):
+        boxes = []
+        for (w, h), (x, y, rotated) in zip(sizes, placements):
+            if rotated:
+                w, h = h, w
+            self.assertTrue(0 <= x and x + w <= width and 0 <= y and y + h <= height)
+            boxes.append((x, y, x + w + padding, y + h + padding))
+        for i, a in enumerate(boxes):
+            for b in boxes[i + 1 :]:
+                self.assertFalse(a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3])
+
+    def test_random(self):
+        rnd = random.Random(7)
+        sizes = [(rnd.randint(4, 90), rnd.randint(4, 90)) for _ in range(120)]
+        width, height, placements = pack_rects(sizes, padding=2)
+        self.assert_valid(sizes, width, height, placements, 2)
+        self.assertGreater(sum(w * h for w, h in sizes) / (width * height), 0.75)
+
+    def test_power_of_two(self):
+        sizes = [(100, 30), (60, 60), (10, 120)]
+        width, height, placements = pack_rects(sizes, power_of_two=True, allow_rotate=False)
+        self.assertEqual(0, width & (width - 1))
+        self.assertEqual(0, height & (height - 1))
+        self.assertFalse(any(rotated for _, _, rotated in placements))
+        self.assert_valid(sizes, width, height, placements, 2)
+
+    def test_too_large(self):
+        with self.assertRaises(ValueError):
+            pack_rects([(300, 300)] * 4, max_size=512)
+
+
+@unittest.skipIf(Image is None, "pillow is not installed")
+class TestRepackTexture(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_env = os.environ.get("WSC_CACHE_DIR")
+        os.environ["WSC_CACHE_DIR"] = os.path.join(self.tmp.name, "cache")
+        self.old_cache = get_hash_cache()
+        set_hash_cache(HashCache())
+
+        self.yxp_dir = os.path.join(self.tmp.name, "yxp")
+        self.out = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.yxp_dir)
+        os.makedirs(self.out)
+        self.atlas_file = os.path.join(self.yxp_dir, "loose.atlas")
+        self.image_file = os.path.join(self.yxp_dir, "loose.png")
+        with open(self.atlas_file, "w", encoding="utf-8") as f:
+            f.write(_LOOSE_ATLAS)
+        for name in ["南瓜瓶子_接水.skel", "特殊玩法水位 - 南瓜瓶子.csv"]:
+            with open(f"./example/南瓜瓶/{name}", "rb") as fsrc:
+                with open(os.path.join(self.yxp_dir, name), "wb") as fdst:
+                    fdst.write(fsrc.read())
+
+        rnd = random.Random(3)
+        img = Image.new("RGBA", (256, 256))
+        img.putdata([tuple(rnd.randrange(256) for _ in range(4)) for _ in range(256 * 256)])
+        img.save(self.image_file)
+
+    def tearDown(self):
+        set_hash_cache(self.old_cache)
+        if self.old_env is None:
+            del os.environ["WSC_CACHE_DIR"]
+        else:
+            os.environ["WSC_CACHE_DIR"] = self.old_env
+        self.tmp.cleanup()
+
+    def test_repack_pixels(self):
+        from wsc.imaging import repack_texture
+
+        source = SpineAtlas.load(self.atlas_file)
+        atlas = SpineAtlas.load(self.atlas_file)
+        packed_file = repack_texture(atlas, self.image_file)
+
+        width, height = atlas.pages[0].size
+        self.assertLess(width * height, 256 * 256)
+        self.assertEqual([], atlas.validate())
+        with Image.open(self.image_file) as src, Image.open(packed_file) as dst:
+            self.assertEqual((width, height), dst.size)
+            for old, new in zip(source.regions(), atlas.regions()):
+                self.assertEqual(_upright(src, old).tobytes(), _upright(dst, new).tobytes(), new.name)
+
+        c, c_alias = atlas.pages[0].regions[2:]
+        self.assertEqual(c.xy, c_alias.xy)
+
+    def test_export(self):
+        props = {PropKeyEnum.G5_YXP_DIR: self.yxp_dir, PropKeyEnum.G5_REPACK: RepackModeEnum.POT}
+        DataCollector().store_assets(props, self.out)
+
+        atlas = SpineAtlas.load(os.path.join(self.out, "心形瓶子_接水.atlas"))
+        self.assertEqual("心形瓶子_接水.webp", atlas.pages[0].name)
+        with Image.open(os.path.join(self.out, "心形瓶子_接水.webp")) as img:
+            self.assertEqual(atlas.pages[0].size, img.size)
+            self.assertEqual(0, img.size[0] & (img.size[0] - 1))
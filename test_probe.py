@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from PIL import Image
+
+from wsc.core import (
+    DataCollector,
+    ErrorCodeEnum,
+    PropKeyEnum,
+)
+from wsc.probe import (
+    ColorTypeEnum,
+    ImageFormatEnum,
+    ImageInfo,
+    ImageProbeError,
+    probe_image,
+    probe_images,
+    read_image_info,
+)
+
+
+class TestImageProbe(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def save(self, name: str, mode: str, size=(123, 45), **options) -> str:
+        path = os.path.join(self.tmp.name, name)
+        Image.new(mode, size).save(path, **options)
+        return path
+
+    def test_formats(self):
+        cases = [
+            (self.save("a.png", "RGBA"), ImageFormatEnum.PNG, ColorTypeEnum.RGBA, True),
+            (self.save("b.png", "P", transparency=0), ImageFormatEnum.PNG, ColorTypeEnum.PALETTE, True),
+            (self.save("c.png", "L"), ImageFormatEnum.PNG, ColorTypeEnum.GRAY, False),
+            (self.save("d.jpg", "RGB", progressive=True), ImageFormatEnum.JPEG, ColorTypeEnum.RGB, False),
+            (self.save("e.jpg", "CMYK"), ImageFormatEnum.JPEG, ColorTypeEnum.CMYK, False),
+            (self.save("f.webp", "RGBA", lossless=True), ImageFormatEnum.WEBP, ColorTypeEnum.RGBA, True),
+            (self.save("g.webp", "RGB", quality=80), ImageFormatEnum.WEBP, ColorTypeEnum.RGB, False),
+            (self.save("h.webp", "RGBA", quality=80), ImageFormatEnum.WEBP, ColorTypeEnum.RGBA, True),
+        ]
+        for path, fmt, color_type, has_alpha in cases:
+            info = read_image_info(path)
+            self.assertEqual((fmt, (123, 45)), (info.format, info.size), path)
+            self.assertEqual((color_type, has_alpha), (info.color_type, info.has_alpha), path)
+
+        self.assertIsNone(read_image_info("./example/南瓜瓶/南瓜瓶子_接水.atlas"))
+        truncated = os.path.join(self.tmp.name, "t.png")
+        with open(cases[0][0], "rb") as f, open(truncated, "wb") as out:
+            out.write(f.read(20))
+        with self.assertRaises(ImageProbeError):
+            read_image_info(truncated)
+
+    def test_cache(self):
+        path = self.save("a.png", "RGB")
+        info = probe_image(path)
+        self.assertIs(info, probe_image(path))
+
+        # a rewritten file is read again
+        self.save("a.png", "RGB", size=(10, 20))
+        os.utime(path, ns=(0, 0))
+        self.assertEqual((10, 20), probe_image(path).size)
+
+        results = probe_images(
+            [path, self.save("b.jpg", "RGB"), os.path.join(self.tmp.name, "missing.png")]
+        )
+        self.assertEqual(3, len(results))
+        self.assertIsInstance(results[path], ImageInfo)
+        self.assertIsInstance(results[os.path.join(self.tmp.name, "missing.png")], OSError)
+
+
+class TestImageChecks(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check(self, name: str, props) -> list:
+        collector = DataCollector()
+        getattr(collector, name)(props)
+        return collector.errors
+
+    def test_asset_images(self):
+        big = os.path.join(self.tmp.name, "big.png")
+        Image.new("RGB", (5000, 10)).save(big)
+        errors = self.check("check_image_files", {PropKeyEnum.G4_FILE_01: big})
+        self.assertEqual([(ErrorCodeEnum.E_IMAGE_SIZE, True)], [(e.code, e.fatal) for e in errors])
+
+        # a png used as the jpg background only gets a warning
+        errors = self.check("check_image_files", {PropKeyEnum.G5_FILE_04: os.path.abspath("./logo.png")})
+        self.assertEqual([(ErrorCodeEnum.E_IMAGE_FORMAT, False)], [(e.code, e.fatal) for e in errors])
+
+        text = os.path.join(self.tmp.name, "win.png")
+        with open(text, "w") as f:
+            f.write("not an image")
+        errors = self.check("check_image_files", {PropKeyEnum.G5_FILE_01: text})
+        self.assertEqual([ErrorCodeEnum.E_IMAGE_FORMAT], [e.code for e in errors])
+        self.assertTrue(errors[0].fatal)
+
+    def test_lang_sizes(self):
+        folder = os.path.join(self.tmp.name, "lang")
+        shutil.copytree("./example/多语言标题", folder)
+        props = {PropKeyEnum.G1_IMG_DIR: folder}
+        self.assertEqual([], self.check("check_lang_images", props))
+
+        Image.new("RGBA", (100, 96)).save(os.path.join(folder, "TitleBg-日语.png"))
+        errors = self.check("check_lang_images", props)
+        self.assertEqual([ErrorCodeEnum.E_LANG_SIZE], [e.code for e in errors])
+        self.assertIn("96x96", errors[0].text)
+        self.assertIn("TitleBg-日语.png", errors[0].text)
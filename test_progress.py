@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+import time
+from unittest import skipUnless
+
+from testutil import ProjectTestCase
+from wsc.core import (
+    DataCollector,
+    ErrorCodeEnum,
+    ExportStageEnum,
+    PropKeyEnum,
+)
+
+try:
+    import PySide6  # noqa: F401
+
+    _HAS_QT = True
+except ImportError:
+    _HAS_QT = False
+
+
+class TestExportProgress(ProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(self.out)
+
+    def test_progress(self):
+        reports = []
+        lock = threading.Lock()
+
+        def _progress(done, total, path):
+            with lock:
+                reports.append((done, total))
+
+        collector = DataCollector(progress=_progress)
+        self.assertEqual(self.out, collector.export(self.props, self.out))
+        total = sum(os.path.getsize(p) for p in DataCollector.get_export_sources(self.props))
+        self.assertEqual((0, total), reports[0])
+        self.assertEqual(total, max(done for done, _ in reports))
+        self.assertEqual(len(DataCollector.get_export_sources(self.props)) + 1, len(reports))
+
+        # skipped files count as handled
+        reports.clear()
+        DataCollector(progress=_progress).export(self.props, self.out)
+        self.assertEqual(total, max(done for done, _ in reports))
+
+    def test_cancel(self):
+        collector = None
+
+        def _progress(done, total, path):
+            if done > 0:
+                collector.cancel()
+
+        collector = DataCollector(progress=_progress, max_workers=1)
+        self.assertIsNone(collector.export(self.props, self.out))
+        self.assertEqual(ErrorCodeEnum.E_CANCELLED, collector.errors[-1].code)
+        self.assertEqual([], os.listdir(self.out))
+
+        # outputs of an earlier export are kept, including the ones the cancelled export rewrote
+        self.assertEqual(self.out, DataCollector().export(self.props, self.out))
+        before = sorted(os.listdir(self.out))
+        with open(self.level, "w", encoding="utf-8") as f:
+            json.dump({"bottles": [[1, 1], [2, 2], []]}, f)
+
+        def _cancel_after_level(done, total, path):
+            if path == self.level:
+                collector.cancel()
+
+        collector = DataCollector(progress=_cancel_after_level)
+        self.assertIsNone(collector.export(self.props, self.out))
+        self.assertEqual(before, sorted(os.listdir(self.out)))
+
+        self.assertEqual(self.out, DataCollector().export(self.props, self.out))
+        self.assertEqual(before, sorted(os.listdir(self.out)))
+        with open(os.path.join(self.out, "lv1-1.json"), "r", encoding="utf-8") as f:
+            self.assertEqual([[1, 1], [2, 2], []], json.load(f)["bottles"])
+
+
+@skipUnless(_HAS_QT, "PySide6 is not installed")
+class TestExportTask(ProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide6.QtCore import QCoreApplication
+
+        self.app = QCoreApplication.instance() or QCoreApplication([])
+        # the level and the download button are enough to exercise the queue
+        self.props = {key: self.props[key] for key in (PropKeyEnum.G2_LEVELS, PropKeyEnum.G4_FILE_01)}
+
+    def test_queue(self):
+        from PySide6.QtCore import QThreadPool
+
+        from wsc.gui import JxExportTask
+
+        pool = QThreadPool()
+        pool.setMaxThreadCount(1)
+        finished = []
+        progress = []
+        tasks = []
+        for name in ("a", "b"):
+            os.makedirs(os.path.join(self.tmp.name, name))
+            task = JxExportTask(self.props, os.path.join(self.tmp.name, name))
+            task.signals.progress.connect(lambda done, total, path: progress.append((done, total)))
+            task.signals.finished.connect(lambda t, exported: finished.append(exported))
+            tasks.append(task)
+            pool.start(task)
+
+        deadline = time.monotonic() + 30
+        while len(finished) < 2 and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.01)
+        pool.waitForDone()
+        self.assertEqual([t.target for t in tasks], finished)
+        self.assertEqual(progress[-1][1], progress[-1][0])
+        for name in ("a", "b"):
+            self.assertTrue(os.path.exists(os.path.join(self.tmp.name, name, "GameConfig.json")))
+
+    def test_stages(self):
+        from wsc.gui import JxExportTask
+
+        out = self.out
+        os.makedirs(out)
+
+        # a watch export only redoes the changed stages
+        task = JxExportTask(self.props, out, {ExportStageEnum.CONFIG})
+        finished = []
+        task.signals.finished.connect(lambda t, exported: finished.append(exported))
+        task.run()
+        self.assertEqual([out], finished)
+        self.assertIn("GameConfig.json", os.listdir(out))
+        self.assertNotIn("DownButtomBg.png", os.listdir(out))
+        self.assertNotIn("lv1-1.json", os.listdir(out))
+
+    def test_variants(self):
+        from wsc.gui import JxVariantsTask
+        from wsc.variants import VariantMatrix
+
+        matrix = VariantMatrix([(PropKeyEnum.G4_INIT_SC, [1.6, 1.8])])
+
+        finished = []
+        task = JxVariantsTask(self.props, matrix, os.path.join(self.tmp.name, "a"))
+        task.signals.finished.connect(lambda t, report: finished.append(report))
+        task.run()
+        self.assertEqual(["v1", "v2"], [v["name"] for v in finished[0]["variants"]])
+        self.assertTrue(all(v["ok"] for v in finished[0]["variants"]))
+
+        # cancelling before the run leaves nothing behind
+        task = JxVariantsTask(self.props, matrix, os.path.join(self.tmp.name, "b"))
+        task.signals.finished.connect(lambda t, report: finished.append(report))
+        task.cancel()
+        task.run()
+        self.assertTrue(finished[1]["cancelled"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "b", "v1")))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from wsc.atlas import SpineAtlas
+from wsc.core import (
+    DataCollector,
+    ErrorCodeEnum,
+    PropKeyEnum,
+)
+from wsc.skeleton import (
+    SkeletonFormatError,
+    SpineSkeleton,
+)
+
+_SKEL_FILE = "./example/南瓜瓶/南瓜瓶子_接水.skel"
+_ATLAS_FILE = "./example/南瓜瓶/南瓜瓶子_接水.atlas"
+
+
+class TestSpineSkeleton(TestCase):
+
+    def test_example(self):
+        skel = SpineSkeleton.load(_SKEL_FILE)
+        self.assertEqual("3.8.95", skel.version)
+        self.assertEqual(["完成反馈", "完成待机", "待机_0", "程序调整_水位上涨"], list(skel.animations))
+        regions = {r.name for r in SpineAtlas.load(_ATLAS_FILE).regions()}
+        self.assertEqual(regions, skel.region_names())
+        self.assertTrue(skel.animation_regions("待机_0") <= regions)
+
+    def test_drop_animations(self):
+        skel = SpineSkeleton.load(_SKEL_FILE)
+        with open(_SKEL_FILE, "rb") as f:
+            self.assertEqual(f.read(), skel.dumps())
+
+        self.assertEqual(2, skel.drop_animations(["完成反馈", "完成待机", "没有"]))
+        data = skel.dumps()
+        pruned = SpineSkeleton.loads(data)
+        self.assertEqual(["待机_0", "程序调整_水位上涨"], list(pruned.animations))
+        self.assertEqual(skel.region_names(), pruned.region_names())
+        self.assertLess(len(data), os.path.getsize(_SKEL_FILE))
+
+    def test_bad_data(self):
+        with open(_SKEL_FILE, "rb") as f:
+            data = f.read()
+        with self.assertRaises(SkeletonFormatError):
+            SpineSkeleton.loads(data[:-7])
+        with self.assertRaises(SkeletonFormatError):
+            SpineSkeleton.loads(data.replace(b"3.8.95", b"4.1.00", 1))
+
+
+class TestSkeletonExport(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.yxp_dir = os.path.join(self.tmp.name, "yxp")
+        self.out = os.path.join(self.tmp.name, "out")
+        shutil.copytree("./example/南瓜瓶", self.yxp_dir)
+        os.makedirs(self.out)
+
+        # an extra region the skeleton never draws
+        atlas_file = os.path.join(self.yxp_dir, "南瓜瓶子_接水.atlas")
+        with open(atlas_file, "a", encoding="utf-8", newline="") as f:
+            f.write(
+                "未使用\n  rotate: false\n  xy: 0, 0\n  size: 2, 2\n  orig: 2, 2\n  offset: 0, 0\n  index: -1\n"
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_check(self):
+        collector = DataCollector()
+        self.assertTrue(collector.check_yxp_folder({PropKeyEnum.G5_YXP_DIR: self.yxp_dir}))
+        self.assertEqual([False], [e.fatal for e in collector.errors])
+
+        collector = DataCollector()
+        props = {PropKeyEnum.G5_YXP_DIR: self.yxp_dir, PropKeyEnum.G5_PRUNE: True}
+        self.assertTrue(collector.check_yxp_folder(props))
+        self.assertEqual([], collector.errors)
+
+        props[PropKeyEnum.G5_KEEP_ANI] = ["没有"]
+        self.assertFalse(collector.check_yxp_folder(props))
+        self.assertEqual([ErrorCodeEnum.E_SKEL], [e.code for e in collector.errors])
+
+    def test_atlas_parsed_once(self):
+        with mock.patch.object(SpineAtlas, "load", wraps=SpineAtlas.load) as load:
+            self.assertTrue(DataCollector().check_yxp_folder({PropKeyEnum.G5_YXP_DIR: self.yxp_dir}))
+        self.assertEqual(1, load.call_count)
+
+    def test_missing_region(self):
+        atlas_file = os.path.join(self.yxp_dir, "南瓜瓶子_接水.atlas")
+        atlas = SpineAtlas.load(atlas_file)
+        atlas.drop_regions(["水波"])
+        atlas.save(atlas_file)
+
+        collector = DataCollector()
+        self.assertFalse(collector.check_yxp_folder({PropKeyEnum.G5_YXP_DIR: self.yxp_dir}))
+        self.assertIn("水波", collector.errors[0].text)
+
+    def test_export_pruned(self):
+        props = {
+            PropKeyEnum.G5_YXP_DIR: self.yxp_dir,
+            PropKeyEnum.G5_PRUNE: True,
+            PropKeyEnum.G5_KEEP_ANI: ["待机_0"],
+        }
+        DataCollector().store_yxp_files(props, self.out)
+
+        atlas = SpineAtlas.load(os.path.join(self.out, "心形瓶子_接水.atlas"))
+        self.assertNotIn("未使用", [r.name for r in atlas.regions()])
+        kept = SpineSkeleton.load(_SKEL_FILE).region_names(["待机_0"])
+        self.assertEqual(kept, {r.name for r in atlas.regions()})
+        skel = SpineSkeleton.load(os.path.join(self.out, "心形瓶子_接水.skel"))
+        self.assertEqual(["待机_0"], list(skel.animations))
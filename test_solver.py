@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from unittest import TestCase, mock
+
+from testutil import random_level
+from wsc.cli import ExitCodeEnum, main
+from wsc.core import (
+    DataCollector,
+    ErrorCodeEnum,
+    LastLevelCondEnum,
+    PropKeyEnum,
+)
+from wsc.levels import (
+    LevelFormatError,
+    WaterSortLevel,
+)
+from wsc.solver import (
+    clear_solver_cache,
+    solve,
+    solve_level,
+)
+from wsc.workers import run_jobs
+
+
+def _apply(bottles, solution, capacity):
+    bottles = [list(b) for b in bottles]
+    for i, j in solution:
+        color = bottles[i][-1]
+        assert not bottles[j] or bottles[j][-1] == color
+        while bottles[i] and bottles[i][-1] == color and len(bottles[j]) < capacity:
+            bottles[j].append(bottles[i].pop())
+    return bottles
+
+
+class TestWaterSortLevel(TestCase):
+
+    def test_formats(self):
+        level = WaterSortLevel.from_data({"capacity": 3, "tubes": [["red", "blue"], ["blue", "red"], []]})
+        self.assertEqual(((1, 2), (2, 1), ()), level.bottles)
+        self.assertEqual(3, level.capacity)
+        self.assertEqual(["red", "blue"], level.colors)
+
+        level = WaterSortLevel.from_data({"data": {"bottles": ["1,2,0", "2,1,0", "0,0,0"]}})
+        self.assertEqual(((1, 2), (2, 1), ()), level.bottles)
+        self.assertEqual(3, level.capacity)
+
+        self.assertEqual(2, WaterSortLevel.from_data([[1, 2], [2, 1], []]).capacity)
+
+    def test_bad_format(self):
+        with self.assertRaises(LevelFormatError):
+            WaterSortLevel.from_data({"id": 1})
+        with self.assertRaises(LevelFormatError):
+            WaterSortLevel.from_data({"capacity": 2, "bottles": [[1, 1, 1], []]})
+
+
+class TestSolver(TestCase):
+
+    def test_small(self):
+        result = solve([[1, 2], [2, 1], []], 2)
+        self.assertEqual((True, 3, True), (result.solvable, result.moves, result.optimal))
+        solved = _apply([[1, 2], [2, 1], []], result.solution, 2)
+        self.assertEqual([[], [1, 1], [2, 2]], sorted(solved))
+
+        self.assertEqual(0, solve([[1, 1], [2, 2], []], 2).moves)
+
+    def test_unsolvable(self):
+        result = solve([[1, 2], [2, 1]], 2)
+        self.assertEqual((False, True), (result.solvable, result.optimal))
+
+    def test_large_levels(self):
+        for bottles in (14, 16):
+            level = WaterSortLevel(random_level(bottles - 2, 2, seed=bottles))
+            result = solve_level(level, time_limit=10)
+            self.assertTrue(result.solvable)
+            self.assertTrue(result.optimal)
+            self.assertLess(result.elapsed, 5)
+            solved = _apply(level.bottles, result.solution, level.capacity)
+            self.assertTrue(all(len(set(b)) <= 1 for b in solved))
+
+
+class TestLevelChecks(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.solvable = os.path.join(self.tmp.name, "lv1-1.json")
+        self.unsolvable = os.path.join(self.tmp.name, "lv2-1.json")
+        with open(self.solvable, "w", encoding="utf-8") as f:
+            json.dump({"bottles": [[1, 2], [2, 1], []], "capacity": 2}, f)
+        with open(self.unsolvable, "w", encoding="utf-8") as f:
+            json.dump({"bottles": [[1, 2], [2, 1]], "capacity": 2}, f)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_check_solvable(self):
+        collector = DataCollector()
+        props = {PropKeyEnum.G2_FILE_01: self.solvable, PropKeyEnum.G2_FILE_02: self.unsolvable}
+        # solving is opt-in, a plain check leaves the levels alone
+        self.assertTrue(collector.check_level_solvable(props))
+        self.assertEqual([], collector.errors)
+
+        props[PropKeyEnum.G3_SOLVE] = True
+        self.assertFalse(collector.check_level_solvable(props))
+        self.assertEqual([ErrorCodeEnum.E_LEVEL_UNSOLVABLE], [e.code for e in collector.errors])
+        self.assertEqual(PropKeyEnum.G2_FILE_02, collector.errors[0].key)
+
+    def test_suggest_n_value(self):
+        collector = DataCollector()
+        props = {
+            PropKeyEnum.G2_FILE_01: self.solvable,
+            PropKeyEnum.G3_OPT_TYP: LastLevelCondEnum.E01,
+            PropKeyEnum.G3_OPT_NUM: 5,
+            PropKeyEnum.G3_SOLVE: True,
+        }
+        self.assertTrue(collector.check_n_value(props))
+        self.assertEqual([], collector.errors)
+        self.assertTrue(collector.check_level_solvable(props))
+        self.assertEqual([False], [e.fatal for e in collector.errors])
+        self.assertIn("建议设为 2", collector.errors[0].text)
+
+    def test_solve_once(self):
+        props = {
+            PropKeyEnum.G2_FILE_01: self.solvable,
+            PropKeyEnum.G3_OPT_TYP: LastLevelCondEnum.E01,
+            PropKeyEnum.G3_OPT_NUM: 5,
+            PropKeyEnum.G3_SOLVE: True,
+        }
+        clear_solver_cache()
+        with mock.patch("wsc.solver.run_jobs", wraps=run_jobs) as jobs:
+            DataCollector().sanity_check(props)
+        self.assertEqual(1, jobs.call_count)
+
+    def test_cli_export(self):
+        project = os.path.join(self.tmp.name, "project.json")
+        with open(project, "w", encoding="utf-8") as f:
+            json.dump({"G2_FILE_01": self.unsolvable}, f)
+        out = os.path.join(self.tmp.name, "out")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(ExitCodeEnum.OK, main(["export", project, "--out", out]))
+            self.assertEqual(ExitCodeEnum.CHECK, main(["export", project, "--out", out, "--solve"]))
+
+    def test_cli(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = main(["solve", "--json", self.solvable, self.unsolvable])
+        self.assertEqual(ExitCodeEnum.CHECK, code)
+        reports = json.loads(out.getvalue())
+        self.assertEqual([3, None], [r["moves"] for r in reports])
+        self.assertEqual(2, reports[0]["suggested_n"])
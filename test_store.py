@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from wsc.copier import CopyModeEnum
+from wsc.core import DataCollector, PropKeyEnum
+from wsc.hashing import HashCache, get_hash_cache, set_hash_cache
+from wsc.store import AssetStore, get_asset_store
+
+
+class TestAssetStore(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_env = os.environ.get("WSC_CACHE_DIR")
+        os.environ["WSC_CACHE_DIR"] = os.path.join(self.tmp.name, "cache")
+        self.old_cache = get_hash_cache()
+        set_hash_cache(HashCache())
+        self.store = AssetStore(os.path.join(self.tmp.name, "store"))
+
+    def tearDown(self):
+        set_hash_cache(self.old_cache)
+        if self.old_env is None:
+            del os.environ["WSC_CACHE_DIR"]
+        else:
+            os.environ["WSC_CACHE_DIR"] = self.old_env
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_put_and_materialize(self):
+        a = self.write("a.png", b"same")
+        b = self.write("b.png", b"same")
+        digest = self.store.put_file(a)
+        self.assertEqual(hashlib.sha256(b"same").hexdigest(), digest)
+        self.assertEqual(digest, self.store.put_file(b))
+        self.assertEqual(1, self.store.stats()["objects"])
+
+        dst = os.path.join(self.tmp.name, "out.png")
+        self.store.materialize(digest, dst, CopyModeEnum.HARDLINK)
+        self.assertTrue(os.path.samefile(self.store.object_path(digest), dst))
+        # rewriting the output replaces the link, the stored object stays intact
+        self.store.materialize(self.store.put_file(self.write("c.png", b"other")), dst)
+        with open(self.store.object_path(digest), "rb") as f:
+            self.assertEqual(b"same", f.read())
+
+    def test_derived(self):
+        key = AssetStore.derived_key("webp", "input", {"quality": 75})
+        self.assertNotEqual(key, AssetStore.derived_key("webp", "input", {"quality": 80}))
+        self.assertIsNone(self.store.lookup_derived(key))
+
+        temp_file = self.store.temp_path(".webp")
+        with open(temp_file, "wb") as f:
+            f.write(b"encoded")
+        path = self.store.store_derived(key, temp_file)
+        self.assertEqual(path, self.store.lookup_derived(key))
+        self.store.save()
+
+        reopened = AssetStore(self.store.root)
+        self.assertEqual(path, reopened.lookup_derived(key))
+
+    def test_gc(self):
+        digests = [self.store.put_file(self.write(f"{i}.bin", bytes([i]) * 100)) for i in range(4)]
+        time.sleep(0.01)
+        self.store.put_file(self.write("again.bin", bytes([0]) * 100))
+        key = AssetStore.derived_key("repack", digests[1])
+        self.store._derived[key] = digests[1]
+
+        report = self.store.gc(max_bytes=250)
+        self.assertEqual(2, report["removed"])
+        self.assertEqual([True, False, False, True], [self.store.has(d) for d in digests])
+        self.assertIsNone(self.store.lookup_derived(key))
+
+        # an object another process wrote without the index is still collected
+        os.remove(self.store.index_path)
+        report = AssetStore(self.store.root).gc(max_bytes=0)
+        self.assertEqual(2, report["removed"])
+
+    def test_export(self):
+        props = {
+            PropKeyEnum.G4_FILE_01: os.path.abspath("./logo.png"),
+            PropKeyEnum.G1_IMG_DIR: os.path.abspath("./example/多语言标题"),
+        }
+        outs = [os.path.join(self.tmp.name, name) for name in ("a", "b")]
+        for out in outs:
+            os.makedirs(out)
+            DataCollector(use_store=True, copy_mode=CopyModeEnum.HARDLINK).store_assets(props, out)
+
+        name = "TitleBg-英语.png"
+        self.assertTrue(os.path.samefile(os.path.join(outs[0], name), os.path.join(outs[1], name)))
+        self.assertFalse(os.path.samefile(os.path.join(outs[0], name), f"./example/多语言标题/{name}"))
+        with open(get_asset_store().index_path, "r", encoding="utf-8") as f:
+            self.assertEqual(len(os.listdir("./example/多语言标题")) + 1, len(json.load(f)["objects"]))
+
+        shutil.rmtree(outs[1])
+        os.makedirs(outs[1])
+        DataCollector(use_store=True).store_assets(props, outs[1])
+        self.assertTrue(os.path.exists(os.path.join(outs[1], name)))
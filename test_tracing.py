@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from wsc.cli import ExitCodeEnum, main
+from wsc.tracing import (
+    Tracer,
+    get_tracer,
+    log,
+    setup_logging,
+    traced,
+)
+
+
+class TestTracer(TestCase):
+
+    def test_disabled(self):
+        tracer = Tracer()
+        with tracer.span("a") as s:
+            s.add(files=1)
+        self.assertIs(tracer.span("a"), tracer.span("b"))
+        self.assertEqual({}, tracer.summary())
+
+    def test_spans(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        tracer = Tracer()
+        tracer.start(os.path.join(tmp.name, "trace.json"))
+        with tracer.span("outer"):
+            for _ in range(3):
+                with tracer.span("inner", "io", files=1) as s:
+                    s.add(bytes=10)
+        with self.assertRaises(ValueError), tracer.span("failed"):
+            raise ValueError()
+        summary = tracer.stop()
+
+        self.assertEqual(
+            {"count": 3, "files": 3, "bytes": 30},
+            {k: summary["inner"][k] for k in ("count", "files", "bytes")},
+        )
+        self.assertGreaterEqual(summary["outer"]["seconds"], summary["inner"]["seconds"])
+        with open(os.path.join(tmp.name, "trace.json"), "r", encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        spans = [e for e in events if e["ph"] == "X"]
+        self.assertEqual(["inner", "inner", "inner", "outer", "failed"], [e["name"] for e in spans])
+        self.assertEqual("ValueError", spans[-1]["args"]["error"])
+        # children lie inside their parent on the time line
+        outer = spans[3]
+        self.assertTrue(
+            all(
+                outer["ts"] <= e["ts"] and e["ts"] + e["dur"] <= outer["ts"] + outer["dur"]
+                for e in spans[:3]
+            )
+        )
+        self.assertIn("thread_name", [e["name"] for e in events if e["ph"] == "M"])
+
+    def test_traced(self):
+        @traced("work")
+        def work(x):
+            return x * 2
+
+        tracer = get_tracer()
+        self.assertEqual(4, work(2))
+        tracer.start()
+        try:
+            self.assertEqual(6, work(3))
+        finally:
+            summary = tracer.stop()
+        self.assertEqual(1, summary["work"]["count"])
+
+
+class TestTraceOutput(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp.name, "logs", "wsc.log")
+
+    def tearDown(self):
+        setup_logging()
+        self.tmp.cleanup()
+
+    def test_rotating_log(self):
+        setup_logging(self.log_file)
+        setup_logging(self.log_file)
+        self.assertEqual(1, len([h for h in log.handlers if isinstance(h, logging.FileHandler)]))
+        log.info("x" * 1024 * 1024)
+        log.info("x" * 1024 * 1024)
+        log.info("done")
+        self.assertTrue(os.path.exists(f"{self.log_file}.1"))
+        with open(self.log_file, "r", encoding="utf-8") as f:
+            self.assertIn("done", f.read())
+
+    def test_cli(self):
+        yxp_dir = os.path.join(self.tmp.name, "yxp")
+        shutil.copytree("./example/南瓜瓶", yxp_dir)
+        with open(os.path.join(self.tmp.name, "lv.json"), "w", encoding="utf-8") as f:
+            json.dump({"bottles": [[1, 2], [2, 1], []]}, f)
+        project = os.path.join(self.tmp.name, "project.json")
+        with open(project, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "G2_LEVEL_FILES": ["lv.json"],
+                    "G5_YXP_DIR": "yxp",
+                    "G4_FILE_01": os.path.abspath("./logo.png"),
+                },
+                f,
+            )
+
+        trace_file = os.path.join(self.tmp.name, "trace.json")
+        out = os.path.join(self.tmp.name, "out")
+        args = ["export", project, "--out", out, "--log-file", self.log_file, "--trace-file", trace_file]
+        self.assertEqual(ExitCodeEnum.OK, main(args))
+        self.assertFalse(get_tracer().enabled)
+
+        with open(trace_file, "r", encoding="utf-8") as f:
+            names = {e["name"]: e for e in json.load(f)["traceEvents"] if e["ph"] == "X"}
+        for name in ("sanity_check", "check_yxp_folder", "copy_file", "rewrite_atlas", "store_config"):
+            self.assertIn(name, names)
+        self.assertEqual(1, names["copy_file"]["args"]["files"])
+        with open(self.log_file, "r", encoding="utf-8") as f:
+            text = f.read()
+        self.assertIn("Copy file:", text)
+        self.assertIn("trace store_config:", text)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from wsc.core import (
+    DataCollector,
+    ErrorCodeEnum,
+    PropKeyEnum,
+)
+from wsc.validation import ValidationEngine
+
+
+class TestValidationEngine(TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        class CountingCollector(DataCollector):
+            def __getattribute__(inner, name):
+                if name.startswith("check_"):
+                    self.calls.append(name)
+                return super().__getattribute__(name)
+
+        self.engine = ValidationEngine(CountingCollector, DataCollector._CHECK_KEYS)
+
+    def tearDown(self):
+        self.engine.shutdown()
+
+    def test_report_all(self):
+        props = {
+            PropKeyEnum.G3_OPT_TYP: "a",
+            PropKeyEnum.G4_FILE_01: "./missing.png",
+            PropKeyEnum.G5_YXP_DIR: "./missing_dir",
+        }
+        codes = {e.code for e in self.engine.validate(props)}
+        self.assertEqual(
+            {
+                ErrorCodeEnum.E_N_VALUE,
+                ErrorCodeEnum.E_FILE_DELETED,
+                ErrorCodeEnum.E_LEVEL_EMPTY,
+                ErrorCodeEnum.E_YXP_DELETED,
+            },
+            codes,
+        )
+
+    def test_rerun_affected(self):
+        props = {PropKeyEnum.G3_OPT_TYP: "a"}
+        self.engine.validate(props)
+        self.assertEqual(len(DataCollector._CHECK_KEYS), len(self.calls))
+
+        self.calls.clear()
+        props[PropKeyEnum.G3_OPT_NUM] = 3
+        diagnostics = self.engine.validate(props)
+        self.assertEqual(["check_level_solvable", "check_n_value"], sorted(self.calls))
+        self.assertEqual([ErrorCodeEnum.E_LEVEL_EMPTY], [e.code for e in diagnostics])
+
+    def test_submit(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            level_file = os.path.join(tmp, "lv1-1.json")
+            with open(level_file, "w", encoding="utf-8") as f:
+                json.dump({"bottles": [[1, 2, 1], [2, 1, 2], []]}, f)
+            future = self.engine.submit({PropKeyEnum.G2_FILE_01: level_file})
+            self.assertEqual([], future.result(timeout=10))
+
+    def test_sanity_check(self):
+        collector = DataCollector()
+        self.assertFalse(collector.sanity_check({PropKeyEnum.G3_OPT_TYP: "a"}))
+        self.assertEqual(2, len(collector.errors))
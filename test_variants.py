@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+from unittest import TestCase
+
+from testutil import ProjectTestCase
+from wsc.cli import ExitCodeEnum, main
+from wsc.core import ExportError, PropKeyEnum
+from wsc.variants import (
+    SHARED_DIR,
+    VariantMatrix,
+    export_variants,
+)
+
+
+class TestVariantMatrix(TestCase):
+
+    def test_product_and_sample(self):
+        matrix = VariantMatrix(
+            [(PropKeyEnum.G4_INIT_SC, [1.6, 1.8, 2.0]), (PropKeyEnum.G5_IS_TUTR, [True, False])]
+        )
+        variants = matrix.expand({})
+        self.assertEqual(6, len(variants))
+        self.assertEqual("v1", variants[0].name)
+        self.assertEqual({PropKeyEnum.G4_INIT_SC: 1.6, PropKeyEnum.G5_IS_TUTR: False}, variants[1].values)
+
+        matrix.sample, matrix.seed = 3, 7
+        sampled = matrix.expand({})
+        self.assertEqual([v.name for v in sampled], [v.name for v in matrix.expand({})])
+        self.assertEqual(3, len(sampled))
+        for v in sampled:
+            self.assertEqual(variants[v.index].values, v.values)
+
+    def test_names(self):
+        matrix = VariantMatrix([(PropKeyEnum.G4_INIT_SC, [1.6, 1.8])], name="s{G4_INIT_SCALE}")
+        self.assertEqual(["s1.6", "s1.8"], [v.name for v in matrix.expand({})])
+
+        matrix.name = "same"
+        with self.assertRaises(ExportError):
+            matrix.expand({})
+
+
+class TestVariantExport(ProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.background = os.path.join(self.tmp.name, "bg2.jpg")
+        shutil.copy("./logo.png", self.background)
+
+    def test_shared_assets(self):
+        matrix = VariantMatrix(
+            [
+                (PropKeyEnum.G4_INIT_SC, [1.6, 1.8]),
+                (PropKeyEnum.G5_FILE_04, [os.path.abspath("./logo.png"), self.background]),
+            ]
+        )
+        report = export_variants(self.props, matrix, self.out)
+        self.assertTrue(all(v["ok"] for v in report["variants"]))
+        self.assertEqual(2, len(report["groups"]))
+
+        atlas = [
+            os.stat(os.path.join(self.out, n, "心形瓶子_接水.atlas")) for n in ("v1", "v2", "v3", "v4")
+        ]
+        self.assertTrue(os.path.samestat(atlas[0], atlas[2]))
+        self.assertTrue(os.path.samestat(atlas[1], atlas[3]))
+        configs = []
+        for name in ("v1", "v3"):
+            with open(os.path.join(self.out, name, "GameConfig.json"), "r", encoding="utf-8") as f:
+                configs.append(json.load(f)["DownButtomInfo"]["scale"])
+        self.assertEqual([1.6, 1.8], configs)
+
+        # a smaller matrix removes the variants and shared exports it no longer has
+        matrix.axes = matrix.axes[:1]
+        report = export_variants(self.props, matrix, self.out)
+        self.assertEqual(["v1", "v2"], [v["name"] for v in report["variants"]])
+        self.assertFalse(os.path.exists(os.path.join(self.out, "v3")))
+        self.assertEqual(1, len(os.listdir(os.path.join(self.out, SHARED_DIR))))
+        with open(os.path.join(self.out, "variants.json"), "r", encoding="utf-8") as f:
+            self.assertEqual([1.6, 1.8], json.load(f)["axes"]["G4_INIT_SCALE"])
+
+    def test_progress_and_cancel(self):
+        matrix = VariantMatrix([(PropKeyEnum.G4_INIT_SC, [1.6, 1.8])])
+        reports = []
+        report = export_variants(
+            self.props, matrix, self.out, progress=lambda done, total, path: reports.append((done, total))
+        )
+        self.assertFalse(report["cancelled"])
+        # one shared export and two variants
+        self.assertEqual([(1, 3), (2, 3), (3, 3)], sorted(reports))
+
+        shutil.rmtree(self.out)
+        report = export_variants(self.props, matrix, self.out, cancelled=lambda: True)
+        self.assertTrue(report["cancelled"])
+        self.assertFalse(os.path.exists(os.path.join(self.out, "v1")))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "variants.json")))
+
+    def test_cli(self):
+        project = os.path.join(self.tmp.name, "project.json")
+        with open(project, "w", encoding="utf-8") as f:
+            json.dump({"G2_LEVEL_FILES": ["lv.json"], "G5_YXP_DIR": "yxp"}, f)
+        matrix = os.path.join(self.tmp.name, "matrix.json")
+        with open(matrix, "w", encoding="utf-8") as f:
+            json.dump({"axes": {"G3_OPT_TYPE": ["0", "a"], "G3_OPT_NUMBER": [5, 8, 10]}, "sample": 4}, f)
+
+        code = main(["variants", project, "--matrix", matrix, "--out", self.out, "--seed", "3"])
+        self.assertEqual(ExitCodeEnum.OK, code)
+        with open(os.path.join(self.out, "variants.json"), "r", encoding="utf-8") as f:
+            names = [v["name"] for v in json.load(f)["variants"]]
+        self.assertEqual(4, len(names))
+        for name in names:
+            self.assertTrue(os.path.exists(os.path.join(self.out, name, "GameConfig.json")))
+
+        with open(matrix, "w", encoding="utf-8") as f:
+            json.dump({"axes": {"G3_OPT_TYPE": ["x"]}}, f)
+        code = main(["variants", project, "--matrix", matrix, "--out", self.out])
+        self.assertEqual(ExitCodeEnum.PROJECT, code)
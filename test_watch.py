@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from unittest import TestCase
+
+from wsc.cli import ExitCodeEnum, run_watch
+from wsc.core import (
+    DataCollector,
+    ExportStageEnum,
+    PropKeyEnum,
+)
+from wsc.watch import PollingWatcher
+
+
+class TestWatch(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.level = os.path.join(self.tmp.name, "lv.json")
+        self.yxp_dir = os.path.join(self.tmp.name, "yxp")
+        self.out = os.path.join(self.tmp.name, "out")
+        self.write_level([[1, 2], [2, 1], []])
+        os.makedirs(self.yxp_dir)
+        self.csv = os.path.join(self.yxp_dir, "config.csv")
+        with open(self.csv, "w", encoding="utf-8") as f:
+            f.write("a,b\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_level(self, bottles):
+        with open(self.level, "w", encoding="utf-8") as f:
+            json.dump({"bottles": bottles}, f)
+
+    def test_debounce(self):
+        watcher = PollingWatcher([self.level, self.yxp_dir], interval=0.01, quiet=0.1)
+        self.assertEqual(set(), watcher.wait(timeout=0.05))
+
+        def _burst():
+            for i in range(5):
+                self.write_level([[1, 2], [2, 1], [], [i]])
+                time.sleep(0.03)
+            with open(self.csv, "a", encoding="utf-8") as f:
+                f.write("c,d\n")
+
+        thread = threading.Thread(target=_burst)
+        thread.start()
+        changed = watcher.wait(timeout=2)
+        thread.join()
+        self.assertEqual({self.level, self.yxp_dir}, changed)
+
+    def test_changed_stages(self):
+        props = {PropKeyEnum.G2_LEVELS: [self.level], PropKeyEnum.G5_YXP_DIR: self.yxp_dir}
+        self.assertEqual(
+            {ExportStageEnum.FILES, ExportStageEnum.CONFIG},
+            DataCollector.get_changed_stages(props, {self.level}),
+        )
+        self.assertEqual({ExportStageEnum.YXP}, DataCollector.get_changed_stages(props, {self.csv}))
+        self.assertEqual(set(ExportStageEnum), DataCollector.get_changed_stages(props, {"project.json"}))
+
+    def test_prop_stages(self):
+        props = {
+            PropKeyEnum.G2_LEVELS: [self.level],
+            PropKeyEnum.G5_YXP_DIR: self.yxp_dir,
+            PropKeyEnum.G4_ANI_SC0: 1.2,
+            PropKeyEnum.G5_REPACK: "none",
+        }
+        self.assertEqual(
+            {ExportStageEnum.CONFIG}, DataCollector.get_prop_stages(props, PropKeyEnum.G4_ANI_SC0)
+        )
+        self.assertEqual(
+            {ExportStageEnum.YXP}, DataCollector.get_prop_stages(props, PropKeyEnum.G5_YXP_DIR)
+        )
+        self.assertEqual(
+            {ExportStageEnum.FILES, ExportStageEnum.CONFIG},
+            DataCollector.get_prop_stages(props, PropKeyEnum.G2_LEVELS),
+        )
+        # anything else may change every output
+        self.assertEqual(set(), DataCollector.get_prop_stages(props, PropKeyEnum.G5_REPACK))
+        self.assertEqual(set(), DataCollector.get_prop_stages(props, PropKeyEnum.G4_FILE_01))
+
+    def test_partial_export_keeps_other_outputs(self):
+        shutil.copytree("./example/南瓜瓶", self.yxp_dir, dirs_exist_ok=True)
+        os.remove(self.csv)
+        props = {PropKeyEnum.G2_LEVELS: [self.level], PropKeyEnum.G5_YXP_DIR: self.yxp_dir}
+        os.makedirs(self.out)
+        self.assertIsNotNone(DataCollector().export(props, self.out))
+        before = sorted(os.listdir(self.out))
+
+        self.write_level([[1, 1], [2, 2], []])
+        stages = DataCollector.get_changed_stages(props, {self.level})
+        self.assertIsNotNone(DataCollector().export(props, self.out, stages))
+        self.assertEqual(before, sorted(os.listdir(self.out)))
+        with open(os.path.join(self.out, "lv1-1.json"), "r", encoding="utf-8") as f:
+            self.assertEqual([[1, 1], [2, 2], []], json.load(f)["bottles"])
+
+    def test_cli_watch(self):
+        project = os.path.join(self.tmp.name, "project.json")
+        with open(project, "w", encoding="utf-8") as f:
+            json.dump({"G2_LEVEL_FILES": ["lv.json"]}, f)
+
+        done = threading.Event()
+
+        def _edit():
+            # keep saving until the watcher has picked a change up
+            while not done.wait(0.5):
+                self.write_level([[2, 2], [1, 1], []])
+
+        thread = threading.Thread(target=_edit)
+        thread.start()
+        try:
+            with redirect_stdout(io.StringIO()):
+                code = run_watch(project, self.out, max_rounds=1)
+        finally:
+            done.set()
+            thread.join()
+        self.assertEqual(ExitCodeEnum.OK, code)
+        with open(os.path.join(self.out, "lv1-1.json"), "r", encoding="utf-8") as f:
+            self.assertEqual([[2, 2], [1, 1], []], json.load(f)["bottles"])
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import random
+import shutil
+import tempfile
+from unittest import TestCase
+
+from wsc.core import PropKeyEnum
+
+EXAMPLE_YXP_DIR = "./example/南瓜瓶"
+EXAMPLE_LANG_DIR = "./example/多语言标题"
+LOGO_FILE = "./logo.png"
+
+
+def random_level(colors: int, empty: int, capacity: int = 4, seed: int = 0):
+    rnd = random.Random(seed)
+    units = [c for c in range(1, colors + 1) for _ in range(capacity)]
+    rnd.shuffle(units)
+    return [units[i * capacity : (i + 1) * capacity] for i in range(colors)] + [[]] * empty
+
+
+class ProjectTestCase(TestCase):
+    # a temp folder with one level and a copy of the example bottle, props export all of it
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.level = os.path.join(self.tmp.name, "lv.json")
+        self.write_level([[1, 2], [2, 1], []])
+        self.yxp_dir = os.path.join(self.tmp.name, "yxp")
+        shutil.copytree(EXAMPLE_YXP_DIR, self.yxp_dir)
+        self.props = {
+            PropKeyEnum.G2_LEVELS: [self.level],
+            PropKeyEnum.G1_IMG_DIR: os.path.abspath(EXAMPLE_LANG_DIR),
+            PropKeyEnum.G4_FILE_01: os.path.abspath(LOGO_FILE),
+            PropKeyEnum.G5_YXP_DIR: self.yxp_dir,
+        }
+        self.out = os.path.join(self.tmp.name, "out")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_level(self, bottles):
+        with open(self.level, "w", encoding="utf-8") as f:
+            json.dump({"bottles": bottles}, f)
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+)
+
+_BOM = "\ufeff"
+
+
+def _line_ending(line: str) -> str:
+    stripped = line.rstrip("\r\n")
+    return line[len(stripped) :]
+
+
+def _parse_value(value: str):
+    parts = [p.strip() for p in value.split(",")]
+    numbers = []
+    for part in parts:
+        try:
+            numbers.append(int(part))
+        except ValueError:
+            try:
+                numbers.append(float(part))
+            except ValueError:
+                return value.strip() if len(parts) == 1 else tuple(parts)
+    return numbers[0] if len(numbers) == 1 else tuple(numbers)
+
+
+def _format_value(value, old_text: str) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (tuple, list)):
+        sep = ", " if ", " in old_text else ","
+        return sep.join(f"{v}" for v in value)
+    return f"{value}"
+
+
+class _AtlasRecord:
+    __slots__ = ("name", "lines")
+
+    def __init__(self, name: str, line: str):
+        self.name = name
+        self.lines = [line]
+
+    def _set_line(self, key: str, value):
+        for i, line in enumerate(self.lines[1:], start=1):
+            head, sep, old = line.partition(":")
+            if sep and head.strip() == key:
+                indent = head[: len(head) - len(head.lstrip())]
+                text = _format_value(value, old)
+                self.lines[i] = f"{indent}{key}: {text}{_line_ending(line)}"
+                return
+
+        indent = "  " if isinstance(self, AtlasRegion) else ""
+        ending = _line_ending(self.lines[-1]) or "\n"
+        self.lines.append(f"{indent}{key}: {_format_value(value, ', ')}{ending}")
+
+    def rename(self, name: str):
+        self.lines[0] = f"{name}{_line_ending(self.lines[0])}"
+        self.name = name
+
+
+class AtlasPage(_AtlasRecord):
+    __slots__ = ("lead", "regions", "size", "format", "filter", "repeat", "pma")
+
+    def __init__(self, name: str, line: str, lead: List[str]):
+        super().__init__(name, line)
+        self.lead = lead
+        self.regions = []
+        self.size = None
+        self.format = None
+        self.filter = None
+        self.repeat = None
+        self.pma = False
+
+    def _add_field(self, key: str, value: str):
+        if key == "size":
+            self.size = _parse_value(value)
+        elif key == "format":
+            self.format = value.strip()
+        elif key == "filter":
+            self.filter = tuple(v.strip() for v in value.split(","))
+        elif key == "repeat":
+            self.repeat = value.strip()
+        elif key == "pma":
+            self.pma = value.strip() == "true"
+
+    def set_size(self, width: int, height: int):
+        self.size = (width, height)
+        self._set_line("size", self.size)
+
+
+class AtlasRegion(_AtlasRecord):
+    __slots__ = ("page", "rotate", "xy", "size", "orig", "offset", "index")
+
+    def __init__(self, name: str, line: str, page: AtlasPage):
+        super().__init__(name, line)
+        self.page = page
+        self.rotate = 0
+        self.xy = None
+        self.size = None
+        self.orig = None
+        self.offset = None
+        self.index = -1
+
+    def _add_field(self, key: str, value: str):
+        if key == "rotate":
+            value = value.strip()
+            self.rotate = 90 if value == "true" else 0 if value == "false" else int(value)
+        elif key == "xy":
+            self.xy = _parse_value(value)
+        elif key in ("size", "orig", "offset"):
+            setattr(self, key, _parse_value(value))
+        elif key == "bounds":
+            # spine 4.x packs xy and size in one field
+            bounds = _parse_value(value)
+            self.xy, self.size = bounds[:2], bounds[2:]
+        elif key == "index":
+            self.index = int(value)
+
+    @property
+    def packed_size(self) -> Tuple[int, int]:
+        width, height = self.size
+        return (height, width) if self.rotate in (90, 270) else (width, height)
+
+    def set_rect(self, x: int, y: int, rotate: bool):
+        self.xy = (x, y)
+        self.rotate = 90 if rotate else 0
+        if any(line.partition(":")[0].strip() == "bounds" for line in self.lines[1:]):
+            self._set_line("bounds", (x, y) + tuple(self.size))
+        else:
+            self._set_line("xy", self.xy)
+        self._set_line("rotate", bool(rotate))
+
+
+class SpineAtlas:
+    __slots__ = ("bom", "pages", "trailer")
+
+    def __init__(self):
+        self.bom = False
+        self.pages = []
+        self.trailer = []
+
+    @classmethod
+    def loads(cls, text: str) -> "SpineAtlas":
+        atlas = cls()
+        if text.startswith(_BOM):
+            atlas.bom = True
+            text = text[1:]
+
+        page = None
+        region = None
+        pending = []
+        for line in text.splitlines(keepends=True):
+            stripped = line.strip()
+            if not stripped:
+                pending.append(line)
+                region = None
+                continue
+
+            if page is None or pending:
+                page = AtlasPage(stripped, line, pending)
+                atlas.pages.append(page)
+                pending = []
+                region = None
+                continue
+
+            key, sep, value = stripped.partition(":")
+            if sep and region is None:
+                page.lines.append(line)
+                page._add_field(key.strip(), value)
+            elif sep:
+                region.lines.append(line)
+                region._add_field(key.strip(), value)
+            else:
+                region = AtlasRegion(stripped, line, page)
+                page.regions.append(region)
+
+        atlas.trailer = pending
+        return atlas
+
+    @classmethod
+    def load(cls, path: str) -> "SpineAtlas":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return cls.loads(f.read())
+
+    def dumps(self) -> str:
+        parts = [_BOM] if self.bom else []
+        for page in self.pages:
+            parts.extend(page.lead)
+            parts.extend(page.lines)
+            for region in page.regions:
+                parts.extend(region.lines)
+        parts.extend(self.trailer)
+        return "".join(parts)
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(self.dumps())
+
+    def regions(self) -> Iterator[AtlasRegion]:
+        for page in self.pages:
+            yield from page.regions
+
+    def drop_regions(self, names: Iterable[str]) -> int:
+        names = set(names)
+        count = 0
+        for page in self.pages:
+            kept = [r for r in page.regions if r.name not in names]
+            count += len(page.regions) - len(kept)
+            page.regions = kept
+        return count
+
+    def validate(self) -> List[str]:
+        problems = []
+        for page in self.pages:
+            if not isinstance(page.size, tuple) or len(page.size) != 2:
+                # old atlases without size rely on the texture itself
+                continue
+            page_w, page_h = page.size
+            for region in page.regions:
+                if region.xy is None or region.size is None:
+                    problems.append(f"区域【{region.name} 】缺少 xy/size")
+                    continue
+                x, y = region.xy
+                w, h = region.packed_size
+                if x < 0 or y < 0 or x + w > page_w or y + h > page_h:
+                    problems.append(
+                        f"区域【{region.name} 】超出页面【{page.name} 】的尺寸 {page_w}x{page_h}"
+                    )
+        return problems
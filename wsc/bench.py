@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Tuple,
+)
+
+from wsc.copier import CopyModeEnum
+from wsc.core import (
+    DataCollector,
+    ExportStageEnum,
+    PropKeyEnum,
+    config_template,
+    load_props,
+)
+from wsc.dirindex import invalidate_dir_index
+from wsc.hashing import (
+    HashCache,
+    calc_file_digest,
+    get_hash_cache,
+    set_hash_cache,
+)
+
+BENCH_VERSION = 2
+
+# the spine skeleton and the bottle csv are taken from the bundled example
+_EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "example", "南瓜瓶")
+
+BENCH_SCALES = {
+    "small": {
+        "seed": 1,
+        "texture": [2048, 2048],
+        "texture_format": "png",
+        "noise": False,
+        "regions": 500,
+        "levels": 40,
+        "title": [256, 128],
+        "image": [256, 256],
+    },
+    "large": {
+        "seed": 1,
+        "texture": [4096, 4096],
+        "texture_format": "webp",
+        "noise": True,
+        "regions": 4000,
+        "levels": 300,
+        "title": [1024, 512],
+        "image": [1024, 1024],
+    },
+}
+
+PHASES = ["validation", "hashing", "copying", "config"]
+
+# config generation is too quick to time once
+_CONFIG_ROUNDS = 20
+
+# below this a difference is timer noise, not a regression
+_SLACK_SECONDS = 0.05
+_SLACK_MEMORY_MB = 16
+
+
+def _write_image(path: str, size: List[int], noise: bool, rng: random.Random, fmt: str = "PNG"):
+    from PIL import Image
+
+    width, height = size
+    if noise:
+        # random pixels do not compress, so the file is as large as a real texture can get
+        img = Image.frombytes("RGBA", (width, height), rng.randbytes(width * height * 4))
+    else:
+        img = Image.new("RGBA", (width, height), tuple(rng.randrange(256) for _ in range(4)))
+    if fmt == "JPEG":
+        img = img.convert("RGB")
+    options = {"quality": 90} if fmt in ("JPEG", "WEBP") else {"compress_level": 1}
+    img.save(path, fmt, **options)
+
+
+def _write_atlas(path: str, texture_name: str, size: List[int], regions: int):
+    with open(os.path.join(_EXAMPLE_DIR, "南瓜瓶子_接水.atlas"), "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    # the example regions keep the skeleton valid, the extra ones are laid out on a grid
+    lines[0] = texture_name
+    lines = [f"size: {size[0]},{size[1]}" if line.startswith("size:") else line for line in lines]
+    cell = 16
+    columns = size[0] // cell
+    for i in range(regions):
+        x, y = (i % columns) * cell, (i // columns) * cell % (size[1] - cell)
+        lines += [
+            f"bench_{i:05d}",
+            "  rotate: false",
+            f"  xy: {x}, {y}",
+            f"  size: {cell}, {cell}",
+            f"  orig: {cell}, {cell}",
+            "  offset: 0, 0",
+            "  index: -1",
+        ]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _random_level(rng: random.Random) -> Tuple[List[List[int]], int]:
+    from wsc.solver import solve
+
+    capacity = 4
+    colors = rng.randint(4, 6)
+    # shuffled levels with two spare bottles are nearly always solvable, the rest are drawn again
+    while True:
+        units = [c for c in range(1, colors + 1) for _ in range(capacity)]
+        rng.shuffle(units)
+        bottles = [units[i : i + capacity] for i in range(0, len(units), capacity)] + [[], []]
+        if solve(bottles, capacity, max_nodes=20000, time_limit=1.0).solvable:
+            return bottles, capacity
+
+
+def generate_project(folder: str, scale: Dict[str, Any]) -> str:
+    rng = random.Random(scale["seed"])
+    yxp_dir = os.path.join(folder, "yxp")
+    lang_dir = os.path.join(folder, "lang")
+    level_dir = os.path.join(folder, "levels")
+    for path in (yxp_dir, lang_dir, level_dir):
+        os.makedirs(path, exist_ok=True)
+
+    texture_name = f"bench.{scale['texture_format']}"
+    _write_image(
+        os.path.join(yxp_dir, texture_name),
+        scale["texture"],
+        scale["noise"],
+        rng,
+        "WEBP" if scale["texture_format"] == "webp" else "PNG",
+    )
+    _write_atlas(os.path.join(yxp_dir, "bench.atlas"), texture_name, scale["texture"], scale["regions"])
+    shutil.copy(os.path.join(_EXAMPLE_DIR, "南瓜瓶子_接水.skel"), os.path.join(yxp_dir, "bench.skel"))
+    shutil.copy(
+        os.path.join(_EXAMPLE_DIR, "特殊玩法水位 - 南瓜瓶子.csv"), os.path.join(yxp_dir, "bench.csv")
+    )
+
+    for name in sorted(set(config_template()["titleImageMultiLanguage"].values())):
+        _write_image(os.path.join(lang_dir, f"{name}.png"), scale["title"], scale["noise"], rng)
+
+    levels = []
+    for i in range(scale["levels"]):
+        bottles, capacity = _random_level(rng)
+        name = f"lv{i + 1:04d}.json"
+        with open(os.path.join(level_dir, name), "w", encoding="utf-8") as f:
+            json.dump({"capacity": capacity, "bottles": bottles}, f)
+        levels.append(f"levels/{name}")
+
+    _write_image(os.path.join(folder, "button.png"), scale["image"], scale["noise"], rng)
+    _write_image(os.path.join(folder, "win.png"), scale["image"], scale["noise"], rng)
+    _write_image(os.path.join(folder, "bg.jpg"), scale["image"], scale["noise"], rng, "JPEG")
+
+    project_file = os.path.join(folder, "project.json")
+    project = {
+        f"{PropKeyEnum.G1_IMG_DIR}": "lang",
+        f"{PropKeyEnum.G2_LEVELS}": levels,
+        f"{PropKeyEnum.G3_OPT_TYP}": "0",
+        f"{PropKeyEnum.G4_FILE_01}": "button.png",
+        f"{PropKeyEnum.G5_FILE_01}": "win.png",
+        f"{PropKeyEnum.G5_FILE_04}": "bg.jpg",
+        f"{PropKeyEnum.G5_YXP_DIR}": "yxp",
+        f"{PropKeyEnum.G5_PRUNE}": True,
+    }
+    with open(project_file, "w", encoding="utf-8") as f:
+        json.dump(project, f, indent=4, ensure_ascii=False)
+
+    # a later run with the same parameters reuses the folder
+    with open(os.path.join(folder, "bench.json"), "w", encoding="utf-8") as f:
+        json.dump(scale, f, indent=4)
+    return project_file
+
+
+def prepare_project(folder: str, scale: Dict[str, Any]) -> str:
+    try:
+        with open(os.path.join(folder, "bench.json"), "r", encoding="utf-8") as f:
+            if json.load(f) == scale:
+                return os.path.join(folder, "project.json")
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(folder, ignore_errors=True)
+    return generate_project(folder, scale)
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # the high water mark of the whole run, it never goes down so it is not split by phase
+    # the solver pool counts as part of the export
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _list_files(folder: str) -> List[str]:
+    return sorted(os.path.join(root, name) for root, _, files in os.walk(folder) for name in files)
+
+
+def _start_phase() -> Tuple[float, int]:
+    base = 0
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    return time.perf_counter(), base
+
+
+def _phase(seconds: float, base: int, files: int, size: int) -> Dict[str, Any]:
+    # python allocations made by this phase alone, only measured in the round that traces them
+    peak = tracemalloc.get_traced_memory()[1] - base if tracemalloc.is_tracing() else None
+    return {
+        "seconds": round(seconds, 4),
+        "files": files,
+        "bytes": size,
+        "files_per_s": round(files / seconds, 1) if seconds > 0 else None,
+        "mb_per_s": round(size / 1024 / 1024 / seconds, 1) if seconds > 0 else None,
+        "peak_alloc_mb": None if peak is None else round(peak / 1024 / 1024, 1),
+    }
+
+
+class _ColdCaches:
+    # every round starts from empty hash, solver, folder and derivative caches
+    def __init__(self, work_dir: str):
+        self.work_dir = work_dir
+
+    def __enter__(self):
+        from wsc.solver import clear_solver_cache
+
+        self.old_env = os.environ.get("WSC_CACHE_DIR")
+        self.old_cache = get_hash_cache()
+        os.environ["WSC_CACHE_DIR"] = tempfile.mkdtemp(prefix="cache-", dir=self.work_dir)
+        set_hash_cache(HashCache())
+        clear_solver_cache()
+        invalidate_dir_index()
+        return self
+
+    def __exit__(self, *args):
+        shutil.rmtree(os.environ["WSC_CACHE_DIR"], ignore_errors=True)
+        set_hash_cache(self.old_cache)
+        if self.old_env is None:
+            del os.environ["WSC_CACHE_DIR"]
+        else:
+            os.environ["WSC_CACHE_DIR"] = self.old_env
+
+
+def _run_round(
+    props: Dict[PropKeyEnum, Any], project_dir: str, work_dir: str, copy_mode: CopyModeEnum
+) -> Dict[str, Dict[str, Any]]:
+    phases = {}
+    sources = _list_files(project_dir)
+    source_bytes = sum(os.path.getsize(path) for path in sources)
+
+    started, base = _start_phase()
+    collector = DataCollector()
+    if not collector.sanity_check(props):
+        raise RuntimeError("; ".join(e.text for e in collector.errors if e.fatal))
+    phases["validation"] = _phase(time.perf_counter() - started, base, len(sources), source_bytes)
+
+    # the checks above hashed the levels, hashing is timed on its own cache
+    set_hash_cache(HashCache())
+    started, base = _start_phase()
+    for path in sources:
+        calc_file_digest(path)
+    DataCollector.calc_my_md5_checksum(props[PropKeyEnum.G4_FILE_01])
+    phases["hashing"] = _phase(time.perf_counter() - started, base, len(sources), source_bytes)
+
+    target_dir = tempfile.mkdtemp(prefix="out-", dir=work_dir)
+    try:
+        stages = {ExportStageEnum.FILES, ExportStageEnum.YXP, ExportStageEnum.LANG}
+        started, base = _start_phase()
+        DataCollector(incremental=False, copy_mode=copy_mode).store_assets(props, target_dir, stages)
+        elapsed = time.perf_counter() - started
+        outputs = _list_files(target_dir)
+        phases["copying"] = _phase(elapsed, base, len(outputs), sum(os.path.getsize(p) for p in outputs))
+
+        started, base = _start_phase()
+        for _ in range(_CONFIG_ROUNDS):
+            collector.store_config(props, target_dir)
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(os.path.join(target_dir, "GameConfig.json"))
+        phases["config"] = _phase(elapsed, base, _CONFIG_ROUNDS, size * _CONFIG_ROUNDS)
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+    return phases
+
+
+def run_benchmark(
+    scale: Dict[str, Any],
+    work_dir: str,
+    repeat: int = 3,
+    copy_mode: CopyModeEnum = CopyModeEnum.REFLINK,
+    name: str = None,
+    log: Callable[[str], None] = None,
+) -> Dict[str, Any]:
+    project_dir = os.path.join(work_dir, "project")
+    started = time.perf_counter()
+    project_file = prepare_project(project_dir, scale)
+    if log is not None:
+        log(f"合成工程：{project_dir}（{time.perf_counter() - started:.1f} s）")
+    props = load_props(project_file)
+
+    # the fastest round is the one least disturbed by the rest of the machine
+    best = {}
+    for i in range(repeat):
+        with _ColdCaches(work_dir):
+            phases = _run_round(props, project_dir, work_dir, copy_mode)
+        for phase, result in phases.items():
+            if phase not in best or result["seconds"] < best[phase]["seconds"]:
+                best[phase] = result
+        if log is not None:
+            log(f"第 {i + 1} 轮：" + "，".join(f"{p} {r['seconds']:.3f} s" for p, r in phases.items()))
+
+    # tracing allocations slows everything down, so memory gets a round of its own
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        with _ColdCaches(work_dir):
+            phases = _run_round(props, project_dir, work_dir, copy_mode)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    for phase, result in phases.items():
+        best[phase] = dict(best[phase], peak_alloc_mb=result["peak_alloc_mb"])
+    if log is not None:
+        log("内存轮：" + "，".join(f"{p} {r['peak_alloc_mb']} MB" for p, r in phases.items()))
+
+    return {
+        "version": BENCH_VERSION,
+        "scale": name,
+        "params": scale,
+        "copy_mode": f"{copy_mode}",
+        "repeat": repeat,
+        "platform": {
+            "system": platform.system(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "phases": {phase: best[phase] for phase in PHASES},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_results(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25) -> List[str]:
+    if baseline.get("version") != BENCH_VERSION or baseline.get("params") != result.get("params"):
+        raise ValueError("基准结果的版本或工程参数与本次运行不同，无法比较")
+
+    regressions = []
+    for phase in PHASES:
+        now, base = result["phases"][phase], baseline["phases"].get(phase)
+        if base is None:
+            continue
+        limit = base["seconds"] * (1 + tolerance) + _SLACK_SECONDS
+        if now["seconds"] > limit:
+            regressions.append(f"{phase}: 用时 {now['seconds']:.3f} s，基准 {base['seconds']:.3f} s")
+        if now["peak_alloc_mb"] is not None and base.get("peak_alloc_mb") is not None:
+            limit = base["peak_alloc_mb"] * (1 + tolerance) + _SLACK_MEMORY_MB
+            if now["peak_alloc_mb"] > limit:
+                regressions.append(
+                    f"{phase}: 内存分配峰值 {now['peak_alloc_mb']} MB，基准 {base['peak_alloc_mb']} MB"
+                )
+
+    now, base = result.get("peak_rss_mb"), baseline.get("peak_rss_mb")
+    if now is not None and base is not None and now > base * (1 + tolerance) + _SLACK_MEMORY_MB:
+        regressions.append(f"进程内存峰值 {now} MB，基准 {base} MB")
+    return regressions
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import json
+import math
+import re
+from typing import (
+    Any,
+    Dict,
+    List,
+    Union,
+)
+
+_BOM = "\ufeff"
+
+_STATE_NAME = re.compile(r"^(.*?)_(\d+)$")
+
+# samples between two neighbouring states, the runtime rounds the level to the nearest sample
+TABLE_STEPS = 16
+TABLE_VERSION = 1
+TABLE_FIELDS = ["y", "x"]
+
+
+class BottleState:
+    __slots__ = ("name", "prefix", "index", "y", "x")
+
+    def __init__(self, name: str, prefix: str, index: int, y: float, x: float):
+        self.name = name
+        self.prefix = prefix
+        self.index = index
+        self.y = y
+        self.x = x
+
+    def __repr__(self):
+        return f"BottleState({self.name!r}, {self.y}, {self.x})"
+
+
+def _compact(value: float, digits: int):
+    # whole numbers are written without a fraction to keep the table small
+    value = round(value, digits)
+    return int(value) if value == int(value) else value
+
+
+def _parse_number(text: str) -> float:
+    value = float(text.strip())
+    if not math.isfinite(value):
+        raise ValueError(text)
+    return value
+
+
+class BottleLevels:
+    # water level of a special bottle, one row per idle state: name, y offset, x scale
+    __slots__ = ("header", "states", "problems")
+
+    header: List[str]
+    states: List[BottleState]
+    problems: List[str]
+
+    def __init__(self):
+        self.header = []
+        self.states = []
+        self.problems = []
+
+    @classmethod
+    def loads(cls, text: str) -> "BottleLevels":
+        levels = cls()
+        if text.startswith(_BOM):
+            text = text[1:]
+
+        # rows that cannot be read are kept as problems, so one pass reports all of them
+        rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+        if len(rows) == 0:
+            levels.problems.append("没有内容")
+            return levels
+
+        levels.header = [cell.strip() for cell in rows[0]]
+        if len(levels.header) != 3:
+            levels.problems.append(f"表头应有 3 列：层级,Y轴,X轴，实际为 {len(levels.header)} 列")
+        for line, row in enumerate(rows[1:], start=2):
+            if len(row) != 3:
+                levels.problems.append(f"第 {line} 行应有 3 列，实际为 {len(row)} 列")
+                continue
+            name = row[0].strip()
+            match = _STATE_NAME.match(name)
+            if match is None:
+                levels.problems.append(f"第 {line} 行的层级【{name} 】不是“名称_序号”的格式")
+                continue
+            try:
+                y, x = _parse_number(row[1]), _parse_number(row[2])
+            except ValueError:
+                levels.problems.append(f"第 {line} 行【{name} 】的数值无效：{row[1]},{row[2]}")
+                continue
+            levels.states.append(BottleState(name, match.group(1), int(match.group(2)), y, x))
+        return levels
+
+    @classmethod
+    def load(cls, path: str) -> "BottleLevels":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return cls.loads(f.read())
+
+    def validate(self) -> List[str]:
+        problems = list(self.problems)
+        states = self.states
+        if len(states) < 2:
+            problems.append(f"至少需要 2 个层级，实际为 {len(states)} 个")
+            return problems
+
+        prefixes = sorted({s.prefix for s in states})
+        if len(prefixes) > 1:
+            problems.append(f"层级名称不一致【{','.join(prefixes)}】")
+
+        # the rows are the states in order, numbered from 0 without gaps
+        for expected, state in enumerate(states):
+            if state.index != expected:
+                problems.append(f"层级【{state.name} 】的序号应为 {expected}")
+                break
+
+        for prev, state in zip(states, states[1:]):
+            if state.y <= prev.y:
+                problems.append(
+                    f"层级【{state.name} 】的 Y 轴 {state.y} 没有高于【{prev.name} 】的 {prev.y}"
+                )
+        for state in states:
+            if state.x <= 0:
+                problems.append(f"层级【{state.name} 】的 X 轴缩放 {state.x} 必须大于 0")
+        return problems
+
+    def sample(self, steps: int = TABLE_STEPS) -> List[Union[int, float]]:
+        # linear between neighbouring states, y and x interleaved
+        problems = self.validate()
+        if len(problems) > 0:
+            raise ValueError(problems[0])
+
+        data = []
+        for prev, state in zip(self.states, self.states[1:]):
+            for step in range(steps):
+                t = step / steps
+                data.append(_compact(prev.y + (state.y - prev.y) * t, 2))
+                data.append(_compact(prev.x + (state.x - prev.x) * t, 4))
+        data += [_compact(self.states[-1].y, 2), _compact(self.states[-1].x, 4)]
+        return data
+
+    def to_table(self, steps: int = TABLE_STEPS) -> Dict[str, Any]:
+        return {
+            "version": TABLE_VERSION,
+            "states": len(self.states),
+            "steps": steps,
+            "fields": TABLE_FIELDS,
+            "data": self.sample(steps),
+        }
+
+    def dumps_table(self, steps: int = TABLE_STEPS) -> str:
+        return json.dumps(self.to_table(steps), separators=(",", ":"))
+
+    def save_table(self, path: str, steps: int = TABLE_STEPS):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.dumps_table(steps))
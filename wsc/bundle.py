@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import abc
+import base64
+import enum
+import io
+import json
+import os
+import shutil
+import uuid
+from typing import (
+    BinaryIO,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from wsc.tracing import log, span
+
+_CHUNK_SIZE = 3 * 64 * 1024
+
+# fixed entry metadata, the archive only depends on the names and the bytes
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+_ZIP_UNIX = 3
+_ZIP_FILE_MODE = 0o100644 << 16
+
+# already compressed formats are stored, text and binary data get the best deflate level
+_STORED_SUFFIXES = {"png", "jpg", "jpeg", "webp", "gif", "mp3", "ogg", "m4a", "mp4", "zip"}
+_DEFLATE_LEVEL = 9
+
+_MIME_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "json": "application/json",
+    "atlas": "text/plain",
+    "csv": "text/csv",
+    "skel": "application/octet-stream",
+}
+
+HTML_PLACEHOLDER = "<!-- wsc-assets -->"
+
+_HTML_TEMPLATE = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+{HTML_PLACEHOLDER}
+</head>
+<body>
+</body>
+</html>
+"""
+
+
+class BundleError(ValueError):
+    pass
+
+
+class BundleFormatEnum(enum.StrEnum):
+    ZIP = "zip"
+    HTML = "html"
+
+
+def bundle_format(path: str) -> Optional[BundleFormatEnum]:
+    suffix = os.path.splitext(f"{path}")[1][1:].lower()
+    try:
+        return BundleFormatEnum(suffix)
+    except ValueError:
+        return None
+
+
+def _suffix(name: str) -> str:
+    return os.path.splitext(name)[1][1:].lower()
+
+
+class BundleWriter(abc.ABC):
+    # entries are collected as references and streamed once, in name order, when the bundle is closed
+    _entries: Dict[str, Tuple[Optional[str], Optional[bytes]]]
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._entries = {}
+
+    def add_file(self, name: str, source: str):
+        self._entries[name] = (os.path.abspath(source), None)
+
+    def add_bytes(self, name: str, data: Union[bytes, str]):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._entries[name] = (None, data)
+
+    def names(self) -> List[str]:
+        return sorted(self._entries.keys())
+
+    def sources(self) -> Dict[str, Union[str, bytes]]:
+        # name -> source file, or the content of an entry added as bytes
+        return {name: data if source is None else source for name, (source, data) in self._entries.items()}
+
+    def _open_entry(self, name: str) -> BinaryIO:
+        source, data = self._entries[name]
+        if source is not None:
+            return open(source, "rb")
+        return io.BytesIO(data)
+
+    @abc.abstractmethod
+    def _write(self, f: BinaryIO):
+        pass
+
+    def close(self):
+        temp_file = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with span("write_bundle", "io", files=len(self._entries)), open(temp_file, "wb") as f:
+                self._write(f)
+            os.replace(temp_file, self.path)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+        log.info("Write bundle: %s, %d files", self.path, len(self._entries))
+
+
+class ZipBundleWriter(BundleWriter):
+    def _write(self, f: BinaryIO):
+        import zipfile
+
+        with zipfile.ZipFile(f, "w") as zf:
+            for name in self.names():
+                info = zipfile.ZipInfo(name, date_time=_ZIP_DATE_TIME)
+                info.create_system = _ZIP_UNIX
+                info.external_attr = _ZIP_FILE_MODE
+                if _suffix(name) in _STORED_SUFFIXES:
+                    info.compress_type = zipfile.ZIP_STORED
+                else:
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    info.compress_level = _DEFLATE_LEVEL
+
+                with self._open_entry(name) as src, zf.open(info, "w") as dst:
+                    shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+
+
+class HtmlBundleWriter(BundleWriter):
+    def __init__(self, path: str, template: str = None):
+        super().__init__(path)
+        self.template = template
+
+    def _load_template(self) -> str:
+        if self.template is None:
+            return _HTML_TEMPLATE
+        try:
+            with open(self.template, "r", encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, ValueError) as e:
+            raise BundleError(f"无法读取 HTML 模板【{self.template} 】：{e}")
+        if HTML_PLACEHOLDER not in text:
+            raise BundleError(f"HTML 模板【{self.template} 】中没有 {HTML_PLACEHOLDER}")
+        return text
+
+    def _write(self, f: BinaryIO):
+        head, tail = self._load_template().split(HTML_PLACEHOLDER, 1)
+        f.write(head.encode("utf-8"))
+        f.write(b"<script>window.WSC_ASSETS={")
+        for i, name in enumerate(self.names()):
+            mime = _MIME_TYPES.get(_suffix(name), "application/octet-stream")
+            prefix = "," if i > 0 else ""
+            f.write(
+                f'{prefix}\n{json.dumps(name, ensure_ascii=False)}:"data:{mime};base64,'.encode("utf-8")
+            )
+            # chunks are a multiple of 3 bytes so the pieces concatenate without padding
+            with self._open_entry(name) as src:
+                while chunk := src.read(_CHUNK_SIZE):
+                    f.write(base64.b64encode(chunk))
+            f.write(b'"')
+        f.write(b"\n};</script>")
+        f.write(tail.encode("utf-8"))
+
+
+def open_bundle(path: str, html_template: str = None) -> BundleWriter:
+    fmt = bundle_format(path)
+    if fmt == BundleFormatEnum.ZIP:
+        return ZipBundleWriter(path)
+    if fmt == BundleFormatEnum.HTML:
+        return HtmlBundleWriter(path, html_template)
+    raise BundleError(f"不支持的打包格式【{path} 】")
@@ -0,0 +1,632 @@
+# -*- coding: utf-8 -*-
+import argparse
+import contextlib
+import enum
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from wsc.bundle import bundle_format
+from wsc.copier import CopyModeEnum
+from wsc.core import (
+    LANGUAGE_CODES,
+    DataCollector,
+    ErrorCodeEnum,
+    ExportError,
+    PropKeyEnum,
+    load_props,
+)
+from wsc.tracing import (
+    default_log_file,
+    get_tracer,
+    setup_logging,
+)
+from wsc.watch import PollingWatcher
+
+
+class ExitCodeEnum(enum.IntEnum):
+    OK = 0
+    CHECK = 1
+    USAGE = 2
+    PROJECT = 3
+    IO = 4
+
+
+class QuietDataCollector(DataCollector):
+    def info(self, text: str):
+        pass
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(prog="wsc", description="水排序配置制作工具（命令行）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # every subcommand takes the logging and tracing options
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "-v", "--verbose", action="count", default=0, help="在 stderr 输出日志，-vv 同时输出计时"
+    )
+    common.add_argument("--log-file", default=None, help="滚动日志文件，默认在缓存文件夹的 logs 中")
+    common.add_argument(
+        "--trace", action="store_true", help="记录各阶段的耗时、文件数和字节数，结束时输出汇总"
+    )
+    common.add_argument(
+        "--trace-file", default=None, metavar="trace.json", help="同时写出 Chrome 性能分析格式的计时文件"
+    )
+
+    export = commands.add_parser("export", parents=[common], help="导出工程到文件夹")
+    export.add_argument("projects", nargs="+", metavar="project.json", help="工程文件")
+    export.add_argument(
+        "--out",
+        required=True,
+        help="导出文件夹，多个工程时导出到其中的同名子文件夹；以 .zip 或 .html 结尾时打包为单个文件",
+    )
+    export.add_argument("--html-template", default=None, help="打包为 .html 时使用的页面模板")
+    export.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    export.add_argument("--full", action="store_true", help="忽略导出清单，重新复制全部文件")
+    export.add_argument(
+        "--mode",
+        choices=[f"{e}" for e in CopyModeEnum],
+        default=CopyModeEnum.REFLINK,
+        help="文件复制方式",
+    )
+    export.add_argument("--jobs", type=int, default=None, help="并行复制的线程数")
+    export.add_argument(
+        "--store", action="store_true", help="先把文件存入本地资源库，再从资源库链接或复制到导出文件夹"
+    )
+    export.add_argument(
+        "--watch", action="store_true", help="导出后监视源文件，修改时自动重新导出变化的部分"
+    )
+    export.add_argument(
+        "--per-language",
+        action="store_true",
+        help="每种语言单独导出一份，只含默认标题和该语言的标题，导出到以语言代码命名的子文件夹或文件",
+    )
+    export.add_argument(
+        "--solve", action="store_true", help="导出前求解关卡，无解时不导出，并检查 n 值是否小于最少步数"
+    )
+
+    solve = commands.add_parser("solve", parents=[common], help="求解关卡，检查是否有解并给出最少步数")
+    solve.add_argument("levels", nargs="+", metavar="level.json", help="关卡文件")
+    solve.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    solve.add_argument("--time-limit", type=float, default=5.0, help="每个关卡的求解时间上限（秒）")
+
+    index = commands.add_parser("index", parents=[common], help="分析关卡库，生成可筛选的关卡索引")
+    index.add_argument("folder", help="关卡文件夹")
+    index.add_argument("--out", required=True, help="索引文件")
+    index.add_argument("--pattern", default="lv*.json", help="关卡文件名匹配模式")
+
+    query = commands.add_parser("query", parents=[common], help="按条件筛选关卡索引")
+    query.add_argument("index", metavar="index.json", help="索引文件")
+    query.add_argument("--where", action="append", default=[], help="筛选条件，如 bottles>=12，可重复")
+    query.add_argument("--unique", action="store_true", help="排除重复和同构的关卡")
+    query.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+
+    variants = commands.add_parser("variants", parents=[common], help="按变体矩阵批量导出工程的多个变体")
+    variants.add_argument("project", metavar="project.json", help="工程文件")
+    variants.add_argument("--matrix", required=True, metavar="matrix.json", help="变体矩阵文件")
+    variants.add_argument("--out", required=True, help="导出文件夹，每个变体导出到其中的一个子文件夹")
+    variants.add_argument("--sample", type=int, default=None, help="随机抽取的变体数量，默认导出全部组合")
+    variants.add_argument("--seed", type=int, default=None, help="抽样的随机种子")
+    variants.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    variants.add_argument("--full", action="store_true", help="忽略导出清单，重新复制全部文件")
+    variants.add_argument(
+        "--mode",
+        choices=[f"{e}" for e in CopyModeEnum],
+        default=CopyModeEnum.REFLINK,
+        help="共享资源的复制方式，变体之间总是使用硬链接",
+    )
+    variants.add_argument("--jobs", type=int, default=None, help="并行导出的线程数")
+    variants.add_argument("--store", action="store_true", help="共享资源经由本地资源库导出")
+
+    bench = commands.add_parser(
+        "bench", parents=[common], help="用合成工程测量导出各阶段的耗时、吞吐量和内存峰值"
+    )
+    bench.add_argument("--scale", choices=["small", "large"], default="small", help="合成工程的规模")
+    bench.add_argument("--repeat", type=int, default=3, help="重复次数，每个阶段取最快的一次")
+    bench.add_argument("--workdir", default=None, help="合成工程所在的文件夹，参数不变时重复使用")
+    bench.add_argument(
+        "--baseline", default=None, metavar="baseline.json", help="与基准结果比较，变慢时返回 1"
+    )
+    bench.add_argument("--save", default=None, metavar="baseline.json", help="把本次结果保存为基准")
+    bench.add_argument("--tolerance", type=float, default=0.25, help="允许比基准慢的比例")
+    bench.add_argument(
+        "--mode",
+        choices=[f"{e}" for e in CopyModeEnum],
+        default=CopyModeEnum.REFLINK,
+        help="文件复制方式",
+    )
+    bench.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+
+    gc = commands.add_parser("gc", parents=[common], help="清理本地资源库，按最近使用时间删除最旧的文件")
+    gc.add_argument("--max-size", type=float, default=None, help="资源库大小上限（MB），默认 2048")
+    gc.add_argument("--max-age", type=float, default=None, help="删除超过这么多天没有使用的文件")
+    gc.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+
+    return parser
+
+
+def export_project(project_file: str, target_dir: str, solve: bool = False, **options) -> Dict[str, Any]:
+    report = {"project": project_file, "target": target_dir, "code": ExitCodeEnum.OK, "errors": []}
+    if options.get("languages") is not None:
+        report["languages"] = sorted(options["languages"])
+    collector = QuietDataCollector(**options)
+
+    try:
+        props = load_props(project_file)
+        if solve:
+            props[PropKeyEnum.G3_SOLVE] = True
+        if bundle_format(target_dir) is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(target_dir)), exist_ok=True)
+        else:
+            os.makedirs(target_dir, exist_ok=True)
+    except ExportError as e:
+        report.update(code=ExitCodeEnum.PROJECT, errors=[e.to_dict()])
+        return report
+    except OSError as e:
+        error = ExportError(ErrorCodeEnum.E_TARGET_DIR, f"无法创建导出文件夹【{target_dir} 】：{e}")
+        report.update(code=ExitCodeEnum.IO, errors=[error.to_dict()])
+        return report
+
+    # keep stdout clean for the report, progress goes to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        exported = collector.export(props, target_dir)
+
+    if exported is None:
+        io_failed = any(
+            e.code in (ErrorCodeEnum.E_IO, ErrorCodeEnum.E_DEPENDENCY) for e in collector.errors
+        )
+        report["code"] = ExitCodeEnum.IO if io_failed else ExitCodeEnum.CHECK
+
+    report["errors"] = [e.to_dict() for e in collector.errors]
+    report["copy_stats"] = collector.copy_stats
+    return report
+
+
+def _print_report(reports: List[Dict[str, Any]], as_json: bool):
+    if as_json:
+        json.dump(reports, sys.stdout, indent=4, ensure_ascii=False)
+        sys.stdout.write("\n")
+        return
+
+    for report in reports:
+        for error in report["errors"]:
+            level = "error" if error["fatal"] else "warning"
+            print(f"{report['project']}: {level}[{error['code']}]: {error['text']}", file=sys.stderr)
+        if report["code"] == ExitCodeEnum.OK:
+            print(f"{report['project']}: 成功导出到：{report['target']}")
+
+
+def language_target(target_dir: str, code: str) -> str:
+    fmt = bundle_format(target_dir)
+    if fmt is not None:
+        return f"{os.path.splitext(target_dir)[0]}-{code}.{fmt}"
+    return os.path.join(target_dir, code)
+
+
+def run_export(
+    projects: List[str], out_dir: str, as_json: bool = False, per_language: bool = False, **options
+) -> int:
+    reports = []
+    for project_file in projects:
+        target_dir = out_dir
+        if len(projects) > 1:
+            name = os.path.splitext(os.path.basename(project_file))[0]
+            fmt = bundle_format(out_dir)
+            if fmt is not None:
+                target_dir = os.path.join(os.path.splitext(out_dir)[0], f"{name}.{fmt}")
+            else:
+                target_dir = os.path.join(out_dir, name)
+        if not per_language:
+            reports.append(export_project(project_file, target_dir, **options))
+            continue
+        for code in LANGUAGE_CODES:
+            reports.append(
+                export_project(project_file, language_target(target_dir, code), languages=[code], **options)
+            )
+
+    _print_report(reports, as_json)
+    return max(report["code"] for report in reports)
+
+
+def run_watch(
+    project_file: str,
+    target_dir: str,
+    as_json: bool = False,
+    max_rounds: int = None,
+    solve: bool = False,
+    **options,
+):
+    code = run_export([project_file], target_dir, as_json, solve=solve, **options)
+    project_file = os.path.abspath(project_file)
+    collector = QuietDataCollector(**options)
+
+    def _watch_paths(props):
+        return [project_file] + list(collector.get_watch_paths(props).keys())
+
+    try:
+        props = load_props(project_file)
+    except ExportError:
+        props = {}
+    if solve:
+        props[PropKeyEnum.G3_SOLVE] = True
+    watcher = PollingWatcher(_watch_paths(props))
+    print(f"监视中：{project_file}，按 Ctrl+C 结束", file=sys.stderr)
+
+    rounds = 0
+    try:
+        while max_rounds is None or rounds < max_rounds:
+            changed = watcher.wait()
+            rounds += 1
+            started = time.monotonic()
+            if project_file in changed:
+                try:
+                    props = load_props(project_file)
+                except ExportError as e:
+                    print(f"{project_file}: error[{e.code}]: {e.text}", file=sys.stderr)
+                    continue
+                if solve:
+                    props[PropKeyEnum.G3_SOLVE] = True
+                stages = None
+                watcher.set_paths(_watch_paths(props))
+            else:
+                stages = collector.get_changed_stages(props, changed)
+
+            with contextlib.redirect_stdout(sys.stderr):
+                exported = collector.export(props, target_dir, stages)
+            for error in collector.errors:
+                level = "error" if error.fatal else "warning"
+                print(f"{project_file}: {level}[{error.code}]: {error.text}", file=sys.stderr)
+
+            elapsed = (time.monotonic() - started) * 1000
+            names = "all" if stages is None else ",".join(sorted(f"{s}" for s in stages))
+            if exported is not None:
+                print(f"{time.strftime('%H:%M:%S')} 重新导出 [{names}]，用时 {elapsed:.0f} ms")
+                code = ExitCodeEnum.OK
+            else:
+                code = ExitCodeEnum.CHECK
+    except KeyboardInterrupt:
+        pass
+
+    return code
+
+
+def run_variants(
+    project_file: str,
+    matrix_file: str,
+    out_dir: str,
+    as_json: bool = False,
+    sample: int = None,
+    seed: int = None,
+    max_workers: int = None,
+    **options,
+) -> int:
+    from wsc.variants import (
+        VariantMatrix,
+        export_variants,
+    )
+
+    try:
+        props = load_props(project_file)
+        matrix = VariantMatrix.load(matrix_file)
+        if sample is not None:
+            matrix.sample = sample
+        if seed is not None:
+            matrix.seed = seed
+        with contextlib.redirect_stdout(sys.stderr):
+            report = export_variants(props, matrix, out_dir, QuietDataCollector, max_workers, **options)
+    except ExportError as e:
+        print(f"error[{e.code}]: {e.text}", file=sys.stderr)
+        return ExitCodeEnum.PROJECT
+    except OSError as e:
+        print(f"error: 无法创建导出文件夹【{out_dir} 】：{e}", file=sys.stderr)
+        return ExitCodeEnum.IO
+
+    failed = [v for v in report["variants"] if not v["ok"]]
+    if as_json:
+        json.dump(report, sys.stdout, indent=4, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        for group in report["groups"]:
+            for error in group["errors"]:
+                level = "error" if error["fatal"] else "warning"
+                print(
+                    f"共享资源 {group['name']}: {level}[{error['code']}]: {error['text']}", file=sys.stderr
+                )
+        for variant in report["variants"]:
+            for error in variant["errors"]:
+                level = "error" if error["fatal"] else "warning"
+                print(f"{variant['name']}: {level}[{error['code']}]: {error['text']}", file=sys.stderr)
+        print(
+            f"共 {len(report['variants'])} 个变体，{len(report['groups'])} 组共享资源，"
+            f"成功 {len(report['variants']) - len(failed)} 个：{out_dir}"
+        )
+
+    return ExitCodeEnum.CHECK if failed else ExitCodeEnum.OK
+
+
+def run_bench(
+    scale: str = "small",
+    repeat: int = 3,
+    work_dir: str = None,
+    baseline_file: str = None,
+    save_file: str = None,
+    tolerance: float = 0.25,
+    copy_mode: CopyModeEnum = CopyModeEnum.REFLINK,
+    as_json: bool = False,
+) -> int:
+    from wsc.bench import (
+        BENCH_SCALES,
+        compare_results,
+        run_benchmark,
+    )
+
+    baseline = None
+    if baseline_file is not None:
+        try:
+            with open(baseline_file, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"error: 无法读取基准结果【{baseline_file} 】：{e}", file=sys.stderr)
+            return ExitCodeEnum.USAGE
+
+    def _log(text: str):
+        print(text, file=sys.stderr)
+
+    with contextlib.ExitStack() as stack:
+        if work_dir is None:
+            work_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="wsc-bench-"))
+        os.makedirs(work_dir, exist_ok=True)
+        result = run_benchmark(BENCH_SCALES[scale], work_dir, repeat, copy_mode, scale, _log)
+
+    regressions = []
+    if baseline is not None:
+        try:
+            regressions = compare_results(result, baseline, tolerance)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return ExitCodeEnum.USAGE
+        result["regressions"] = regressions
+
+    if save_file is not None:
+        try:
+            with open(save_file, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=4, ensure_ascii=False)
+        except OSError as e:
+            print(f"error: 无法写入基准结果【{save_file} 】：{e}", file=sys.stderr)
+            return ExitCodeEnum.IO
+
+    if as_json:
+        json.dump(result, sys.stdout, indent=4, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        for phase, item in result["phases"].items():
+            print(
+                f"{phase:<10} {item['seconds']:8.3f} s  {item['files']:6d} 个文件  "
+                f"{item['files_per_s'] or 0:10.1f} 文件/s  {item['mb_per_s'] or 0:8.1f} MB/s  "
+                f"内存分配峰值 {item['peak_alloc_mb']} MB"
+            )
+        print(f"进程内存峰值 {result['peak_rss_mb']} MB")
+        for regression in regressions:
+            print(f"变慢：{regression}", file=sys.stderr)
+
+    return ExitCodeEnum.CHECK if regressions else ExitCodeEnum.OK
+
+
+def run_gc(max_size: float = None, max_age: float = None, as_json: bool = False) -> int:
+    from wsc.store import get_asset_store
+
+    store = get_asset_store()
+    max_bytes = None if max_size is None else int(max_size * 1024 * 1024)
+    max_age = None if max_age is None else max_age * 86400
+    try:
+        report = store.gc(max_bytes, max_age)
+    except OSError as e:
+        print(f"error: 无法清理资源库【{store.root} 】：{e}", file=sys.stderr)
+        return ExitCodeEnum.IO
+
+    if as_json:
+        json.dump({"store": store.root, **report}, sys.stdout, indent=4, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        print(
+            f"删除 {report['removed']} 个文件，释放 {report['freed'] / 1024 / 1024:.1f} MB，"
+            f"剩余 {report['objects']} 个文件 {report['bytes'] / 1024 / 1024:.1f} MB：{store.root}"
+        )
+    return ExitCodeEnum.OK
+
+
+def run_solve(levels: List[str], as_json: bool = False, time_limit: float = 5.0) -> int:
+    from wsc.solver import (
+        solve_level_files,
+        suggest_n_value,
+    )
+
+    missing = [path for path in levels if not os.path.exists(path)]
+    results = [{"error": "文件不存在"} for _ in missing]
+    found = [path for path in levels if path not in missing]
+    results += solve_level_files(found, time_limit=time_limit)
+
+    reports = []
+    for path, result in zip(missing + found, results):
+        if "error" in result:
+            code = ExitCodeEnum.PROJECT
+        elif result["solvable"] is False:
+            code = ExitCodeEnum.CHECK
+        else:
+            code = ExitCodeEnum.OK
+        if result.get("moves") is not None and result.get("optimal"):
+            result["suggested_n"] = suggest_n_value(result["moves"])
+        reports.append({"level": path, "code": code, **result})
+
+    if as_json:
+        json.dump(reports, sys.stdout, indent=4, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        for report in reports:
+            if "error" in report:
+                print(f"{report['level']}: error: {report['error']}", file=sys.stderr)
+            elif report["solvable"] is False:
+                print(f"{report['level']}: 无解")
+            elif report["solvable"] is None:
+                print(f"{report['level']}: 在限定时间内没有求出解")
+            elif report["optimal"]:
+                print(f"{report['level']}: 最少 {report['moves']} 步，建议 n 值 {report['suggested_n']}")
+            else:
+                print(f"{report['level']}: 有解，不超过 {report['moves']} 步")
+
+    return max(report["code"] for report in reports)
+
+
+def run_index(folder: str, out_file: str, pattern: str = "lv*.json") -> int:
+    from wsc.corpus import LevelIndex
+
+    if not os.path.isdir(folder):
+        print(f"error: 关卡文件夹【{folder} 】不存在", file=sys.stderr)
+        return ExitCodeEnum.PROJECT
+
+    index = LevelIndex.scan_dir(folder, pattern)
+    try:
+        index.save(out_file)
+    except OSError as e:
+        print(f"error: 无法写入索引【{out_file} 】：{e}", file=sys.stderr)
+        return ExitCodeEnum.IO
+
+    for record in index.records:
+        if "error" in record:
+            print(f"{record['path']}: error: {record['error']}", file=sys.stderr)
+    levels = [r for r in index.records if "error" not in r]
+    duplicates = sum(r["duplicate_of"] is not None for r in levels)
+    isomorphic = sum(r["isomorphic_of"] is not None for r in levels) - duplicates
+    print(f"共 {len(levels)} 个关卡，重复 {duplicates} 个，同构 {isomorphic} 个：{out_file}")
+    return ExitCodeEnum.OK
+
+
+def run_query(index_file: str, conditions: List[str], unique: bool = False, as_json: bool = False) -> int:
+    from wsc.corpus import LevelIndex
+
+    try:
+        records = LevelIndex.load(index_file).query(conditions, unique)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return ExitCodeEnum.USAGE
+
+    if as_json:
+        json.dump(records, sys.stdout, indent=4, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        for record in records:
+            print(
+                f"{record['path']}: {record['bottles']} 瓶 {record['colors']} 色，"
+                f"熵 {record['entropy']}，混乱度 {record['mixedness']}，步数下限 {record['lower_bound']}"
+            )
+    return ExitCodeEnum.OK
+
+
+def _print_trace(summary: Dict[str, Dict[str, Any]]):
+    for name, item in summary.items():
+        size = item["bytes"] / 1024 / 1024
+        print(
+            f"{name:<24} {item['seconds']:8.3f} s  {item['count']:6d} 次  {item['files']:6d} 个文件  {size:8.1f} MB",
+            file=sys.stderr,
+        )
+
+
+def main(argv: List[str] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    setup_logging(args.log_file or default_log_file(), args.verbose)
+
+    tracing = args.trace or args.trace_file is not None or args.verbose > 1
+    if not tracing:
+        return _dispatch(args)
+
+    tracer = get_tracer()
+    tracer.start(args.trace_file)
+    try:
+        return _dispatch(args)
+    finally:
+        summary = tracer.stop()
+        if args.trace or args.trace_file is not None:
+            _print_trace(summary)
+
+
+def _dispatch(args: argparse.Namespace) -> int:
+    if args.command == "export" and args.watch:
+        if len(args.projects) != 1:
+            print("error: --watch 只支持一个工程", file=sys.stderr)
+            return ExitCodeEnum.USAGE
+        if args.per_language:
+            print("error: --watch 不支持 --per-language", file=sys.stderr)
+            return ExitCodeEnum.USAGE
+        return run_watch(
+            args.projects[0],
+            args.out,
+            args.json,
+            incremental=not args.full,
+            copy_mode=args.mode,
+            max_workers=args.jobs,
+            html_template=args.html_template,
+            use_store=args.store,
+            solve=args.solve,
+        )
+
+    if args.command == "export":
+        return run_export(
+            args.projects,
+            args.out,
+            args.json,
+            args.per_language,
+            incremental=not args.full,
+            copy_mode=args.mode,
+            max_workers=args.jobs,
+            html_template=args.html_template,
+            use_store=args.store,
+            solve=args.solve,
+        )
+
+    if args.command == "variants":
+        return run_variants(
+            args.project,
+            args.matrix,
+            args.out,
+            args.json,
+            sample=args.sample,
+            seed=args.seed,
+            max_workers=args.jobs,
+            incremental=not args.full,
+            copy_mode=args.mode,
+            use_store=args.store,
+        )
+
+    if args.command == "bench":
+        return run_bench(
+            args.scale,
+            args.repeat,
+            args.workdir,
+            args.baseline,
+            args.save,
+            args.tolerance,
+            args.mode,
+            args.json,
+        )
+
+    if args.command == "gc":
+        return run_gc(args.max_size, args.max_age, args.json)
+
+    if args.command == "solve":
+        return run_solve(args.levels, args.json, args.time_limit)
+
+    if args.command == "index":
+        return run_index(args.folder, args.out, args.pattern)
+
+    if args.command == "query":
+        return run_query(args.index, args.where, args.unique, args.json)
+
+    return ExitCodeEnum.USAGE
+
+
+if __name__ == "__main__":
+    sys.exit(main())
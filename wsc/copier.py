@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+import enum
+import errno
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from typing import Dict, List
+
+from wsc.hashing import (
+    copy_and_hash,
+    get_hash_cache,
+)
+from wsc.tracing import span
+
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+_FALLBACK_ERRNO = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EPERM,
+    errno.EACCES,
+    errno.EMLINK,
+    errno.EBADF,
+}
+
+
+class CopyModeEnum(enum.StrEnum):
+    COPY = "copy"
+    REFLINK = "reflink"
+    HARDLINK = "hardlink"
+
+
+class CopyStrategyEnum(enum.StrEnum):
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+    KERNEL = "copy_file_range"
+    BUFFERED = "buffered"
+    FUSED = "fused"
+
+
+_MODE_STRATEGIES = {
+    CopyModeEnum.COPY: [CopyStrategyEnum.KERNEL, CopyStrategyEnum.BUFFERED],
+    CopyModeEnum.REFLINK: [CopyStrategyEnum.REFLINK, CopyStrategyEnum.KERNEL, CopyStrategyEnum.BUFFERED],
+    CopyModeEnum.HARDLINK: [
+        CopyStrategyEnum.HARDLINK,
+        CopyStrategyEnum.REFLINK,
+        CopyStrategyEnum.KERNEL,
+        CopyStrategyEnum.BUFFERED,
+    ],
+}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _unlink_quiet(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _copy_hardlink(src: str, dst: str, size: int):
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno in _FALLBACK_ERRNO:
+            raise _Unsupported()
+        raise
+
+
+def _copy_reflink(src: str, dst: str, size: int):
+    if not sys.platform.startswith("linux"):
+        raise _Unsupported()
+
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError as e:
+            if e.errno in _FALLBACK_ERRNO:
+                raise _Unsupported()
+            raise
+
+
+def _copy_kernel(src: str, dst: str, size: int):
+    if not hasattr(os, "copy_file_range"):
+        raise _Unsupported()
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        offset = 0
+        while offset < size:
+            try:
+                sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - offset)
+            except OSError as e:
+                if offset == 0 and e.errno in _FALLBACK_ERRNO:
+                    raise _Unsupported()
+                raise
+            if sent == 0:
+                break
+            offset += sent
+
+        if offset != size:
+            raise _Unsupported()
+
+
+def _copy_buffered(src: str, dst: str, size: int):
+    shutil.copyfile(src, dst)
+
+
+def _copy_fused(src: str, dst: str, size: int):
+    copy_and_hash(src, dst)
+
+
+_STRATEGY_FUNCS = {
+    CopyStrategyEnum.HARDLINK: _copy_hardlink,
+    CopyStrategyEnum.REFLINK: _copy_reflink,
+    CopyStrategyEnum.KERNEL: _copy_kernel,
+    CopyStrategyEnum.BUFFERED: _copy_buffered,
+    CopyStrategyEnum.FUSED: _copy_fused,
+}
+
+# the data has to be read anyway, hash it on the way through
+_FUSED_REPLACES = {CopyStrategyEnum.KERNEL, CopyStrategyEnum.BUFFERED}
+
+
+def _select_strategies(src: str, mode: CopyModeEnum, need_hash: bool) -> List[CopyStrategyEnum]:
+    strategies = _MODE_STRATEGIES[mode]
+    if not need_hash or get_hash_cache().lookup(src) is not None:
+        return strategies
+
+    return [s for s in strategies if s not in _FUSED_REPLACES] + [CopyStrategyEnum.FUSED]
+
+
+def copy_file(
+    src: str,
+    dst: str,
+    mode: CopyModeEnum = CopyModeEnum.REFLINK,
+    need_hash: bool = False,
+) -> CopyStrategyEnum:
+    size = os.path.getsize(src)
+    with span("copy_file", "io", files=1, bytes=size) as s:
+        for strategy in _select_strategies(src, mode, need_hash):
+            # never write through an existing hardlink into the source
+            _unlink_quiet(dst)
+            try:
+                _STRATEGY_FUNCS[strategy](src, dst, size)
+                s.set(strategy=f"{strategy}")
+                return strategy
+            except _Unsupported:
+                continue
+
+    raise OSError(errno.EIO, f"No copy strategy succeeded: {src} => {dst}")
+
+
+class CopyExecutor:
+    _futures: List[Future]
+    _stats: Dict[CopyStrategyEnum, Dict[str, int]]
+
+    def __init__(self, mode: CopyModeEnum = CopyModeEnum.REFLINK, max_workers: int = None, store=None):
+        self.mode = CopyModeEnum(mode)
+        self.store = store
+        self.max_workers = max_workers or min(16, (os.cpu_count() or 1) * 2)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="wsc-copy")
+        self._slots = threading.BoundedSemaphore(self.max_workers * 2)
+        self._lock = threading.Lock()
+        self._futures = []
+        self._stats = {}
+
+    def _run(self, src: str, dst: str, need_hash: bool):
+        try:
+            size = os.path.getsize(src)
+            if self.store is not None:
+                # outputs are materialized from the stored object, which is hashed on the way in
+                src = self.store.object_path(self.store.put_file(src))
+                need_hash = False
+            strategy = copy_file(src, dst, self.mode, need_hash)
+            with self._lock:
+                item = self._stats.setdefault(strategy, {"files": 0, "bytes": 0})
+                item["files"] += 1
+                item["bytes"] += size
+            return strategy
+        finally:
+            self._slots.release()
+
+    def submit(self, src: str, dst: str, need_hash: bool = False) -> Future:
+        self._slots.acquire()
+        future = self._pool.submit(self._run, src, dst, need_hash)
+        self._futures.append(future)
+        return future
+
+    def cancel(self):
+        # copies already running are finished, the queued ones are dropped
+        for future in self._futures:
+            future.cancel()
+
+    def wait(self):
+        futures, self._futures = self._futures, []
+        errors = [f.exception() for f in futures if not f.cancelled()]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def shutdown(self):
+        try:
+            self.wait()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {f"{k}": dict(v) for k, v in self._stats.items()}
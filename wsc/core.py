@@ -0,0 +1,1651 @@
+# -*- coding: utf-8 -*-
+import copy
+import enum
+import json
+import os
+import random
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Set,
+    Tuple,
+)
+
+from wsc.atlas import SpineAtlas
+from wsc.bottle import (
+    TABLE_STEPS,
+    TABLE_VERSION,
+    BottleLevels,
+)
+from wsc.bundle import (
+    BundleError,
+    BundleWriter,
+    bundle_format,
+    open_bundle,
+)
+from wsc.copier import (
+    CopyExecutor,
+    CopyModeEnum,
+    copy_file,
+)
+from wsc.dirindex import get_dir_index
+from wsc.hashing import (
+    calc_file_digest,
+    calc_fingerprints,
+    get_hash_cache,
+)
+from wsc.leveltable import (
+    LevelEntry,
+    LevelTable,
+)
+from wsc.manifest import ExportManifest
+from wsc.probe import (
+    ColorTypeEnum,
+    ImageFormatEnum,
+    ImageInfo,
+    probe_images,
+)
+from wsc.skeleton import SpineSkeleton
+from wsc.store import get_asset_store
+from wsc.tracing import (
+    log,
+    span,
+    traced,
+)
+from wsc.validation import ValidationEngine
+
+
+class PropKeyEnum(enum.StrEnum):
+    G1_FILE_01 = "G1_PNG_01"
+    G1_FILE_02 = "G1_PNG_02"
+    G1_FILE_03 = "G1_PNG_03"
+    G1_IMG_DIR = "G1_IMG_DIR"
+    G1_PACK_LANG = "G1_PACK_LANG"
+    G2_FILE_01 = "G2_JSON_F01"
+    G2_FILE_02 = "G2_JSON_F02"
+    G2_FILE_03 = "G2_JSON_F03"
+    G2_LEVELS = "G2_LEVEL_FILES"
+    G3_OPT_TYP = "G3_OPT_TYPE"
+    G3_OPT_NUM = "G3_OPT_NUMBER"
+    G3_SOLVE = "G3_SOLVE_LEVELS"
+    G4_FILE_01 = "G4_FILE_01"
+    G4_INIT_SC = "G4_INIT_SCALE"
+    G4_ANI_TIM = "G4_ANI_TIME"
+    G4_ANI_DLY = "G4_ANI_DELAY"
+    G4_ANI_SC0 = "G4_ANI_SCALE_MIN"
+    G4_ANI_SC9 = "G4_ANI_SCALE_MAX"
+    G5_FILE_01 = "G5_FILE_01"
+    G5_IS_TUTR = "G5_IS_TUTOR"
+    G5_YXP_DIR = "G5_YXP_DIR"
+    G5_FILE_04 = "G5_FILE_04"
+    G5_WEBP_QA = "G5_WEBP_QUALITY"
+    G5_REPACK = "G5_REPACK_MODE"
+    G5_PRUNE = "G5_PRUNE_REGIONS"
+    G5_KEEP_ANI = "G5_KEEP_ANIMATIONS"
+    G5_STABLE_MD5 = "G5_STABLE_MD5"
+    G5_ASSET_HASH = "G5_ASSET_HASHES"
+
+
+class YxpSuffixEnum(enum.StrEnum):
+    SKEL = "skel"
+    ATLAS = "atlas"
+    WEBP = "webp"
+    CSV = "csv"
+
+
+class LastLevelCondEnum(enum.StrEnum):
+    E00 = "0"
+    E01 = "a"
+    E02 = "b"
+
+
+class ExportStageEnum(enum.StrEnum):
+    FILES = "files"
+    YXP = "yxp"
+    LANG = "lang"
+    CONFIG = "config"
+
+
+class RepackModeEnum(enum.StrEnum):
+    NONE = "none"
+    TIGHT = "tight"
+    POT = "pot"
+
+
+class ErrorCodeEnum(enum.StrEnum):
+    E_PROJECT = "project"
+    E_N_VALUE = "n_value"
+    E_FILE_DELETED = "file_deleted"
+    E_LEVEL_GAP = "level_gap"
+    E_LEVEL_EMPTY = "level_empty"
+    E_LEVEL_DATA = "level_data"
+    E_LEVEL_UNSOLVABLE = "level_unsolvable"
+    E_IMAGE_JSON = "image_json_mismatch"
+    E_YXP_DELETED = "yxp_deleted"
+    E_YXP_FILES = "yxp_files"
+    E_ATLAS = "atlas"
+    E_SKEL = "skel"
+    E_BOTTLE = "bottle"
+    E_LANG_DELETED = "lang_deleted"
+    E_LANG_EXTRA = "lang_extra"
+    E_LANG_MISSING = "lang_missing"
+    E_LANG_SIZE = "lang_size"
+    E_IMAGE_FORMAT = "image_format"
+    E_IMAGE_SIZE = "image_size"
+    E_TARGET_DIR = "target_dir"
+    E_IO = "io"
+    E_DEPENDENCY = "dependency"
+    E_CANCELLED = "cancelled"
+
+
+LastLevelCondEnumDict = {
+    LastLevelCondEnum.E00: "胜利/失败",
+    LastLevelCondEnum.E01: "胜利/失败/有效操作次数>n",
+    LastLevelCondEnum.E02: "胜利/失败/用户操作次数>n",
+}
+
+LastLevelCondOptionList = [
+    {
+        "label": f"{LastLevelCondEnumDict[e]}",
+        "value": e,
+    }
+    for e in LastLevelCondEnum
+]
+
+RepackModeEnumDict = {
+    RepackModeEnum.NONE: "保持原图集",
+    RepackModeEnum.TIGHT: "重新打包/紧凑尺寸",
+    RepackModeEnum.POT: "重新打包/2 的幂尺寸",
+}
+
+RepackModeOptionList = [
+    {
+        "label": f"{RepackModeEnumDict[e]}",
+        "value": e,
+    }
+    for e in RepackModeEnum
+]
+
+_PATH_KEYS = {
+    PropKeyEnum.G1_FILE_01,
+    PropKeyEnum.G1_FILE_02,
+    PropKeyEnum.G1_FILE_03,
+    PropKeyEnum.G1_IMG_DIR,
+    PropKeyEnum.G2_FILE_01,
+    PropKeyEnum.G2_FILE_02,
+    PropKeyEnum.G2_FILE_03,
+    PropKeyEnum.G4_FILE_01,
+    PropKeyEnum.G5_FILE_01,
+    PropKeyEnum.G5_YXP_DIR,
+    PropKeyEnum.G5_FILE_04,
+}
+
+# read by store_config only, a change leaves every other exported file byte identical
+CONFIG_ONLY_KEYS = {
+    PropKeyEnum.G3_OPT_TYP,
+    PropKeyEnum.G3_OPT_NUM,
+    PropKeyEnum.G4_INIT_SC,
+    PropKeyEnum.G4_ANI_TIM,
+    PropKeyEnum.G4_ANI_DLY,
+    PropKeyEnum.G4_ANI_SC0,
+    PropKeyEnum.G4_ANI_SC9,
+    PropKeyEnum.G5_IS_TUTR,
+    PropKeyEnum.G5_STABLE_MD5,
+    PropKeyEnum.G5_ASSET_HASH,
+}
+
+# older projects configure the first three levels with one key each
+_LEGACY_LEVEL_KEYS = [PropKeyEnum.G2_FILE_01, PropKeyEnum.G2_FILE_02, PropKeyEnum.G2_FILE_03]
+_LEVEL_KEYS = [PropKeyEnum.G2_LEVELS] + _LEGACY_LEVEL_KEYS
+
+_CONFIG_TEMPLATE = {
+    "LevelData": [
+        {
+            "id": 1,
+            "levle": "1-1",
+            # "titleImage": "TitleBg1",
+        },
+        {
+            "id": 2,
+            "levle": "2-1",
+            # "titleImage": "TitleBg2",
+        },
+        {
+            "id": 3,
+            "levle": "3-1",
+            # "titleImage": "TitleBg3",
+        },
+    ],
+    "titleImageMultiLanguage": {
+        "default": "TitleBg-英语",
+        "en": "TitleBg-英语",
+        "fr": "TitleBg-法语",
+        "ru": "TitleBg-俄语",
+        "de": "TitleBg-德语",
+        "ja": "TitleBg-日语",
+        "ko": "TitleBg-韩语",
+        "es": "TitleBg-西班牙语",
+        "pt": "TitleBg-葡萄牙语",
+        "ar": "TitleBg-阿拉伯语",
+        "it": "TitleBg-意大利语",
+    },
+    "LevelLength": 3,
+    "ResultJumpType": "0",
+    "ResultJumpNumber": 0,
+    "ResultJumpImageURL": "WinBg",
+    "DownButtomInfo": {
+        "imageUrl": "DownButtomBg",
+        "scale": 1.8,
+        "aniTime": 0,
+        "delayTime": 0,
+        "aniScale": [1, 1],
+    },
+    "IsOpenTutorial": True,
+    "md5": "",
+}
+
+# every title except the default can be exported on its own
+LANGUAGE_CODES = [code for code in _CONFIG_TEMPLATE["titleImageMultiLanguage"] if code != "default"]
+
+TITLE_ATLAS_NAME = "TitleBg-atlas"
+
+
+def config_template() -> Dict[str, Any]:
+    # a copy, callers may fill it in
+    return copy.deepcopy(_CONFIG_TEMPLATE)
+
+
+class ExportError(Exception):
+    def __init__(self, code: ErrorCodeEnum, text: str, key: PropKeyEnum = None, fatal: bool = True):
+        super().__init__(text)
+        self.code = code
+        self.text = text
+        self.key = key
+        self.fatal = fatal
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "code": f"{self.code}",
+            "key": None if self.key is None else f"{self.key}",
+            "text": self.text,
+            "fatal": self.fatal,
+        }
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def parse_prop_key(name: str) -> PropKeyEnum:
+    if name in PropKeyEnum.__members__:
+        return PropKeyEnum[name]
+    try:
+        return PropKeyEnum(name)
+    except ValueError:
+        raise ExportError(ErrorCodeEnum.E_PROJECT, f"未知的参数【{name} 】")
+
+
+def load_props(project_file: str) -> Dict[PropKeyEnum, Any]:
+    try:
+        with open(project_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ExportError(ErrorCodeEnum.E_PROJECT, f"无法读取工程文件【{project_file} 】：{e}")
+
+    if not isinstance(data, dict):
+        raise ExportError(ErrorCodeEnum.E_PROJECT, f"工程文件【{project_file} 】必须是 JSON 对象")
+
+    base_dir = os.path.dirname(os.path.abspath(project_file))
+    props = {}
+    for name, value in data.items():
+        key = parse_prop_key(name)
+        props[key] = parse_prop_value(key, value, base_dir)
+
+    return props
+
+
+def parse_prop_value(key: PropKeyEnum, value: Any, base_dir: str) -> Any:
+    if key in _PATH_KEYS and value:
+        value = os.path.normpath(os.path.join(base_dir, value))
+    elif key == PropKeyEnum.G2_LEVELS:
+        if not isinstance(value, list):
+            raise ExportError(ErrorCodeEnum.E_PROJECT, f"关卡列表【{value} 】必须是数组", key)
+        value = [os.path.normpath(os.path.join(base_dir, v)) if v else "" for v in value]
+    elif key == PropKeyEnum.G3_OPT_TYP:
+        try:
+            value = LastLevelCondEnum(f"{value}")
+        except ValueError:
+            raise ExportError(ErrorCodeEnum.E_PROJECT, f"结束条件类型【{value} 】无效", key)
+    elif key == PropKeyEnum.G5_REPACK:
+        try:
+            value = RepackModeEnum(f"{value}")
+        except ValueError:
+            raise ExportError(ErrorCodeEnum.E_PROJECT, f"纹理打包方式【{value} 】无效", key)
+    elif key == PropKeyEnum.G5_KEEP_ANI and isinstance(value, str):
+        value = [v.strip() for v in value.split(",") if v.strip()]
+    return value
+
+
+def dump_props(props: Dict[PropKeyEnum, Any], project_file: str):
+    data = {f"{key}": f"{value}" if isinstance(value, enum.Enum) else value for key, value in props.items()}
+    with open(project_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+class DataCollector:
+    _ASSET_INIT = {
+        # PropKeyEnum.G1_FILE_01: f"{_CONFIG_TEMPLATE['LevelData'][0]['titleImage']}",
+        # PropKeyEnum.G1_FILE_02: f"{_CONFIG_TEMPLATE['LevelData'][1]['titleImage']}",
+        # PropKeyEnum.G1_FILE_03: f"{_CONFIG_TEMPLATE['LevelData'][2]['titleImage']}",
+        PropKeyEnum.G4_FILE_01: f"{_CONFIG_TEMPLATE['DownButtomInfo']['imageUrl']}",
+        PropKeyEnum.G5_FILE_01: f"{_CONFIG_TEMPLATE['ResultJumpImageURL']}",
+    }
+
+    _ASSET_LIST = {
+        # PropKeyEnum.G1_FILE_01: f"{_CONFIG_TEMPLATE['LevelData'][0]['titleImage']}.png",
+        # PropKeyEnum.G1_FILE_02: f"{_CONFIG_TEMPLATE['LevelData'][1]['titleImage']}.png",
+        # PropKeyEnum.G1_FILE_03: f"{_CONFIG_TEMPLATE['LevelData'][2]['titleImage']}.png",
+        PropKeyEnum.G4_FILE_01: f"{_CONFIG_TEMPLATE['DownButtomInfo']['imageUrl']}.png",
+        PropKeyEnum.G5_FILE_01: f"{_CONFIG_TEMPLATE['ResultJumpImageURL']}.png",
+        PropKeyEnum.G5_FILE_04: f"SodaSorting_pic_bg_1.jpg",
+    }
+
+    _ASSET_YXP_FILES = {
+        YxpSuffixEnum.SKEL: f"心形瓶子_接水.{YxpSuffixEnum.SKEL}",
+        YxpSuffixEnum.ATLAS: f"心形瓶子_接水.{YxpSuffixEnum.ATLAS}",
+        YxpSuffixEnum.WEBP: f"心形瓶子_接水.{YxpSuffixEnum.WEBP}",
+        # the water level csv is compiled into a table for the runtime, the csv itself is not shipped
+        YxpSuffixEnum.CSV: "SpecialBottleTable.json",
+    }
+
+    # artists may hand over the texture as png, it is transcoded on export
+    _YXP_SOURCE_SUFFIXES = {
+        YxpSuffixEnum.WEBP: [YxpSuffixEnum.WEBP, "png"],
+    }
+
+    _ERROR_MSG = {
+        # PropKeyEnum.G1_FILE_01: "1. 标题图片/关卡1",
+        # PropKeyEnum.G1_FILE_02: "1. 标题图片/关卡2",
+        # PropKeyEnum.G1_FILE_03: "1. 标题图片/关卡3",
+        PropKeyEnum.G1_IMG_DIR: "1. 标题图片/多语言标题",
+        PropKeyEnum.G3_OPT_TYP: "3. 最后一关的结束条件/结束条件类型",
+        PropKeyEnum.G3_OPT_NUM: "3. 最后一关的结束条件/n 值",
+        PropKeyEnum.G4_FILE_01: "4. 下载按钮/下载按钮图片",
+        PropKeyEnum.G5_FILE_01: "5. 其他确认项/结束页",
+        PropKeyEnum.G5_IS_TUTR: "5. 其他确认项/是否有新手",
+        PropKeyEnum.G5_FILE_04: "5. 其他确认项/背景图",
+    }
+
+    _CHAR_ALPHABETA = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+    # the largest texture side mobile webviews reliably load
+    _IMAGE_MAX_SIDE = 4096
+
+    _IMAGE_FORMATS = {
+        ".png": ImageFormatEnum.PNG,
+        ".jpg": ImageFormatEnum.JPEG,
+        ".webp": ImageFormatEnum.WEBP,
+    }
+
+    _CHECK_KEYS = {
+        "check_n_value": [PropKeyEnum.G3_OPT_TYP, PropKeyEnum.G3_OPT_NUM],
+        "check_file_exist": list(_ASSET_LIST.keys()) + _LEVEL_KEYS,
+        "check_level_file": _LEVEL_KEYS,
+        "check_level_count": _LEVEL_KEYS,
+        "check_level_solvable": [
+            PropKeyEnum.G3_SOLVE,
+            PropKeyEnum.G3_OPT_TYP,
+            PropKeyEnum.G3_OPT_NUM,
+            *_LEVEL_KEYS,
+        ],
+        "check_image_json_match": [
+            PropKeyEnum.G1_FILE_01,
+            PropKeyEnum.G1_FILE_02,
+            PropKeyEnum.G1_FILE_03,
+            *_LEVEL_KEYS,
+        ],
+        "check_yxp_folder": [PropKeyEnum.G5_YXP_DIR, PropKeyEnum.G5_PRUNE, PropKeyEnum.G5_KEEP_ANI],
+        "check_multi_lang_folder": [PropKeyEnum.G1_IMG_DIR],
+        "check_image_files": list(_ASSET_LIST.keys()),
+        "check_lang_images": [PropKeyEnum.G1_IMG_DIR, PropKeyEnum.G1_PACK_LANG],
+    }
+
+    # checks that read a stage's sources, re-run when the stage is exported again
+    _STAGE_CHECKS = {
+        ExportStageEnum.FILES: [
+            "check_n_value",
+            "check_file_exist",
+            "check_level_file",
+            "check_level_count",
+            "check_level_solvable",
+            "check_image_json_match",
+            "check_image_files",
+        ],
+        ExportStageEnum.YXP: ["check_yxp_folder"],
+        ExportStageEnum.LANG: ["check_multi_lang_folder", "check_lang_images"],
+        ExportStageEnum.CONFIG: [],
+    }
+
+    _VALIDATOR = None
+    _LEVEL_TABLE = (None, None)
+
+    _errors: List[ExportError]
+    _manifest: ExportManifest
+    _executor: CopyExecutor
+    _pending: List[Tuple[str, str]]
+    _bundle: BundleWriter
+
+    def __init__(
+        self,
+        *args,
+        incremental: bool = True,
+        copy_mode: CopyModeEnum = CopyModeEnum.REFLINK,
+        max_workers: int = None,
+        html_template: str = None,
+        use_store: bool = False,
+        progress: Callable[[int, int, str], None] = None,
+        languages: List[str] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._errors = []
+        self._incremental = incremental
+        self._copy_mode = CopyModeEnum(copy_mode)
+        self._max_workers = max_workers
+        self._html_template = html_template
+        self._store = get_asset_store() if use_store else None
+        # titles of other languages are left out, the default one is always exported
+        self._languages = None if languages is None else set(languages)
+        self._manifest = None
+        self._executor = None
+        self._pending = []
+        self._bundle = None
+        self.copy_stats = {}
+
+        # progress is reported as source bytes handled out of the bytes the export reads
+        self._progress = progress
+        self._progress_lock = threading.Lock()
+        self._progress_done = 0
+        self._progress_total = 0
+        self._cancel_event = threading.Event()
+        self._written = []
+
+    @property
+    def errors(self) -> List[ExportError]:
+        return self._errors
+
+    def warn(self, code: ErrorCodeEnum, text: str, key: PropKeyEnum = None, fatal: bool = True):
+        self._errors.append(ExportError(code, text, key, fatal))
+
+    def info(self, text: str):
+        log.info(text)
+
+    def check_file_exist(self, props: Dict[PropKeyEnum, Any]):
+        ok = True
+        for key in self._ASSET_LIST.keys():
+            path = props.get(key)
+            if path is not None and path != "" and not os.path.exists(path):
+                self.warn(ErrorCodeEnum.E_FILE_DELETED, f"参数【{self._ERROR_MSG[key]} 】的文件已删除", key)
+                ok = False
+
+        for entry in self.get_level_table(props).configured():
+            if not os.path.exists(entry.path):
+                name = self._level_error_name(entry)
+                self.warn(ErrorCodeEnum.E_FILE_DELETED, f"参数【{name} 】的文件已删除", entry.key)
+                ok = False
+
+        return ok
+
+    def check_n_value(self, props: Dict[PropKeyEnum, Any]):
+        opt_type = props.get(PropKeyEnum.G3_OPT_TYP, LastLevelCondEnum.E00)
+        opt_n_value = props.get(PropKeyEnum.G3_OPT_NUM, 0)
+
+        if opt_type != LastLevelCondEnum.E00 and opt_n_value == 0:
+            key = PropKeyEnum.G3_OPT_NUM
+            self.warn(ErrorCodeEnum.E_N_VALUE, f"参数【{self._ERROR_MSG[key]} 】的值必须大于 0", key)
+            return False
+
+        return True
+
+    def check_level_solvable(self, props: Dict[PropKeyEnum, Any]):
+        # solving runs A* on every level, so it is opt-in, and the n value hint comes from the same results
+        if not props.get(PropKeyEnum.G3_SOLVE, False):
+            return True
+
+        from wsc.solver import (
+            solve_level_files,
+            suggest_n_value,
+        )
+
+        levels = [e for e in self.get_level_table(props).configured() if os.path.exists(e.path)]
+        with span("solve_levels", files=len(levels)):
+            results = solve_level_files([e.path for e in levels])
+
+        ok = True
+        for entry, result in zip(levels, results):
+            key, path = entry.key, entry.path
+            name = self._level_error_name(entry)
+            if "error" in result:
+                self.warn(
+                    ErrorCodeEnum.E_LEVEL_DATA,
+                    f"关卡【{name} 】无法识别，跳过可解性检查：{result['error']}",
+                    key,
+                    fatal=False,
+                )
+            elif result["solvable"] is False:
+                self.warn(ErrorCodeEnum.E_LEVEL_UNSOLVABLE, f"关卡【{name} 】无解", key)
+                ok = False
+            elif result["solvable"] is None:
+                self.warn(
+                    ErrorCodeEnum.E_LEVEL_UNSOLVABLE,
+                    f"关卡【{name} 】在限定时间内没有求出解",
+                    key,
+                    fatal=False,
+                )
+            else:
+                log.info("Solve level: %s, moves=%s, optimal=%s", path, result["moves"], result["optimal"])
+
+        opt_type = props.get(PropKeyEnum.G3_OPT_TYP, LastLevelCondEnum.E00)
+        opt_n_value = props.get(PropKeyEnum.G3_OPT_NUM, 0)
+        if opt_type != LastLevelCondEnum.E00 and opt_n_value > 0 and len(results) > 0:
+            moves = results[-1].get("moves")
+            if results[-1].get("optimal") and moves is not None and opt_n_value >= moves:
+                key = PropKeyEnum.G3_OPT_NUM
+                self.warn(
+                    ErrorCodeEnum.E_N_VALUE,
+                    f"参数【{self._ERROR_MSG[key]} 】为 {opt_n_value}，最后一关最少 {moves} 步即可通关，"
+                    f"建议设为 {suggest_n_value(moves)}",
+                    key,
+                    fatal=False,
+                )
+
+        return ok
+
+    def check_level_file(self, props: Dict[PropKeyEnum, Any]):
+        gap = self.get_level_table(props).first_gap
+        if gap is not None:
+            self.warn(
+                ErrorCodeEnum.E_LEVEL_GAP,
+                f"必须配置连续的关卡，不可中断（{gap.label} 之前有空缺）",
+                gap.key,
+            )
+            return False
+
+        return True
+
+    def check_level_count(self, props: Dict[PropKeyEnum, Any]):
+        count_level = self.get_level_count(props)
+        if count_level == 0:
+            self.warn(ErrorCodeEnum.E_LEVEL_EMPTY, f"必须配置至少 1 个关卡")
+            return False
+        return True
+
+    @staticmethod
+    def _is_valid_file(file_path: str):
+        if file_path is None or len(file_path) == 0:
+            return False
+        return True
+
+    def check_image_json_match(self, props: Dict[PropKeyEnum, Any]):
+        table = self.get_level_table(props)
+        ok = True
+        for i, k1 in enumerate([PropKeyEnum.G1_FILE_01, PropKeyEnum.G1_FILE_02, PropKeyEnum.G1_FILE_03]):
+            entry = table.get(i + 1)
+            if self._is_valid_file(props.get(k1)) and (entry is None or not entry.configured):
+                name = self._level_error_name(entry) if entry is not None else f"关卡{i + 1}"
+                self.warn(
+                    ErrorCodeEnum.E_IMAGE_JSON,
+                    f"图片【{self._ERROR_MSG.get(k1, k1)} 】没有匹配的关卡【{name}】",
+                    k1,
+                )
+                ok = False
+
+        return ok
+
+    @classmethod
+    def _list_yxp_files(cls, folder: str, suffix: YxpSuffixEnum):
+        files = []
+        for source_suffix in cls._YXP_SOURCE_SUFFIXES.get(suffix, [suffix]):
+            files.extend(cls._list_glob_files(folder, source_suffix))
+        return files
+
+    @staticmethod
+    def _list_glob_files(folder: str, suffix: str):
+        # the folder is listed once and shared by all suffixes, checks and the export
+        index = get_dir_index(folder)
+        if index is None:
+            return []
+        return index.files(suffix)
+
+    def check_yxp_folder(self, props: Dict[PropKeyEnum, Any]):
+        folder = props.get(PropKeyEnum.G5_YXP_DIR, "")
+        key = PropKeyEnum.G5_YXP_DIR
+
+        if len(folder) == 0:
+            return True
+
+        if not os.path.exists(folder):
+            self.warn(ErrorCodeEnum.E_YXP_DELETED, f"异形屏文件夹【{folder} 】已删除", key)
+            return False
+
+        ok = True
+        for suffix in self._ASSET_YXP_FILES.keys():
+            files = self._list_yxp_files(folder, suffix)
+            if len(files) != 1:
+                names = "/".join(self._YXP_SOURCE_SUFFIXES.get(suffix, [suffix]))
+                self.warn(
+                    ErrorCodeEnum.E_YXP_FILES,
+                    f"异形屏文件夹数据错误：包含 {len(files)} 个 {names} 文件",
+                    key,
+                )
+                ok = False
+
+        # the atlas is parsed once, the skeleton check reads its regions
+        atlas = None
+        atlas_files = self._list_yxp_files(folder, YxpSuffixEnum.ATLAS)
+        if len(atlas_files) == 1:
+            atlas = self._load_yxp_atlas(atlas_files[0])
+            if atlas is None or not self.check_yxp_atlas(atlas_files[0], atlas):
+                ok = False
+
+        skel_files = self._list_yxp_files(folder, YxpSuffixEnum.SKEL)
+        if (
+            ok
+            and len(skel_files) == 1
+            and not self.check_yxp_skeleton(skel_files[0], atlas_files[0], atlas, props)
+        ):
+            ok = False
+
+        csv_files = self._list_yxp_files(folder, YxpSuffixEnum.CSV)
+        if len(csv_files) == 1 and not self.check_yxp_levels(csv_files[0]):
+            ok = False
+
+        return ok
+
+    def check_yxp_levels(self, csv_file: str):
+        key = PropKeyEnum.G5_YXP_DIR
+        csv_name = os.path.basename(csv_file)
+        try:
+            problems = BottleLevels.load(csv_file).validate()
+        except (OSError, UnicodeDecodeError) as e:
+            self.warn(ErrorCodeEnum.E_BOTTLE, f"水位配置【{csv_name} 】无法读取：{e}", key)
+            return False
+
+        for problem in problems:
+            self.warn(ErrorCodeEnum.E_BOTTLE, f"水位配置【{csv_name} 】{problem}", key)
+        return len(problems) == 0
+
+    def _load_yxp_atlas(self, atlas_file: str) -> SpineAtlas:
+        try:
+            return SpineAtlas.load(atlas_file)
+        except (OSError, ValueError) as e:
+            self.warn(
+                ErrorCodeEnum.E_ATLAS, f"图集文件【{atlas_file} 】无法解析：{e}", PropKeyEnum.G5_YXP_DIR
+            )
+            return None
+
+    def check_yxp_atlas(self, atlas_file: str, atlas: SpineAtlas):
+        key = PropKeyEnum.G5_YXP_DIR
+        problems = atlas.validate()
+        if len(atlas.pages) != 1:
+            problems.insert(0, f"包含 {len(atlas.pages)} 个页面，异形瓶只支持 1 张纹理")
+
+        for problem in problems:
+            self.warn(ErrorCodeEnum.E_ATLAS, f"图集文件【{os.path.basename(atlas_file)} 】{problem}", key)
+
+        return len(problems) == 0
+
+    def check_yxp_skeleton(
+        self, skel_file: str, atlas_file: str, atlas: SpineAtlas, props: Dict[PropKeyEnum, Any]
+    ):
+        key = PropKeyEnum.G5_YXP_DIR
+        skel_name = os.path.basename(skel_file)
+        atlas_name = os.path.basename(atlas_file)
+        try:
+            skel = SpineSkeleton.load(skel_file)
+        except (OSError, ValueError) as e:
+            self.warn(ErrorCodeEnum.E_SKEL, f"骨骼文件【{skel_name} 】无法解析：{e}", key)
+            return False
+
+        regions = {r.name for r in atlas.regions()}
+        referenced = skel.region_names()
+        ok = True
+
+        missing = sorted(referenced - regions)
+        if len(missing) > 0:
+            self.warn(
+                ErrorCodeEnum.E_ATLAS,
+                f"图集文件【{atlas_name} 】缺少骨骼引用的 {len(missing)} 个区域【{','.join(missing)}】",
+                key,
+            )
+            ok = False
+
+        unused = sorted(regions - referenced)
+        if len(unused) > 0 and not props.get(PropKeyEnum.G5_PRUNE, False):
+            self.warn(
+                ErrorCodeEnum.E_ATLAS,
+                f"图集文件【{atlas_name} 】有 {len(unused)} 个区域未被骨骼引用【{','.join(unused)}】",
+                key,
+                fatal=False,
+            )
+
+        unknown = sorted(set(props.get(PropKeyEnum.G5_KEEP_ANI) or []) - set(skel.animations))
+        if len(unknown) > 0:
+            key = PropKeyEnum.G5_KEEP_ANI
+            self.warn(
+                ErrorCodeEnum.E_SKEL, f"骨骼文件【{skel_name} 】中没有动画【{','.join(unknown)}】", key
+            )
+            ok = False
+
+        return ok
+
+    def check_multi_lang_folder(self, props: Dict[PropKeyEnum, Any]):
+        folder = props.get(PropKeyEnum.G1_IMG_DIR, "")
+        key = PropKeyEnum.G1_IMG_DIR
+        if len(folder) == 0:
+            return True
+
+        if not os.path.exists(folder):
+            self.warn(ErrorCodeEnum.E_LANG_DELETED, f"多语言标题文件夹【{folder} 】已删除", key)
+            return False
+
+        png_files = sorted(self._list_glob_files(folder, "png"))
+        all_files = set([f"{v}.png" for _, v in _CONFIG_TEMPLATE["titleImageMultiLanguage"].items()])
+        ok = True
+        for f in png_files:
+            name = os.path.basename(f)
+            if name not in all_files:
+                self.warn(ErrorCodeEnum.E_LANG_EXTRA, f"请处理多余文件【{f} 】后再重试", key)
+                ok = False
+
+        my_files = set([os.path.basename(f) for f in png_files])
+        miss_files = []
+        for f in sorted(all_files):
+            if f not in my_files:
+                miss_files.append(f)
+
+        if len(miss_files) > 0:
+            self.warn(
+                ErrorCodeEnum.E_LANG_MISSING,
+                f"缺少 {len(miss_files)} 个语言标题文件【{','.join(miss_files)}】",
+                key,
+                fatal=False,
+            )
+
+        return ok
+
+    def _check_image(self, label: str, name: str, info: ImageInfo, key: PropKeyEnum) -> bool:
+        # the exported name fixes the format the game asks for, browsers still decode by content
+        expected = self._IMAGE_FORMATS.get(os.path.splitext(name)[1].lower())
+        if expected is not None and info.format != expected:
+            self.warn(
+                ErrorCodeEnum.E_IMAGE_FORMAT,
+                f"【{label} 】是 {info.format} 图片，导出为【{name} 】",
+                key,
+                fatal=False,
+            )
+        if info.color_type == ColorTypeEnum.CMYK:
+            self.warn(
+                ErrorCodeEnum.E_IMAGE_FORMAT,
+                f"【{label} 】是 CMYK 图片，部分设备无法显示",
+                key,
+                fatal=False,
+            )
+        if max(info.size) > self._IMAGE_MAX_SIDE:
+            self.warn(
+                ErrorCodeEnum.E_IMAGE_SIZE,
+                f"【{label} 】的尺寸 {info.width}x{info.height} 超过 {self._IMAGE_MAX_SIDE}",
+                key,
+            )
+            return False
+        return True
+
+    def check_image_files(self, props: Dict[PropKeyEnum, Any]):
+        keys = [key for key in self._ASSET_LIST if props.get(key) and os.path.exists(props[key])]
+        infos = probe_images([props[key] for key in keys])
+        ok = True
+        for key in keys:
+            label = self._ERROR_MSG[key]
+            info = infos[props[key]]
+            if not isinstance(info, ImageInfo):
+                self.warn(ErrorCodeEnum.E_IMAGE_FORMAT, f"参数【{label} 】的文件不是可识别的图片", key)
+                ok = False
+                continue
+            ok = self._check_image(label, self._ASSET_LIST[key], info, key) and ok
+
+        return ok
+
+    def check_lang_images(self, props: Dict[PropKeyEnum, Any]):
+        folder = props.get(PropKeyEnum.G1_IMG_DIR, "")
+        key = PropKeyEnum.G1_IMG_DIR
+        all_files = set([f"{v}.png" for _, v in _CONFIG_TEMPLATE["titleImageMultiLanguage"].items()])
+        png_files = sorted(
+            f for f in self._list_glob_files(folder, "png") if os.path.basename(f) in all_files
+        )
+        infos = probe_images(png_files)
+
+        ok = True
+        sizes = {}
+        for f in png_files:
+            info = infos[f]
+            if not isinstance(info, ImageInfo):
+                self.warn(ErrorCodeEnum.E_IMAGE_FORMAT, f"语言标题文件【{f} 】不是可识别的图片", key)
+                ok = False
+                continue
+            ok = self._check_image(f, os.path.basename(f), info, key) and ok
+            sizes.setdefault(info.size, []).append(os.path.basename(f))
+
+        # the size most titles share is taken as the intended one
+        if len(sizes) > 1:
+            common = max(sizes, key=lambda size: len(sizes[size]))
+            others = sorted(name for size, names in sizes.items() if size != common for name in names)
+            self.warn(
+                ErrorCodeEnum.E_LANG_SIZE,
+                f"语言标题尺寸不一致，应为 {common[0]}x{common[1]}【{','.join(others)}】",
+                key,
+            )
+            ok = False
+
+        if ok and props.get(PropKeyEnum.G1_PACK_LANG, False) and len(png_files) > 0:
+            from wsc.imaging import layout_title_atlas
+
+            try:
+                layout_title_atlas(png_files, max_size=self._IMAGE_MAX_SIDE)
+            except ValueError as e:
+                self.warn(
+                    ErrorCodeEnum.E_IMAGE_SIZE, f"语言标题无法合并为图集：{e}", PropKeyEnum.G1_PACK_LANG
+                )
+                ok = False
+
+        return ok
+
+    @staticmethod
+    def get_validator() -> ValidationEngine:
+        if DataCollector._VALIDATOR is None:
+            DataCollector._VALIDATOR = ValidationEngine(DataCollector, DataCollector._CHECK_KEYS)
+        return DataCollector._VALIDATOR
+
+    @traced("sanity_check")
+    def sanity_check(self, props: Dict[PropKeyEnum, Any], stages: Set[ExportStageEnum] = None):
+        # folders may have changed on disk since the last inline check
+        fresh = True
+        if stages is not None:
+            fresh = {name for stage in stages for name in self._STAGE_CHECKS[stage]}
+        diagnostics = self.get_validator().validate(props, fresh=fresh)
+        self._errors.extend(diagnostics)
+        return not any(e.fatal for e in diagnostics)
+
+    def select_target_dir(self):
+        self.warn(ErrorCodeEnum.E_TARGET_DIR, f"未选择导出的文件夹")
+        return None
+
+    def copy_file(self, source: str, target_dir: str, name: str):
+        if source is None or not os.path.exists(source):
+            return
+        self.check_cancelled()
+        src = os.path.abspath(source)
+        if self._bundle is not None:
+            self._bundle.add_file(name, src)
+            self._advance(src)
+            return
+
+        dst = os.path.abspath(os.path.join(target_dir, f"{name}"))
+        if src == dst:
+            log.debug("Skip copy same file: %s", src)
+            self._advance(src)
+            return
+
+        manifest = self._manifest
+        if manifest is not None and manifest.is_fresh(name, src):
+            log.debug("Skip unchanged file: %s => %s", src, dst)
+            manifest.keep(name)
+            self._advance(src)
+            return
+
+        log.info("Copy file: %s => %s", src, dst)
+        self._record_written(dst)
+        if self._executor is not None:
+            future = self._executor.submit(src, dst, need_hash=manifest is not None)
+            self._pending.append((name, src))
+            if self._progress is not None:
+                future.add_done_callback(lambda f: self._advance(src))
+            return
+
+        if self._store is not None:
+            self._store.materialize(self._store.put_file(src), dst, self._copy_mode)
+        else:
+            copy_file(src, dst, self._copy_mode, need_hash=manifest is not None)
+        if manifest is not None:
+            manifest.record(name, src)
+        self._advance(src)
+
+    def cancel(self):
+        # checked between files, a file being copied is finished first
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise ExportCancelled()
+
+    def _advance(self, *sources: str):
+        if self._progress is None:
+            return
+        size = sum(os.path.getsize(src) for src in sources if os.path.exists(src))
+        with self._progress_lock:
+            self._progress_done += size
+            done = self._progress_done
+        self._progress(done, self._progress_total, sources[-1])
+
+    def _start_progress(self, props: Dict[PropKeyEnum, Any], stages: Set[ExportStageEnum] = None):
+        self._written = []
+        self._progress_done = 0
+        if self._progress is None:
+            return
+        sources = self.get_export_sources(props, stages, self._languages)
+        self._progress_total = sum(os.path.getsize(src) for src in sources)
+        self._progress(0, self._progress_total, "")
+
+    def _record_written(self, path: str):
+        # only files this export creates are removed on cancel, an overwritten output stays in place
+        if not os.path.exists(path):
+            self._written.append(path)
+
+    def _discard_written(self):
+        # a cancelled export leaves no half written outputs, the next export copies them again
+        written, self._written = self._written, []
+        for path in written:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def get_export_sources(
+        cls, props: Dict[PropKeyEnum, Any], stages: Set[ExportStageEnum] = None, languages: Set[str] = None
+    ) -> List[str]:
+        stages = set(ExportStageEnum) if stages is None else set(stages)
+        sources = []
+        if ExportStageEnum.FILES in stages:
+            sources += [props.get(key) for key in cls._ASSET_LIST]
+            sources += [entry.path for entry in cls.get_level_table(props).configured()]
+
+        yxp_dir = props.get(PropKeyEnum.G5_YXP_DIR, "")
+        if ExportStageEnum.YXP in stages and yxp_dir and os.path.isdir(yxp_dir):
+            for key in cls._ASSET_YXP_FILES:
+                files = cls._list_yxp_files(yxp_dir, key)
+                sources += files[:1]
+
+        if ExportStageEnum.LANG in stages:
+            sources += list(dict.fromkeys(cls.get_title_files(props, languages).values()))
+
+        return [os.path.abspath(src) for src in sources if src and os.path.exists(src)]
+
+    @staticmethod
+    def get_title_names(languages: Set[str] = None) -> Dict[str, str]:
+        names = _CONFIG_TEMPLATE["titleImageMultiLanguage"]
+        return {
+            code: name
+            for code, name in names.items()
+            if languages is None or code == "default" or code in languages
+        }
+
+    @classmethod
+    def get_title_files(cls, props: Dict[PropKeyEnum, Any], languages: Set[str] = None) -> Dict[str, str]:
+        # language code -> title file, languages without a file are left out
+        png_files = cls._list_glob_files(props.get(PropKeyEnum.G1_IMG_DIR, ""), "png")
+        by_name = {os.path.basename(f): os.path.abspath(f) for f in png_files}
+        files = {}
+        for code, name in cls.get_title_names(languages).items():
+            if f"{name}.png" in by_name:
+                files[code] = by_name[f"{name}.png"]
+        return files
+
+    def get_title_atlas(self, props: Dict[PropKeyEnum, Any]) -> Dict[str, Any]:
+        from wsc.imaging import layout_title_atlas
+
+        files = self.get_title_files(props, self._languages)
+        if len(files) == 0:
+            return None
+        # the layout comes from the image headers, the same one the packed texture is drawn with
+        width, height, rects = layout_title_atlas(list(dict.fromkeys(files.values())))
+        regions = {}
+        for code, path in files.items():
+            x, y, w, h = rects[path]
+            regions[code] = {"x": x, "y": y, "w": w, "h": h}
+        return {"image": TITLE_ATLAS_NAME, "width": width, "height": height, "regions": regions}
+
+    @classmethod
+    def get_export_names(cls, props: Dict[PropKeyEnum, Any], languages: Set[str] = None) -> List[str]:
+        # names of the files a full export writes next to GameConfig.json
+        names = [
+            value for key, value in cls._ASSET_LIST.items() if props.get(key) and os.path.exists(props[key])
+        ]
+        names += [
+            entry.asset_name
+            for entry in cls.get_level_table(props).configured()
+            if os.path.exists(entry.path)
+        ]
+
+        yxp_dir = props.get(PropKeyEnum.G5_YXP_DIR, "")
+        if yxp_dir and os.path.isdir(yxp_dir):
+            names += [
+                value for key, value in cls._ASSET_YXP_FILES.items() if cls._list_yxp_files(yxp_dir, key)
+            ]
+
+        title_files = cls.get_title_files(props, languages)
+        if props.get(PropKeyEnum.G1_PACK_LANG, False):
+            names += [f"{TITLE_ATLAS_NAME}.png"] if title_files else []
+        else:
+            names += list(dict.fromkeys(os.path.basename(f) for f in title_files.values()))
+        return names
+
+    def get_asset_hashes(self, props: Dict[PropKeyEnum, Any], target_dir: str) -> Dict[str, str]:
+        # the exported content is hashed, so a changed quality or repack mode changes the fingerprint too
+        if self._bundle is not None:
+            sources = self._bundle.sources()
+        else:
+            sources = {}
+            for name in self.get_export_names(props, self._languages):
+                path = os.path.join(target_dir, name)
+                if os.path.exists(path):
+                    sources[name] = path
+        return calc_fingerprints(sources, self._max_workers)
+
+    def get_path_value(self, props: Dict[PropKeyEnum, Any], key: PropKeyEnum) -> str:
+        if props.get(key) is None or not os.path.exists(props.get(key)):
+            return ""
+        return self._ASSET_INIT[key]
+
+    @staticmethod
+    def get_level_table(props: Dict[PropKeyEnum, Any]) -> LevelTable:
+        levels = props.get(PropKeyEnum.G2_LEVELS)
+        if levels is not None:
+            slots = tuple((PropKeyEnum.G2_LEVELS, path) for path in levels)
+        else:
+            slots = tuple((key, props.get(key)) for key in _LEGACY_LEVEL_KEYS)
+
+        # the template always lists its slots, missing levels are exported empty
+        template_size = len(_CONFIG_TEMPLATE["LevelData"])
+        slots += tuple((PropKeyEnum.G2_LEVELS, None) for _ in range(template_size - len(slots)))
+
+        # every check asks for the table, build it once per distinct level list
+        cached_slots, table = DataCollector._LEVEL_TABLE
+        if cached_slots != slots:
+            table = LevelTable(slots)
+            DataCollector._LEVEL_TABLE = (slots, table)
+        return table
+
+    @classmethod
+    def get_level_count(cls, props: Dict[PropKeyEnum, Any]):
+        return cls.get_level_table(props).count
+
+    @staticmethod
+    def _level_error_name(entry: LevelEntry) -> str:
+        return f"2. 关卡文件/{entry.label}"
+
+    @staticmethod
+    def _prune_atlas_regions(atlas: SpineAtlas, keep_regions: List[str]):
+        keep = set(keep_regions)
+        count = atlas.drop_regions([r.name for r in atlas.regions() if r.name not in keep])
+        log.info("Prune atlas regions: %d", count)
+
+    @classmethod
+    def _rewrite_atlas(cls, src: str, webp_name: str, keep_regions: List[str] = None) -> SpineAtlas:
+        atlas = SpineAtlas.load(src)
+        atlas.pages[0].rename(webp_name)
+        if keep_regions is not None:
+            cls._prune_atlas_regions(atlas, keep_regions)
+        return atlas
+
+    @classmethod
+    def _replace_atlas_webp_file(cls, src: str, dst: str, webp_name: str, keep_regions: List[str] = None):
+        if src is None or not os.path.exists(src):
+            return ""
+
+        cls._rewrite_atlas(src, webp_name, keep_regions).save(dst)
+
+    @staticmethod
+    def calc_file_md5_hash(target: str):
+        return calc_file_digest(target, "md5")
+
+    @classmethod
+    def calc_my_md5_checksum(cls, target: str, rng: random.Random = None):
+        if target is None or not os.path.exists(target):
+            return ""
+
+        A = cls.calc_file_md5_hash(target)
+        n = len(A)
+        rng = rng or random
+
+        B = "".join([f"{A[2 * i + 1]}{A[2 * i]}" for i in range(0, n // 2)])
+
+        C = "".join([f"{B[2 * i : 2 * i + 2]}{rng.choice(cls._CHAR_ALPHABETA)}" for i in range(0, n // 2)])
+
+        return C
+
+    @traced("store_config")
+    def store_config(self, props: Dict[PropKeyEnum, Any], target_dir: str):
+        config_file = os.path.join(target_dir, "GameConfig.json")
+        exp_config = copy.deepcopy(_CONFIG_TEMPLATE)
+
+        # exp_config["LevelData"][0]["titleImage"] = self.get_path_value(props, PropKeyEnum.G1_FILE_01)
+        # exp_config["LevelData"][1]["titleImage"] = self.get_path_value(props, PropKeyEnum.G1_FILE_02)
+        # exp_config["LevelData"][2]["titleImage"] = self.get_path_value(props, PropKeyEnum.G1_FILE_03)
+        table = self.get_level_table(props)
+        exp_config["LevelLength"] = table.count
+        exp_config["LevelData"] = [
+            {"id": e.id, "levle": e.name if e.configured and os.path.exists(e.path) else ""} for e in table
+        ]
+
+        exp_config["ResultJumpType"] = f"{props.get(PropKeyEnum.G3_OPT_TYP, LastLevelCondEnum.E00)}"
+        exp_config["ResultJumpNumber"] = props.get(PropKeyEnum.G3_OPT_NUM, 0)
+        exp_config["ResultJumpImageURL"] = self.get_path_value(props, PropKeyEnum.G5_FILE_01)
+
+        exp_config["DownButtomInfo"]["imageUrl"] = self.get_path_value(props, PropKeyEnum.G4_FILE_01)
+        exp_config["DownButtomInfo"]["scale"] = props.get(
+            PropKeyEnum.G4_INIT_SC, _CONFIG_TEMPLATE["DownButtomInfo"]["scale"]
+        )
+        exp_config["DownButtomInfo"]["aniTime"] = props.get(
+            PropKeyEnum.G4_ANI_TIM, _CONFIG_TEMPLATE["DownButtomInfo"]["aniTime"]
+        )
+        exp_config["DownButtomInfo"]["delayTime"] = props.get(
+            PropKeyEnum.G4_ANI_DLY, _CONFIG_TEMPLATE["DownButtomInfo"]["delayTime"]
+        )
+        exp_config["DownButtomInfo"]["aniScale"] = [
+            props.get(PropKeyEnum.G4_ANI_SC0, _CONFIG_TEMPLATE["DownButtomInfo"]["aniScale"][0]),
+            props.get(PropKeyEnum.G4_ANI_SC9, _CONFIG_TEMPLATE["DownButtomInfo"]["aniScale"][1]),
+        ]
+        exp_config["IsOpenTutorial"] = props.get(PropKeyEnum.G5_IS_TUTR, True)
+
+        yxp_dir = props.get(PropKeyEnum.G5_YXP_DIR, "")
+        if yxp_dir and os.path.isdir(yxp_dir) and self._list_yxp_files(yxp_dir, YxpSuffixEnum.CSV):
+            table_name = self._ASSET_YXP_FILES[YxpSuffixEnum.CSV]
+            exp_config["specialBottleTable"] = os.path.splitext(table_name)[0]
+
+        exp_config["titleImageMultiLanguage"] = self.get_title_names(self._languages)
+        if props.get(PropKeyEnum.G1_PACK_LANG, False):
+            atlas = self.get_title_atlas(props)
+            if atlas is not None:
+                exp_config["titleImageAtlas"] = atlas
+
+        if props.get(PropKeyEnum.G5_ASSET_HASH, False):
+            exp_config["assetHashes"] = self.get_asset_hashes(props, target_dir)
+
+        button_file = props.get(PropKeyEnum.G4_FILE_01, "")
+        rng = None
+        # bundles must be byte reproducible, so the filler characters follow the file hash
+        stable = self._bundle is not None or props.get(PropKeyEnum.G5_STABLE_MD5, False)
+        if stable and button_file and os.path.exists(button_file):
+            rng = random.Random(self.calc_file_md5_hash(button_file))
+        exp_config["md5"] = self.calc_my_md5_checksum(button_file, rng)
+
+        if self._bundle is not None:
+            self._bundle.add_bytes("GameConfig.json", json.dumps(exp_config, indent=4, ensure_ascii=False))
+            return
+
+        self.check_cancelled()
+        self._record_written(config_file)
+        with open(config_file, "w", encoding="utf-8") as f:
+            json.dump(exp_config, f, indent=4, ensure_ascii=False)
+
+    @traced("store_yxp_files")
+    def store_yxp_files(self, props: Dict[PropKeyEnum, Any], target_dir: str):
+        src_dir = props.get(PropKeyEnum.G5_YXP_DIR, "")
+        if not os.path.exists(src_dir):
+            return
+
+        sources = {key: self._list_yxp_files(src_dir, key)[0] for key in self._ASSET_YXP_FILES}
+        repack = props.get(PropKeyEnum.G5_REPACK, RepackModeEnum.NONE)
+        quality = props.get(PropKeyEnum.G5_WEBP_QA, 0)
+        keep_animations = props.get(PropKeyEnum.G5_KEEP_ANI) or []
+
+        keep_regions = None
+        if props.get(PropKeyEnum.G5_PRUNE, False):
+            # regions only the dropped animations use go with them
+            skel = SpineSkeleton.load(sources[YxpSuffixEnum.SKEL])
+            keep_regions = sorted(skel.region_names(keep_animations or None))
+
+        if repack != RepackModeEnum.NONE:
+            self.store_repacked_files(
+                atlas_source=sources[YxpSuffixEnum.ATLAS],
+                texture_source=sources[YxpSuffixEnum.WEBP],
+                target_dir=target_dir,
+                repack=repack,
+                quality=quality,
+                keep_regions=keep_regions,
+            )
+
+        for key, value in self._ASSET_YXP_FILES.items():
+            files = [sources[key]]
+            if repack != RepackModeEnum.NONE and key in (YxpSuffixEnum.ATLAS, YxpSuffixEnum.WEBP):
+                continue
+
+            if key == YxpSuffixEnum.ATLAS:
+                self.store_atlas_file(
+                    source=files[0], target_dir=target_dir, name=value, keep_regions=keep_regions
+                )
+                continue
+
+            if key == YxpSuffixEnum.SKEL and len(keep_animations) > 0:
+                self.store_skel_file(
+                    source=files[0], target_dir=target_dir, name=value, animations=keep_animations
+                )
+                continue
+
+            if key == YxpSuffixEnum.WEBP and not files[0].lower().endswith(f".{YxpSuffixEnum.WEBP}"):
+                self.store_webp_file(source=files[0], target_dir=target_dir, name=value, quality=quality)
+                continue
+
+            if key == YxpSuffixEnum.CSV:
+                self.store_bottle_table(source=files[0], target_dir=target_dir, name=value)
+                continue
+
+            self.copy_file(
+                source=files[0],
+                target_dir=target_dir,
+                name=value,
+            )
+
+    def store_atlas_file(self, source: str, target_dir: str, name: str, keep_regions: List[str] = None):
+        src = os.path.abspath(source)
+        dst = os.path.abspath(os.path.join(target_dir, name))
+        webp_name = self._ASSET_YXP_FILES[YxpSuffixEnum.WEBP]
+        params = {"webp": webp_name, "regions": keep_regions}
+
+        self.check_cancelled()
+        if self._bundle is not None:
+            self._bundle.add_bytes(name, self._rewrite_atlas(src, webp_name, keep_regions).dumps())
+            self._advance(src)
+            return
+
+        manifest = self._manifest
+        if manifest is not None and manifest.is_fresh(name, src, params):
+            log.debug("Skip unchanged file: %s => %s", src, dst)
+            manifest.keep(name)
+            self._advance(src)
+            return
+
+        log.info("Rewrite atlas: %s => %s", src, dst)
+        self._record_written(dst)
+        with span("rewrite_atlas", files=1, bytes=os.path.getsize(src)):
+            self._replace_atlas_webp_file(src, dst, webp_name, keep_regions)
+        if manifest is not None:
+            manifest.record(name, src, params)
+        self._advance(src)
+
+    @traced("store_webp_file")
+    def store_webp_file(self, source: str, target_dir: str, name: str, quality: int = 0):
+        from wsc.imaging import (
+            transcode_webp_files,
+            webp_settings,
+        )
+
+        src = os.path.abspath(source)
+        dst = os.path.abspath(os.path.join(target_dir, name))
+        settings = webp_settings(quality)
+
+        self.check_cancelled()
+        if self._bundle is not None:
+            self._bundle.add_file(name, transcode_webp_files([(src, None, settings)])[0])
+            self._advance(src)
+            return
+
+        manifest = self._manifest
+        if manifest is not None and manifest.is_fresh(name, src, settings):
+            log.debug("Skip unchanged file: %s => %s", src, dst)
+            manifest.keep(name)
+            self._advance(src)
+            return
+
+        self._record_written(dst)
+        transcode_webp_files([(src, dst, settings)], self._copy_mode)
+        if manifest is not None:
+            manifest.record(name, src, settings)
+        self._advance(src)
+
+    @traced("store_repacked_files")
+    def store_repacked_files(
+        self,
+        atlas_source: str,
+        texture_source: str,
+        target_dir: str,
+        repack: RepackModeEnum,
+        quality: int = 0,
+        keep_regions: List[str] = None,
+    ):
+        from wsc.imaging import (
+            repack_texture,
+            transcode_webp_files,
+            webp_settings,
+        )
+
+        atlas_name = self._ASSET_YXP_FILES[YxpSuffixEnum.ATLAS]
+        webp_name = self._ASSET_YXP_FILES[YxpSuffixEnum.WEBP]
+        atlas_src = os.path.abspath(atlas_source)
+        texture_src = os.path.abspath(texture_source)
+        settings = webp_settings(quality)
+
+        # the texture layout depends on the atlas, so its entry is keyed by both sources
+        atlas_params = {"webp": webp_name, "repack": f"{repack}", "regions": keep_regions}
+        webp_params = {
+            "webp": settings,
+            "repack": f"{repack}",
+            "regions": keep_regions,
+            "atlas": calc_file_digest(atlas_src),
+        }
+
+        manifest = self._manifest
+        if (
+            manifest is not None
+            and manifest.is_fresh(atlas_name, atlas_src, atlas_params)
+            and manifest.is_fresh(webp_name, texture_src, webp_params)
+        ):
+            log.debug("Skip unchanged files: %s, %s", atlas_src, texture_src)
+            manifest.keep(atlas_name)
+            manifest.keep(webp_name)
+            self._advance(atlas_src, texture_src)
+            return
+
+        self.check_cancelled()
+        atlas = SpineAtlas.load(atlas_src)
+        if keep_regions is not None:
+            # unreferenced regions are left out of the new page
+            self._prune_atlas_regions(atlas, keep_regions)
+        packed_file = repack_texture(atlas, texture_src, power_of_two=repack == RepackModeEnum.POT)
+        atlas.pages[0].rename(webp_name)
+        if self._bundle is not None:
+            self._bundle.add_bytes(atlas_name, atlas.dumps())
+            self._bundle.add_file(webp_name, transcode_webp_files([(packed_file, None, settings)])[0])
+            self._advance(atlas_src, texture_src)
+            return
+
+        self.check_cancelled()
+        atlas_dst = os.path.join(target_dir, atlas_name)
+        webp_dst = os.path.join(target_dir, webp_name)
+        self._record_written(atlas_dst)
+        self._record_written(webp_dst)
+        atlas.save(atlas_dst)
+        transcode_webp_files([(packed_file, webp_dst, settings)], self._copy_mode)
+
+        if manifest is not None:
+            manifest.record(atlas_name, atlas_src, atlas_params)
+            manifest.record(webp_name, texture_src, webp_params)
+        self._advance(atlas_src, texture_src)
+
+    @traced("store_skel_file")
+    def store_skel_file(self, source: str, target_dir: str, name: str, animations: List[str]):
+        src = os.path.abspath(source)
+        dst = os.path.abspath(os.path.join(target_dir, name))
+        params = {"animations": sorted(animations)}
+
+        self.check_cancelled()
+        manifest = self._manifest
+        if manifest is not None and manifest.is_fresh(name, src, params):
+            log.debug("Skip unchanged file: %s => %s", src, dst)
+            manifest.keep(name)
+            self._advance(src)
+            return
+
+        skel = SpineSkeleton.load(src)
+        keep = set(animations)
+        count = skel.drop_animations([a for a in skel.animations if a not in keep])
+        log.info("Prune skeleton animations: %s => %s, %d dropped", src, dst, count)
+        if self._bundle is not None:
+            self._bundle.add_bytes(name, skel.dumps())
+            self._advance(src)
+            return
+        self._record_written(dst)
+        skel.save(dst)
+        if manifest is not None:
+            manifest.record(name, src, params)
+        self._advance(src)
+
+    @traced("store_bottle_table")
+    def store_bottle_table(self, source: str, target_dir: str, name: str):
+        src = os.path.abspath(source)
+        dst = os.path.abspath(os.path.join(target_dir, name))
+        params = {"version": TABLE_VERSION, "steps": TABLE_STEPS}
+
+        self.check_cancelled()
+        if self._bundle is not None:
+            self._bundle.add_bytes(name, BottleLevels.load(src).dumps_table())
+            self._advance(src)
+            return
+
+        manifest = self._manifest
+        if manifest is not None and manifest.is_fresh(name, src, params):
+            log.debug("Skip unchanged file: %s => %s", src, dst)
+            manifest.keep(name)
+            self._advance(src)
+            return
+
+        levels = BottleLevels.load(src)
+        log.info("Compile water levels: %s => %s, %d states", src, dst, len(levels.states))
+        self._record_written(dst)
+        levels.save_table(dst)
+        if manifest is not None:
+            manifest.record(name, src, params)
+        self._advance(src)
+
+    @traced("store_multi_lang")
+    def store_multi_lang(self, props: Dict[PropKeyEnum, Any], target_dir: str):
+        # english is the default title as well, a shared file is exported once
+        png_files = list(dict.fromkeys(self.get_title_files(props, self._languages).values()))
+        if props.get(PropKeyEnum.G1_PACK_LANG, False):
+            if len(png_files) > 0:
+                self.store_title_atlas(png_files, target_dir)
+            return
+
+        for png_file in png_files:
+            self.copy_file(source=png_file, target_dir=target_dir, name=os.path.basename(png_file))
+
+    def store_title_atlas(self, png_files: List[str], target_dir: str):
+        from wsc.imaging import render_title_atlas
+
+        name = f"{TITLE_ATLAS_NAME}.png"
+        self.check_cancelled()
+        # drawn once per set of titles, an unchanged set is read back from the asset store
+        atlas_file = render_title_atlas(png_files)
+        if self._bundle is not None:
+            self._bundle.add_file(name, atlas_file)
+            self._advance(*png_files)
+            return
+
+        dst = os.path.abspath(os.path.join(target_dir, name))
+        manifest = self._manifest
+        if manifest is not None and manifest.is_fresh(name, atlas_file):
+            log.debug("Skip unchanged file: %s => %s", atlas_file, dst)
+            manifest.keep(name)
+            self._advance(*png_files)
+            return
+
+        log.info("Copy title atlas: %s => %s", atlas_file, dst)
+        self.check_cancelled()
+        self._record_written(dst)
+        copy_file(atlas_file, dst, self._copy_mode, need_hash=manifest is not None)
+        if manifest is not None:
+            manifest.record(name, atlas_file)
+        self._advance(*png_files)
+
+    @traced("wait_copies")
+    def _wait_copies(self):
+        executor, self._executor = self._executor, None
+        pending, self._pending = self._pending, []
+        if self.cancelled:
+            executor.cancel()
+        try:
+            executor.shutdown()
+        finally:
+            self.copy_stats = executor.stats
+
+        if self._manifest is not None and not self.cancelled:
+            for name, src in pending:
+                self._manifest.record(name, src)
+
+    @traced("store_assets")
+    def store_assets(
+        self, props: Dict[PropKeyEnum, Any], target_dir: str, stages: Set[ExportStageEnum] = None
+    ):
+        if bundle_format(target_dir) is not None:
+            return self.store_bundle(props, target_dir)
+
+        all_stages = stages is None or set(stages) >= set(ExportStageEnum)
+        stages = set(ExportStageEnum) if stages is None else set(stages)
+        self._start_progress(props, stages)
+        self._manifest = ExportManifest(target_dir) if self._incremental else None
+        self._executor = CopyExecutor(self._copy_mode, self._max_workers, self._store)
+        self._pending = []
+
+        try:
+            if ExportStageEnum.FILES in stages:
+                for key, value in self._ASSET_LIST.items():
+                    self.copy_file(
+                        source=props.get(key),
+                        target_dir=target_dir,
+                        name=value,
+                    )
+
+                for entry in self.get_level_table(props).configured():
+                    self.copy_file(source=entry.path, target_dir=target_dir, name=entry.asset_name)
+
+            if ExportStageEnum.YXP in stages:
+                self.store_yxp_files(props, target_dir)
+            if ExportStageEnum.LANG in stages:
+                self.store_multi_lang(props, target_dir)
+        finally:
+            self._wait_copies()
+
+        if ExportStageEnum.CONFIG in stages:
+            self.store_config(props, target_dir)
+
+        if self._manifest is not None:
+            # outputs of stages that did not run are untouched, only a full export can tell stale files
+            if all_stages:
+                self._manifest.prune()
+            self._manifest.save()
+
+        get_hash_cache().save()
+        if self._store is not None:
+            self._store.save()
+
+    @traced("store_bundle")
+    def store_bundle(self, props: Dict[PropKeyEnum, Any], bundle_file: str):
+        # every stage adds references to the bundle, the sources are read once when it is written
+        self._manifest = None
+        self._executor = None
+        self._bundle = open_bundle(bundle_file, self._html_template)
+        target_dir = os.path.dirname(os.path.abspath(bundle_file))
+        self._start_progress(props)
+        try:
+            for key, value in self._ASSET_LIST.items():
+                self.copy_file(source=props.get(key), target_dir=target_dir, name=value)
+            for entry in self.get_level_table(props).configured():
+                self.copy_file(source=entry.path, target_dir=target_dir, name=entry.asset_name)
+            self.store_yxp_files(props, target_dir)
+            self.store_multi_lang(props, target_dir)
+            self.store_config(props, target_dir)
+            self.check_cancelled()
+            self._bundle.close()
+        finally:
+            self._bundle = None
+
+        get_hash_cache().save()
+        if self._store is not None:
+            self._store.save()
+
+    @staticmethod
+    def get_watch_paths(props: Dict[PropKeyEnum, Any]) -> Dict[str, ExportStageEnum]:
+        paths = {}
+        for key in _PATH_KEYS:
+            path = props.get(key)
+            if path:
+                paths[os.path.abspath(path)] = ExportStageEnum.FILES
+        for entry in DataCollector.get_level_table(props).configured():
+            paths[os.path.abspath(entry.path)] = ExportStageEnum.FILES
+        for key, stage in [
+            (PropKeyEnum.G5_YXP_DIR, ExportStageEnum.YXP),
+            (PropKeyEnum.G1_IMG_DIR, ExportStageEnum.LANG),
+        ]:
+            if props.get(key):
+                paths[os.path.abspath(props[key])] = stage
+        return paths
+
+    @classmethod
+    def get_changed_stages(cls, props: Dict[PropKeyEnum, Any], changed: Set[str]) -> Set[ExportStageEnum]:
+        watched = cls.get_watch_paths(props)
+        stages = set()
+        for path in changed:
+            path = os.path.abspath(path)
+            stage = watched.get(path) or watched.get(os.path.dirname(path))
+            if stage is None:
+                # not a source we know of, e.g. the project file itself
+                return set(ExportStageEnum)
+            stages.add(stage)
+
+        # the config lists the levels and the download button checksum
+        if ExportStageEnum.FILES in stages:
+            stages.add(ExportStageEnum.CONFIG)
+        # and the title regions when the titles are packed
+        if ExportStageEnum.LANG in stages and props.get(PropKeyEnum.G1_PACK_LANG, False):
+            stages.add(ExportStageEnum.CONFIG)
+        # and the fingerprint of every exported file
+        if props.get(PropKeyEnum.G5_ASSET_HASH, False):
+            stages.add(ExportStageEnum.CONFIG)
+        return stages
+
+    @classmethod
+    def get_prop_stages(cls, props: Dict[PropKeyEnum, Any], key: PropKeyEnum) -> Set[ExportStageEnum]:
+        # the stages an edit of one property has to redo, an empty set means all of them
+        if key in CONFIG_ONLY_KEYS:
+            return {ExportStageEnum.CONFIG}
+        value = props.get(key)
+        paths = [p for p in (value if isinstance(value, list) else [value]) if isinstance(p, str) and p]
+        watched = cls.get_watch_paths(props)
+        if len(paths) == 0 or any(os.path.abspath(p) not in watched for p in paths):
+            return set()
+        return cls.get_changed_stages(props, set(paths))
+
+    @traced("export")
+    def export(
+        self, props: Dict[PropKeyEnum, Any], target_dir: str = None, stages: Set[ExportStageEnum] = None
+    ):
+        self._errors = []
+        if not self.sanity_check(props, stages):
+            return None
+
+        if target_dir is None:
+            target_dir = self.select_target_dir()
+        if target_dir is None:
+            return None
+        # a bundle file is written next to its siblings, a folder must already exist
+        if bundle_format(target_dir) is not None:
+            if not os.path.isdir(os.path.dirname(os.path.abspath(target_dir))):
+                return None
+        elif not os.path.exists(target_dir):
+            return None
+
+        try:
+            self.store_assets(props, target_dir, stages)
+        except OSError as e:
+            self.warn(ErrorCodeEnum.E_IO, f"导出失败：{e}")
+            return None
+        except ImportError as e:
+            self.warn(ErrorCodeEnum.E_DEPENDENCY, f"导出失败，缺少依赖：{e.name}")
+            return None
+        except BundleError as e:
+            self.warn(ErrorCodeEnum.E_TARGET_DIR, f"导出失败：{e}")
+            return None
+        except ExportCancelled:
+            self._discard_written()
+            self.warn(ErrorCodeEnum.E_CANCELLED, "导出已取消")
+            return None
+
+        self.info(f"成功导出到：{target_dir}")
+        return target_dir
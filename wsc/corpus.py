@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+import glob
+import hashlib
+import json
+import operator
+import os
+import re
+from typing import (
+    Any,
+    Dict,
+    List,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+from wsc.levels import WaterSortLevel
+from wsc.workers import run_jobs
+
+Bottles = Tuple[Tuple[int, ...], ...]
+
+_CHUNK_SIZE = 64
+_SEARCH_LIMIT = 2000
+
+_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "!=": operator.ne,
+    "==": operator.eq,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+_CONDITION = re.compile(r"^\s*(\w+)\s*(>=|<=|!=|==|>|<)\s*(.+?)\s*$")
+
+
+def _digest(value: Any) -> str:
+    return hashlib.blake2b(repr(value).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _refine(bottles: Bottles, labels: Dict[int, Any]) -> Dict[int, Any]:
+    # colors are told apart by where they sit, in bottles that are told apart by their colors
+    while True:
+        signatures = {b: tuple(labels[c] for c in b) for b in set(bottles)}
+        occurrences = {c: [] for c in labels}
+        for bottle in bottles:
+            for pos, c in enumerate(bottle):
+                occurrences[c].append((pos, signatures[bottle]))
+        ranks = {sig: i for i, sig in enumerate(sorted({tuple(sorted(o)) for o in occurrences.values()}))}
+        refined = {c: (labels[c], ranks[tuple(sorted(o))]) for c, o in occurrences.items()}
+        # relabel with small integers so signatures do not grow without bound
+        order = {label: i for i, label in enumerate(sorted(set(refined.values())))}
+        refined = {c: order[label] for c, label in refined.items()}
+        if len(set(refined.values())) == len(set(labels.values())):
+            return refined
+        labels = refined
+
+
+def _canonical_form(bottles: Bottles, labels: Dict[int, Any], budget: List[int]):
+    labels = _refine(bottles, labels)
+    classes = {}
+    for c, label in labels.items():
+        classes.setdefault(label, []).append(c)
+    tied = [cs for _, cs in sorted(classes.items()) if len(cs) > 1]
+    if not tied:
+        return tuple(sorted(tuple(labels[c] for c in b) for b in bottles))
+
+    # individualize each color of the first tied class and keep the smallest form
+    best = None
+    for c in tied[0]:
+        budget[0] -= 1
+        if budget[0] < 0:
+            return None
+        individual = {k: (v, 0) for k, v in labels.items()}
+        individual[c] = (labels[c], -1)
+        form = _canonical_form(bottles, individual, budget)
+        if form is None:
+            return None
+        if best is None or form < best:
+            best = form
+    return best
+
+
+def canonical_hash(bottles: Bottles) -> str:
+    # the same level with bottles reordered or colors swapped gets the same hash
+    colors = {c for b in bottles for c in b}
+    labels = {c: 0 for c in colors}
+    form = _canonical_form(bottles, labels, [_SEARCH_LIMIT])
+    if form is None:
+        # highly symmetric levels fall back to the refinement invariant
+        refined = _refine(bottles, labels)
+        return "w:" + _digest(sorted(tuple(refined[c] for c in b) for b in bottles))
+    return "c:" + _digest(form)
+
+
+def _analyze_files(paths: Sequence[str]) -> List[Dict[str, Any]]:
+    records = []
+    for path in paths:
+        record = {"path": path}
+        try:
+            level = WaterSortLevel.load(path)
+        except (OSError, ValueError) as e:
+            record["error"] = f"{e}"
+            records.append(record)
+            continue
+
+        raw = tuple(tuple(f"{level.colors[c - 1]}" for c in b) for b in level.bottles)
+        record.update(
+            capacity=level.capacity,
+            layout=[list(b) for b in level.bottles],
+            hash=_digest((level.capacity, raw)),
+            canonical=f"{level.capacity}:" + canonical_hash(level.bottles),
+        )
+        records.append(record)
+    return records
+
+
+def encode_levels(levels: Sequence[Sequence[Sequence[int]]]) -> np.ndarray:
+    # levels x bottles x layers, 0 is an empty cell and colors start at 1
+    count = len(levels)
+    max_bottles = max((len(b) for b in levels), default=0)
+    max_layers = max((len(bottle) for b in levels for bottle in b), default=0)
+    array = np.zeros((count, max_bottles, max(1, max_layers)), dtype=np.int16)
+    for i, bottles in enumerate(levels):
+        for j, bottle in enumerate(bottles):
+            array[i, j, : len(bottle)] = bottle
+    return array
+
+
+def level_metrics(
+    array: np.ndarray, bottle_counts: np.ndarray, capacities: np.ndarray
+) -> Dict[str, np.ndarray]:
+    count, max_bottles, _ = array.shape
+    max_color = int(array.max(initial=0))
+    filled = array != 0
+
+    # color histogram per bottle from a single bincount
+    index = (np.arange(count)[:, None, None] * max_bottles + np.arange(max_bottles)[None, :, None]) * (
+        max_color + 1
+    ) + array
+    hist = np.bincount(index.ravel(), minlength=count * max_bottles * (max_color + 1))
+    hist = hist.reshape(count, max_bottles, max_color + 1)[:, :, 1:].astype(np.float64)
+
+    units_per_bottle = hist.sum(axis=2)
+    non_empty = units_per_bottle > 0
+    p = np.divide(hist, units_per_bottle[:, :, None], out=np.zeros_like(hist), where=non_empty[:, :, None])
+    bottle_entropy = -np.sum(np.where(p > 0, p * np.log2(np.where(p > 0, p, 1)), 0), axis=2)
+
+    color_counts = hist.sum(axis=1)
+    present = color_counts > 0
+    colors = present.sum(axis=1)
+    units = color_counts.sum(axis=1)
+    min_count = np.where(present, color_counts, np.inf).min(axis=1, initial=np.inf)
+    max_count = color_counts.max(axis=1, initial=0)
+
+    boundaries = ((array[:, :, 1:] != array[:, :, :-1]) & filled[:, :, 1:]).sum(axis=(1, 2))
+    non_empty_count = non_empty.sum(axis=1)
+    runs = boundaries + non_empty_count
+    bottoms = np.zeros((count, max_color + 1), dtype=bool)
+    bottoms[np.arange(count)[:, None], array[:, :, 0]] = True
+    bottom_colors = bottoms[:, 1:].sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "bottles": bottle_counts,
+            "empty_bottles": bottle_counts - non_empty_count,
+            "capacity": capacities,
+            "colors": colors,
+            "units": units.astype(np.int64),
+            "fill_ratio": np.where(bottle_counts > 0, units / (bottle_counts * capacities), 0),
+            "color_balance": np.where(max_count > 0, np.nan_to_num(min_count / max_count), 0),
+            "entropy": np.where(non_empty_count > 0, bottle_entropy.sum(axis=1) / non_empty_count, 0),
+            "max_entropy": bottle_entropy.max(axis=1, initial=0),
+            "mixedness": np.where(units > non_empty_count, boundaries / (units - non_empty_count), 0),
+            "lower_bound": runs - bottom_colors,
+        }
+
+
+class LevelIndex:
+    VERSION = 1
+
+    records: List[Dict[str, Any]]
+
+    def __init__(self, records: List[Dict[str, Any]] = None):
+        self.records = records or []
+
+    @classmethod
+    def scan(cls, paths: Sequence[str]) -> "LevelIndex":
+        paths = sorted(set(paths))
+        chunks = [(paths[i : i + _CHUNK_SIZE],) for i in range(0, len(paths), _CHUNK_SIZE)]
+        records = [record for chunk in run_jobs(_analyze_files, chunks) for record in chunk]
+
+        levels = [r for r in records if "error" not in r]
+        if levels:
+            array = encode_levels([r["layout"] for r in levels])
+            metrics = level_metrics(
+                array,
+                np.array([len(r["layout"]) for r in levels]),
+                np.array([r["capacity"] for r in levels]),
+            )
+            for i, record in enumerate(levels):
+                for name, values in metrics.items():
+                    value = values[i].item()
+                    record[name] = round(value, 4) if isinstance(value, float) else value
+
+        first_hash = {}
+        first_canonical = {}
+        for record in levels:
+            record["duplicate_of"] = first_hash.setdefault(record["hash"], record["path"])
+            if record["duplicate_of"] == record["path"]:
+                record["duplicate_of"] = None
+            # only an exact canonical form proves two levels the same, the fallback invariant can collide
+            record["isomorphic_of"] = None
+            if record["canonical"].split(":")[1] == "c":
+                record["isomorphic_of"] = first_canonical.setdefault(record["canonical"], record["path"])
+                if record["isomorphic_of"] == record["path"]:
+                    record["isomorphic_of"] = None
+
+        return cls(records)
+
+    @classmethod
+    def scan_dir(cls, folder: str, pattern: str = "lv*.json") -> "LevelIndex":
+        return cls.scan(glob.glob(os.path.join(folder, "**", pattern), recursive=True))
+
+    @classmethod
+    def load(cls, path: str) -> "LevelIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            raise ValueError(f"关卡索引版本【{data.get('version')} 】不支持")
+        return cls(data["levels"])
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "levels": self.records}, f, indent=1, ensure_ascii=False)
+
+    def query(self, conditions: Sequence[str] = (), unique: bool = False) -> List[Dict[str, Any]]:
+        parsed = []
+        for condition in conditions:
+            m = _CONDITION.match(condition)
+            if m is None:
+                raise ValueError(f"筛选条件【{condition} 】格式错误，应为 字段>=值")
+            field, op, value = m.groups()
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+            parsed.append((field, _OPERATORS[op], value))
+
+        result = []
+        for record in self.records:
+            if "error" in record or (unique and record["isomorphic_of"] is not None):
+                continue
+            if all(field in record and op(record[field], value) for field, op, value in parsed):
+                result.append(record)
+        return result
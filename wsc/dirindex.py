@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+from typing import (
+    Dict,
+    List,
+    Optional,
+)
+
+from wsc.tracing import span
+
+# directory mtimes are coarse on some file systems (2s on FAT, 1s on many shares),
+# an index scanned this close to the last change is not trusted on the next lookup
+_MTIME_SLACK_NS = 2_000_000_000
+
+_INDEXES = {}
+_WATCHED = set()
+_LOCK = threading.Lock()
+
+
+class DirEntryInfo:
+    __slots__ = ("name", "path", "size", "mtime_ns", "inode")
+
+    def __init__(self, entry: os.DirEntry):
+        st = entry.stat()
+        self.name = entry.name
+        self.path = entry.path
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        self.inode = st.st_ino
+
+
+class DirectoryIndex:
+    __slots__ = ("folder", "mtime_ns", "scanned_ns", "_buckets")
+
+    _buckets: Dict[str, List[DirEntryInfo]]
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.mtime_ns = os.stat(folder).st_mtime_ns
+        self.scanned_ns = time.time_ns()
+        self._buckets = {}
+
+        # one listing per folder, entries are bucketed by suffix like "*.png" would match them
+        with span("scan_dir", "io") as s, os.scandir(folder) as it:
+            for entry in it:
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                suffix = os.path.normcase(os.path.splitext(entry.name)[1][1:])
+                self._buckets.setdefault(suffix, []).append(DirEntryInfo(entry))
+                s.add(files=1)
+        for entries in self._buckets.values():
+            entries.sort(key=lambda e: e.name)
+
+    def entries(self, suffix: str) -> List[DirEntryInfo]:
+        return list(self._buckets.get(os.path.normcase(suffix), []))
+
+    def files(self, suffix: str) -> List[str]:
+        return [e.path for e in self._buckets.get(os.path.normcase(suffix), [])]
+
+    def is_current(self) -> bool:
+        try:
+            mtime_ns = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return False
+        return mtime_ns == self.mtime_ns and self.scanned_ns - mtime_ns > _MTIME_SLACK_NS
+
+
+def get_dir_index(folder: str) -> Optional[DirectoryIndex]:
+    if folder is None or len(folder) == 0:
+        return None
+    folder = os.path.abspath(folder)
+
+    with _LOCK:
+        index = _INDEXES.get(folder)
+        # a watched folder is invalidated by its watcher, so no stat is needed here
+        if index is not None and (folder in _WATCHED or index.is_current()):
+            return index
+
+    try:
+        index = DirectoryIndex(folder)
+    except OSError:
+        return None
+    with _LOCK:
+        _INDEXES[folder] = index
+    return index
+
+
+def invalidate_dir_index(folder: str = None):
+    with _LOCK:
+        if folder is None:
+            _INDEXES.clear()
+        else:
+            _INDEXES.pop(os.path.abspath(folder), None)
+
+
+def set_dir_watched(folder: str, watched: bool):
+    folder = os.path.abspath(folder)
+    with _LOCK:
+        if watched:
+            _WATCHED.add(folder)
+        else:
+            _WATCHED.discard(folder)
+        _INDEXES.pop(folder, None)
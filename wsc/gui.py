@@ -0,0 +1,1011 @@
+# -*- coding: utf-8 -*-
+import html
+import os
+import sys
+import threading
+import time
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+)
+
+from PySide6.QtCore import (
+    QFileSystemWatcher,
+    QObject,
+    QRunnable,
+    Qt,
+    QThreadPool,
+    QTimer,
+    Signal,
+)
+from PySide6.QtWidgets import (
+    QApplication,
+    QComboBox,
+    QDoubleSpinBox,
+    QFileDialog,
+    QFormLayout,
+    QGridLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QMessageBox,
+    QProgressBar,
+    QPushButton,
+    QRadioButton,
+    QSizePolicy,
+    QSpinBox,
+    QVBoxLayout,
+    QWidget,
+)
+
+from wsc.core import (
+    DataCollector,
+    ErrorCodeEnum,
+    ExportError,
+    ExportStageEnum,
+    LastLevelCondEnum,
+    LastLevelCondOptionList,
+    PropKeyEnum,
+    RepackModeEnum,
+    RepackModeOptionList,
+    config_template,
+)
+from wsc.dirindex import (
+    invalidate_dir_index,
+    set_dir_watched,
+)
+from wsc.tracing import (
+    default_log_file,
+    get_tracer,
+    log,
+    setup_logging,
+)
+
+_LAST_OPEN_DIR = None
+
+
+class JxFileDialog(QFileDialog):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _get_last_open_dir():
+        global _LAST_OPEN_DIR
+        if _LAST_OPEN_DIR:
+            return _LAST_OPEN_DIR
+        return os.getcwd()
+
+    @staticmethod
+    def _set_last_open_dir(path):
+        global _LAST_OPEN_DIR
+        _LAST_OPEN_DIR = path
+
+    @staticmethod
+    def open_single_file(caption=None, filter=None):
+        caption = caption or "打开文件"
+        filter = filter or "All Files (*.*)"
+
+        directory = JxFileDialog._get_last_open_dir()
+        file_path, _ = JxFileDialog.getOpenFileName(None, caption, directory, filter)
+        if file_path is not None:
+            JxFileDialog._set_last_open_dir(os.path.dirname(file_path))
+
+        return file_path
+
+    @staticmethod
+    def open_single_dir(caption=None, init_dir=None):
+        caption = caption or "打开文件夹"
+
+        directory = init_dir or JxFileDialog._get_last_open_dir()
+        file_path = JxFileDialog.getExistingDirectory(None, caption, directory)
+        if file_path is not None:
+            JxFileDialog._set_last_open_dir(file_path)
+
+        return file_path
+
+    @staticmethod
+    def save_single_file(caption=None, filter=None, default_filename=None):
+        caption = caption or "保存文件"
+        filter = filter or "All Files (*.*)"
+
+        directory = JxFileDialog._get_last_open_dir()
+        if default_filename is not None:
+            directory = os.path.join(directory, default_filename)
+
+        file_path, _ = JxFileDialog.getSaveFileName(None, caption, directory, filter)
+        if file_path is not None:
+            JxFileDialog._set_last_open_dir(os.path.dirname(file_path))
+
+        return file_path
+
+
+class JxFileLocationEdit(QWidget):
+    locationChanged = Signal(str)
+
+    _layout: QHBoxLayout
+    _location: QLineEdit
+
+    def __init__(self, desc=None, suffix=None, choose_dir=False, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._desc = desc
+        self._suffix = suffix
+        self._choose_dir = choose_dir
+        self._location = QLineEdit(self)
+        self._layout = QHBoxLayout(self)
+        self._initUI()
+
+    def _initUI(self):
+        layout = self._layout
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        if self._desc:
+            label = QLabel(self._desc)
+            label.setFixedWidth(40)
+            layout.addWidget(label)
+
+        btn_text = "选择文件夹" if self._choose_dir else "选择文件"
+        btn_open_dir = QPushButton(btn_text, parent=self)
+        layout.addWidget(btn_open_dir, 1)
+        btn_open_dir.clicked.connect(self.on_btn_open_dir_clicked)
+
+        btn_text_cls = QPushButton("清空", parent=self)
+        layout.addWidget(btn_text_cls, 1)
+        btn_text_cls.clicked.connect(self.on_btn_text_cls_clicked)
+
+        edit_dir = self._location
+        edit_dir.setReadOnly(True)
+        layout.addWidget(edit_dir, 8)
+
+    def on_btn_open_dir_clicked(self):
+        if self._choose_dir:
+            path = JxFileDialog.open_single_dir()
+        else:
+            path = JxFileDialog.open_single_file(filter=f"File (*.{self._suffix})")
+
+        if path:
+            self.set_location(path)
+
+    def on_btn_text_cls_clicked(self):
+        self.set_location(None)
+
+    def set_location(self, path):
+        self._location.setText(path)
+        self.locationChanged.emit(path)
+
+
+class JxOptionSelector(QComboBox):
+    _options: List[Dict[str, Any]]
+
+    currentValueChanged = Signal(Any)
+
+    def __init__(self, options: List[Dict] = None, init_value=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._options = options or []
+        self._init_value = init_value
+        self._initUI()
+
+    def _initUI(self):
+        options = self._options
+        self.add_options(options)
+
+        if self._init_value and options:
+            for i, item in enumerate(options):
+                if item.get("value") == self._init_value:
+                    self.setCurrentIndex(i)
+                    break
+
+        self.currentIndexChanged.connect(self._set_value)
+
+    def add_options(self, options: List[Dict]):
+        for index, option in enumerate(options):
+            if "label" not in option:
+                raise Exception("JxOptionSelector miss label field.")
+            self.addItem(option["label"], index)
+
+    def _set_value(self, index):
+        value = self._options[index].get("value")
+        self.currentValueChanged.emit(value)
+
+
+class JxMessageBox(QMessageBox):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def info(cls, text: str):
+        cls.information(None, "成功", text)
+
+    @classmethod
+    def warn(cls, text: str):
+        cls.warning(None, "错误", text)
+
+
+class JxSpinBox(QSpinBox):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
+class JxDoubleSpinBox(QDoubleSpinBox):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
+class JxRadioButton(QRadioButton):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
+class JxAnimationGrid(QWidget):
+    _layout: QGridLayout
+    valueChanged = Signal(PropKeyEnum, Any)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._layout = QGridLayout(self)
+        self.initUI()
+
+    def initUI(self):
+        layout = self._layout
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        layout.addWidget(QLabel("时长(秒)"), 0, 0)
+        edit01 = JxSpinBox(self)
+        edit01.setValue(config_template()["DownButtomInfo"]["aniTime"])
+        edit01.valueChanged.connect(lambda value, key=PropKeyEnum.G4_ANI_TIM: self._set_value(key, value))
+        layout.addWidget(edit01, 0, 1)
+
+        layout.addWidget(QLabel("间隔(秒)"), 0, 2)
+        edit02 = JxSpinBox(self)
+        edit02.setValue(config_template()["DownButtomInfo"]["delayTime"])
+        edit02.valueChanged.connect(lambda value, key=PropKeyEnum.G4_ANI_DLY: self._set_value(key, value))
+        layout.addWidget(edit02, 0, 3)
+
+        layout.addWidget(QLabel("开始大小"), 1, 0)
+        edit11 = JxDoubleSpinBox(self)
+        edit11.setValue(config_template()["DownButtomInfo"]["aniScale"][0])
+        edit11.valueChanged.connect(lambda value, key=PropKeyEnum.G4_ANI_SC0: self._set_value(key, value))
+        layout.addWidget(edit11, 1, 1)
+
+        layout.addWidget(QLabel("结束大小"), 1, 2)
+        edit13 = JxDoubleSpinBox(self)
+        edit13.setValue(config_template()["DownButtomInfo"]["aniScale"][1])
+        edit13.valueChanged.connect(lambda value, key=PropKeyEnum.G4_ANI_SC9: self._set_value(key, value))
+        layout.addWidget(edit13, 1, 3)
+
+        layout.setColumnStretch(0, 1)
+        layout.setColumnStretch(1, 3)
+        layout.setColumnStretch(2, 1)
+        layout.setColumnStretch(3, 3)
+
+    def _set_value(self, key: PropKeyEnum, value: Any):
+        self.valueChanged.emit(key, value)
+
+
+class JxLevelListEdit(QWidget):
+    levelsChanged = Signal(list)
+
+    _layout: QFormLayout
+    _edits: List[JxFileLocationEdit]
+    _paths: List[str]
+
+    def __init__(self, count: int = 3, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._layout = QFormLayout(self)
+        self._edits = []
+        self._paths = []
+        self._initUI(count)
+
+    def _initUI(self, count: int):
+        layout = self._layout
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        btn_add = QPushButton("添加关卡", parent=self)
+        btn_add.clicked.connect(self.add_level)
+        buttons.addWidget(btn_add)
+        btn_remove = QPushButton("删除最后一关", parent=self)
+        btn_remove.clicked.connect(self.remove_level)
+        buttons.addWidget(btn_remove)
+        layout.addRow(buttons)
+
+        for _ in range(count):
+            self.add_level()
+
+    def add_level(self):
+        index = len(self._edits)
+        edit = JxFileLocationEdit(suffix="json", parent=self)
+        edit.locationChanged.connect(lambda value, index=index: self._set_path(index, value))
+        layout = self._layout
+        layout.insertRow(layout.rowCount() - 1, f"关卡{index + 1}", edit)
+        self._edits.append(edit)
+        self._paths.append("")
+        self.levelsChanged.emit(list(self._paths))
+
+    def remove_level(self):
+        if len(self._edits) <= 1:
+            return
+        self._edits.pop()
+        self._paths.pop()
+        self._layout.removeRow(len(self._edits))
+        self.levelsChanged.emit(list(self._paths))
+
+    def _set_path(self, index: int, value: str):
+        self._paths[index] = value or ""
+        self.levelsChanged.emit(list(self._paths))
+
+
+class JxDiagnosticsLabel(QLabel):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setWordWrap(True)
+        self.setTextFormat(Qt.TextFormat.RichText)
+
+    def set_diagnostics(self, diagnostics: List[ExportError]):
+        lines = []
+        for e in diagnostics:
+            color = "#d32f2f" if e.fatal else "#ef6c00"
+            lines.append(f'<span style="color:{color}">• {html.escape(e.text)}</span>')
+        self.setText("<br/>".join(lines))
+        self.setVisible(len(lines) > 0)
+
+
+class JxDataCollector(DataCollector):
+    def warn(self, code: ErrorCodeEnum, text: str, key: PropKeyEnum = None, fatal: bool = True):
+        super().warn(code, text, key, fatal)
+        JxMessageBox.warn(text)
+
+    def info(self, text: str):
+        JxMessageBox.info(text)
+
+    def select_target_dir(self):
+        dir_path = JxFileDialog.open_single_dir("导出文件到文件夹")
+        if not dir_path:
+            return super().select_target_dir()
+
+        return dir_path
+
+
+class JxExportSignals(QObject):
+    progress = Signal(object, object, str)
+    finished = Signal(object, object)
+
+
+class JxTask(QRunnable):
+    # progress arrives from the worker threads, it is thinned out before crossing to the ui thread
+    _PROGRESS_INTERVAL = 0.05
+
+    def __init__(self):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = JxExportSignals()
+        self._last_progress = 0
+
+    def _on_progress(self, done: int, total: int, path: str):
+        now = time.monotonic()
+        if done < total and now - self._last_progress < self._PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        self.signals.progress.emit(done, total, path)
+
+    def cancel(self):
+        pass
+
+
+class JxExportTask(JxTask):
+    def __init__(
+        self, props: Dict[PropKeyEnum, Any], target: str, stages: Optional[Set[ExportStageEnum]] = None
+    ):
+        super().__init__()
+        self.props = dict(props)
+        self.target = target
+        self.stages = stages
+        self.elapsed = 0
+        self.collector = DataCollector(progress=self._on_progress)
+
+    def cancel(self):
+        self.collector.cancel()
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            exported = self.collector.export(self.props, self.target, self.stages)
+        except Exception as e:
+            log.exception("Export failed: %s", self.target)
+            self.collector.warn(ErrorCodeEnum.E_IO, f"导出失败：{e}")
+            exported = None
+        self.elapsed = (time.monotonic() - started) * 1000
+        self.signals.finished.emit(self, exported)
+
+
+class JxVariantsTask(JxTask):
+    def __init__(self, props: Dict[PropKeyEnum, Any], matrix: Any, target: str):
+        super().__init__()
+        self.props = dict(props)
+        self.matrix = matrix
+        self.target = target
+        self.error = None
+        self._cancel_event = threading.Event()
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _create_collector(self, **options) -> DataCollector:
+        # every export of the run is tracked so cancel reaches the one that is copying
+        collector = DataCollector(**options)
+        with self._lock:
+            self._collectors.append(collector)
+            if self._cancel_event.is_set():
+                collector.cancel()
+        return collector
+
+    def cancel(self):
+        with self._lock:
+            self._cancel_event.set()
+            for collector in self._collectors:
+                collector.cancel()
+
+    def run(self):
+        from wsc.variants import export_variants
+
+        report = None
+        try:
+            report = export_variants(
+                self.props,
+                self.matrix,
+                self.target,
+                collector_factory=self._create_collector,
+                progress=self._on_progress,
+                cancelled=self._cancel_event.is_set,
+            )
+        except ExportError as e:
+            self.error = e.text
+        except Exception as e:
+            log.exception("Variants export failed: %s", self.target)
+            self.error = f"导出失败：{e}"
+        self.signals.finished.emit(self, report)
+
+
+class WaterSortConfigWidget(QWidget):
+    _layout: QVBoxLayout
+    _props: Dict[PropKeyEnum, Any]
+    _collector: JxDataCollector
+    _diagnostics: JxDiagnosticsLabel
+    _watcher: QFileSystemWatcher
+    _export_watcher: QFileSystemWatcher
+    _watch_timer: QTimer
+    _watch_changed: Set[str]
+    _watch_stages: Set[ExportStageEnum]
+    _export_pool: QThreadPool
+    _export_tasks: List[JxTask]
+
+    _WATCH_DEBOUNCE_MS = 150
+
+    _WATCHED_KEYS = [PropKeyEnum.G1_IMG_DIR, PropKeyEnum.G5_YXP_DIR]
+
+    diagnosticsReady = Signal(int, object)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._layout = QVBoxLayout(self)
+        self._props = {}
+        self._collector = JxDataCollector()
+        self._diagnostics = JxDiagnosticsLabel(parent=self)
+        self._check_serial = 0
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_dir_changed)
+        self.diagnosticsReady.connect(self._on_diagnostics_ready)
+
+        # watch mode re-exports the changed parts to a remembered folder
+        self._watch_target = None
+        self._watch_tasks = set()
+        self._watch_changed = set()
+        self._watch_stages = set()
+        self._watch_full = False
+        self._watch_status = QLabel(parent=self)
+        self._export_watcher = QFileSystemWatcher(self)
+        self._export_watcher.fileChanged.connect(self._on_source_changed)
+        self._export_watcher.directoryChanged.connect(self._on_source_changed)
+        self._watch_timer = QTimer(self)
+        self._watch_timer.setSingleShot(True)
+        self._watch_timer.setInterval(self._WATCH_DEBOUNCE_MS)
+        self._watch_timer.timeout.connect(self._run_watch_export)
+
+        # one export at a time, a request made meanwhile waits in the pool's queue
+        self._export_pool = QThreadPool(self)
+        self._export_pool.setMaxThreadCount(1)
+        self._export_tasks = []
+        self._export_progress = QProgressBar(parent=self)
+        self._export_progress.setRange(0, 1000)
+        self._export_progress.setVisible(False)
+        self._export_cancel = QPushButton("取消导出", parent=self)
+        self._export_cancel.setVisible(False)
+        self._export_cancel.clicked.connect(self.cancel_exports)
+
+        self.initUI()
+        self._schedule_check()
+
+    def initUI(self):
+        self.setWindowTitle("水排序配置制作工具")
+        self.setMinimumWidth(600)
+        # self.setGeometry(100, 100, 600, 200)
+
+        layout = self._layout
+
+        layout.addWidget(self._init_group_01())
+        layout.addWidget(self._init_group_02())
+        layout.addWidget(self._init_group_03())
+        layout.addWidget(self._init_group_04())
+        layout.addWidget(self._init_group_05())
+
+        layout.addStretch()
+        layout.addWidget(self._diagnostics)
+        progress = QHBoxLayout()
+        progress.addWidget(self._export_progress)
+        progress.addWidget(self._export_cancel)
+        layout.addLayout(progress)
+        layout.addLayout(self._init_operation_area())
+
+    def _init_group_01(self):
+        group = QGroupBox("1. 标题图片")
+        layout = QFormLayout(parent=group)
+
+        edit01 = JxFileLocationEdit(choose_dir=True, parent=self)
+        edit01.locationChanged.connect(
+            lambda value, key=PropKeyEnum.G1_IMG_DIR: self._set_props(key, value)
+        )
+        layout.addRow("多语言标题", edit01)
+
+        check01 = JxRadioButton(parent=self)
+        check01.setToolTip("把各语言标题合并为一张图集，GameConfig.json 中按语言记录各自的区域")
+        check01.clicked.connect(
+            lambda state, key=PropKeyEnum.G1_PACK_LANG: self._set_props(key, value=state)
+        )
+        layout.addRow("合并为图集", check01)
+
+        return group
+
+    def _init_group_01_v0(self):
+        group = QGroupBox("1. 标题图片")
+        layout = QFormLayout(parent=group)
+
+        edit01 = JxFileLocationEdit(suffix="png", parent=self)
+        edit01.locationChanged.connect(
+            lambda value, key=PropKeyEnum.G1_FILE_01: self._set_props(key, value)
+        )
+        layout.addRow("关卡1", edit01)
+
+        edit02 = JxFileLocationEdit(suffix="png", parent=self)
+        edit02.locationChanged.connect(
+            lambda value, key=PropKeyEnum.G1_FILE_02: self._set_props(key, value)
+        )
+        layout.addRow("关卡2", edit02)
+
+        edit03 = JxFileLocationEdit(suffix="png", parent=self)
+        edit03.locationChanged.connect(
+            lambda value, key=PropKeyEnum.G1_FILE_03: self._set_props(key, value)
+        )
+        layout.addRow("关卡3", edit03)
+
+        return group
+
+    def _init_group_02(self):
+        group = QGroupBox("2. 关卡文件")
+        layout = QFormLayout(parent=group)
+
+        levels = JxLevelListEdit(count=len(config_template()["LevelData"]), parent=self)
+        levels.levelsChanged.connect(lambda value, key=PropKeyEnum.G2_LEVELS: self._set_props(key, value))
+        self._props[PropKeyEnum.G2_LEVELS] = [""] * len(config_template()["LevelData"])
+        layout.addRow(levels)
+
+        return group
+
+    def _init_group_03(self):
+        group = QGroupBox("3. 最后一关的结束条件")
+        layout = QFormLayout(parent=group)
+
+        selector = JxOptionSelector(
+            options=LastLevelCondOptionList, init_value=LastLevelCondEnum.E00, parent=self
+        )
+        selector.currentValueChanged.connect(
+            lambda value, key=PropKeyEnum.G3_OPT_TYP: self._set_props(key, value)
+        )
+        layout.addRow("结束条件类型", selector)
+
+        edit01 = JxSpinBox(self)
+        edit01.setRange(0, 99)
+        edit01.valueChanged.connect(lambda value, key=PropKeyEnum.G3_OPT_NUM: self._set_props(key, value))
+        layout.addRow("n 值", edit01)
+
+        check02 = JxRadioButton(parent=self)
+        check02.setToolTip("检查时求解每个关卡，无解时不导出，并提示 n 值是否小于最后一关的最少步数")
+        check02.clicked.connect(lambda state, key=PropKeyEnum.G3_SOLVE: self._set_props(key, value=state))
+        layout.addRow("求解关卡", check02)
+
+        return group
+
+    def _init_group_04(self):
+        group = QGroupBox("4. 下载按钮")
+        layout = QFormLayout(parent=group)
+
+        edit01 = JxFileLocationEdit(suffix="png", parent=self)
+        edit01.locationChanged.connect(
+            lambda value, key=PropKeyEnum.G4_FILE_01: self._set_props(key, value)
+        )
+        layout.addRow("按钮图片", edit01)
+
+        edit02 = JxDoubleSpinBox(self)
+        edit02.setRange(0, 10)
+        edit02.setValue(config_template()["DownButtomInfo"]["scale"])
+        edit02.valueChanged.connect(lambda value, key=PropKeyEnum.G4_INIT_SC: self._set_props(key, value))
+        layout.addRow("初始大小", edit02)
+
+        grid01 = JxAnimationGrid(self)
+        grid01.valueChanged.connect(lambda key, value: self._set_props(key, value))
+        label = QLabel("呼吸动画")
+        label.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Expanding)
+        label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        layout.addRow(label, grid01)
+
+        return group
+
+    def _init_group_05(self):
+        group = QGroupBox("5. 其他确认项")
+        layout = QFormLayout(parent=group)
+
+        edit01 = JxFileLocationEdit(suffix="png", parent=self)
+        edit01.locationChanged.connect(
+            lambda value, key=PropKeyEnum.G5_FILE_01: self._set_props(key, value)
+        )
+        layout.addRow("结束页", edit01)
+
+        check = JxRadioButton(parent=self)
+        check.clicked.connect(lambda state, key=PropKeyEnum.G5_IS_TUTR: self._set_props(key, value=state))
+        check.setChecked(True)
+        layout.addRow("是否有新手", check)
+
+        edit03 = JxFileLocationEdit(choose_dir=True, parent=self)
+        edit03.locationChanged.connect(
+            lambda value, key=PropKeyEnum.G5_YXP_DIR: self._set_props(key, value)
+        )
+        layout.addRow("异形瓶文件夹", edit03)
+
+        edit05 = JxSpinBox(self)
+        edit05.setRange(0, 100)
+        edit05.setSpecialValueText("无损")
+        edit05.setToolTip("异形瓶纹理为 png 时转换为 webp 的质量，0 为无损")
+        edit05.valueChanged.connect(lambda value, key=PropKeyEnum.G5_WEBP_QA: self._set_props(key, value))
+        layout.addRow("纹理质量", edit05)
+
+        selector = JxOptionSelector(
+            options=RepackModeOptionList, init_value=RepackModeEnum.NONE, parent=self
+        )
+        selector.setToolTip("按图集区域裁剪并重新打包异形瓶纹理，去掉空白区域")
+        selector.currentValueChanged.connect(
+            lambda value, key=PropKeyEnum.G5_REPACK: self._set_props(key, value)
+        )
+        layout.addRow("纹理打包", selector)
+
+        check02 = JxRadioButton(parent=self)
+        check02.setToolTip("去掉图集中没有被骨骼文件引用的区域，配合纹理打包可减小纹理尺寸")
+        check02.clicked.connect(lambda state, key=PropKeyEnum.G5_PRUNE: self._set_props(key, value=state))
+        layout.addRow("裁剪未引用区域", check02)
+
+        check03 = JxRadioButton(parent=self)
+        check03.setToolTip(
+            "md5 校验码中的填充字符由文件内容决定，输入不变时 GameConfig.json 每次导出都相同"
+        )
+        check03.clicked.connect(
+            lambda state, key=PropKeyEnum.G5_STABLE_MD5: self._set_props(key, value=state)
+        )
+        layout.addRow("固定校验码", check03)
+
+        check04 = JxRadioButton(parent=self)
+        check04.setToolTip("在 GameConfig.json 中记录每个导出文件的指纹，便于按文件刷新缓存")
+        check04.clicked.connect(
+            lambda state, key=PropKeyEnum.G5_ASSET_HASH: self._set_props(key, value=state)
+        )
+        layout.addRow("资源指纹", check04)
+
+        edit04 = JxFileLocationEdit(suffix="jpg", parent=self)
+        edit04.locationChanged.connect(
+            lambda value, key=PropKeyEnum.G5_FILE_04: self._set_props(key, value)
+        )
+        layout.addRow("背景图", edit04)
+
+        return group
+
+    def _init_operation_area(self):
+        layout = QHBoxLayout()
+        layout.addWidget(self._watch_status)
+        layout.addStretch()
+
+        btn_watch = QPushButton("自动导出", parent=self)
+        btn_watch.setCheckable(True)
+        btn_watch.setToolTip("导出后监视源文件，修改时自动重新导出变化的部分")
+        btn_watch.toggled.connect(lambda checked: self._on_watch_btn_toggled(btn_watch, checked))
+        layout.addWidget(btn_watch)
+
+        # btn_debug_props = QPushButton("調試", parent=self)
+        # btn_debug_props.clicked.connect(self._on_dbg_btn_clicked)
+        # layout.addWidget(btn_debug_props)
+
+        btn_export_data = QPushButton("导出", parent=self)
+        btn_export_data.clicked.connect(self._on_exp_btn_clicked)
+        layout.addWidget(btn_export_data)
+
+        btn_export_bundle = QPushButton("打包导出", parent=self)
+        btn_export_bundle.setToolTip("导出为单个 zip 或内嵌全部资源的 html 文件")
+        btn_export_bundle.clicked.connect(self._on_bundle_btn_clicked)
+        layout.addWidget(btn_export_bundle)
+
+        btn_export_variants = QPushButton("导出变体", parent=self)
+        btn_export_variants.setToolTip("按变体矩阵文件批量导出多个变体，共享的资源只导出一次")
+        btn_export_variants.clicked.connect(self._on_variants_btn_clicked)
+        layout.addWidget(btn_export_variants)
+
+        return layout
+
+    def _set_props(self, key: str, value: Any):
+        self._props.update({key: value})
+        log.debug("Update Props: %s=%r", key, value)
+        if key in self._WATCHED_KEYS:
+            self._update_watched_dirs()
+        self._schedule_check()
+        if self._watch_target is not None:
+            # only the stages the property feeds are exported again, e.g. the config for a scale
+            stages = DataCollector.get_prop_stages(self._props, key)
+            if len(stages) == 0:
+                self._watch_full = True
+            self._watch_stages |= stages
+            self._watch_timer.start()
+
+    def _update_watched_dirs(self):
+        # input folders are re-listed only when the watcher reports a change
+        folders = {os.path.abspath(self._props[k]) for k in self._WATCHED_KEYS if self._props.get(k)}
+        folders = {f for f in folders if os.path.isdir(f)}
+        watched = set(self._watcher.directories())
+        for folder in watched - folders:
+            self._watcher.removePath(folder)
+            set_dir_watched(folder, False)
+        for folder in folders - watched:
+            if self._watcher.addPath(folder):
+                set_dir_watched(folder, True)
+
+    def _on_dir_changed(self, folder: str):
+        log.info("Folder changed: %s", folder)
+        invalidate_dir_index(folder)
+        if not os.path.isdir(folder):
+            self._watcher.removePath(folder)
+            set_dir_watched(folder, False)
+        DataCollector.get_validator().invalidate()
+        self._schedule_check()
+
+    def _schedule_check(self):
+        # only checks reading a changed key re-run, results come back through a queued signal
+        self._check_serial += 1
+        serial = self._check_serial
+        DataCollector.get_validator().submit(
+            self._props,
+            callback=lambda diagnostics: self.diagnosticsReady.emit(serial, diagnostics),
+        )
+
+    def _on_diagnostics_ready(self, serial: int, diagnostics: List[ExportError]):
+        if serial != self._check_serial:
+            return
+        self._diagnostics.set_diagnostics(diagnostics)
+
+    def _on_exp_btn_clicked(self):
+        target_dir = self._collector.select_target_dir()
+        if target_dir is not None:
+            self.start_export(target_dir)
+
+    def _on_bundle_btn_clicked(self):
+        bundle_file = JxFileDialog.save_single_file(
+            "打包导出", filter="Zip (*.zip);;HTML (*.html)", default_filename="GameAssets.zip"
+        )
+        if bundle_file:
+            self.start_export(bundle_file)
+
+    def start_export(self, target: str, stages: Optional[Set[ExportStageEnum]] = None) -> JxExportTask:
+        task = JxExportTask(self._props, target, stages)
+        task.signals.progress.connect(self._on_export_progress)
+        task.signals.finished.connect(self._on_export_finished)
+        self._export_tasks.append(task)
+        self._export_pool.start(task)
+        self._update_export_status()
+        return task
+
+    def cancel_exports(self):
+        for task in list(self._export_tasks):
+            # a queued export is simply dropped, the running one stops after its current file
+            if self._export_pool.tryTake(task):
+                self._export_tasks.remove(task)
+                self._watch_tasks.discard(task)
+            else:
+                task.cancel()
+        self._update_export_status()
+
+    def _update_export_status(self):
+        busy = len(self._export_tasks) > 0
+        self._export_progress.setVisible(busy)
+        self._export_cancel.setVisible(busy)
+        if not busy:
+            return
+        queued = len(self._export_tasks) - 1
+        self._export_progress.setFormat(f"%p%（排队 {queued} 个）" if queued > 0 else "%p%")
+        if self._export_progress.value() < 0:
+            self._export_progress.setValue(0)
+
+    def _on_export_progress(self, done: int, total: int, path: str):
+        self._export_progress.setValue(1000 if total <= 0 else min(1000, done * 1000 // total))
+        self._export_progress.setToolTip(path)
+
+    def _on_export_finished(self, task: JxExportTask, exported: str):
+        if task in self._export_tasks:
+            self._export_tasks.remove(task)
+        self._export_progress.reset()
+        self._update_export_status()
+
+        collector = task.collector
+        self._diagnostics.set_diagnostics(collector.errors)
+        if task in self._watch_tasks:
+            self._on_watch_export_finished(task, exported)
+            return
+        if exported is not None:
+            JxMessageBox.info(f"成功导出到：{exported}")
+            return
+        errors = [e.text for e in collector.errors if e.fatal and e.code != ErrorCodeEnum.E_CANCELLED]
+        if errors:
+            JxMessageBox.warn("\n".join(errors))
+
+    def closeEvent(self, event):
+        self.cancel_exports()
+        self._export_pool.waitForDone()
+        super().closeEvent(event)
+
+    def _on_variants_btn_clicked(self):
+        from wsc.variants import VariantMatrix
+
+        matrix_file = JxFileDialog.open_single_file("选择变体矩阵", filter="JSON (*.json)")
+        if not matrix_file:
+            return
+        out_dir = JxFileDialog.open_single_dir("导出变体到文件夹")
+        if not out_dir:
+            return
+
+        try:
+            matrix = VariantMatrix.load(matrix_file)
+        except ExportError as e:
+            JxMessageBox.warn(e.text)
+            return
+        self.start_variants(matrix, out_dir)
+
+    def start_variants(self, matrix: Any, target: str) -> JxVariantsTask:
+        task = JxVariantsTask(self._props, matrix, target)
+        task.signals.progress.connect(self._on_export_progress)
+        task.signals.finished.connect(self._on_variants_finished)
+        self._export_tasks.append(task)
+        self._export_pool.start(task)
+        self._update_export_status()
+        return task
+
+    def _on_variants_finished(self, task: JxVariantsTask, report: Dict[str, Any]):
+        if task in self._export_tasks:
+            self._export_tasks.remove(task)
+        self._export_progress.reset()
+        self._update_export_status()
+
+        if report is None:
+            JxMessageBox.warn(task.error)
+            return
+        if report["cancelled"]:
+            return
+        out_dir = report["target"]
+        errors = [e for v in report["variants"] for e in v["errors"] if e["fatal"]]
+        errors += [e for g in report["groups"] for e in g["errors"] if e["fatal"]]
+        if errors:
+            JxMessageBox.warn("\n".join(dict.fromkeys(e["text"] for e in errors)))
+            return
+        JxMessageBox.info(f"成功导出 {len(report['variants'])} 个变体到：{out_dir}")
+
+    def _on_watch_btn_toggled(self, button: QPushButton, checked: bool):
+        if not checked:
+            self._watch_target = None
+            self._watch_timer.stop()
+            self._sync_export_watcher()
+            self._watch_status.setText("")
+            return
+
+        target_dir = self._collector.select_target_dir()
+        if target_dir is None:
+            button.setChecked(False)
+            return
+        self._watch_target = target_dir
+        self._watch_full = True
+        self._run_watch_export()
+
+    def _sync_export_watcher(self):
+        # editors often save by replacing the file, which drops it from the watcher, so re-add every time
+        watcher = self._export_watcher
+        paths = set()
+        if self._watch_target is not None:
+            for path, stage in DataCollector.get_watch_paths(self._props).items():
+                paths.add(path)
+                if stage in (ExportStageEnum.YXP, ExportStageEnum.LANG) and os.path.isdir(path):
+                    # content changes of files inside a folder are not reported on the folder itself
+                    paths.update(os.path.join(path, name) for name in os.listdir(path))
+        paths = {p for p in paths if os.path.exists(p)}
+
+        current = set(watcher.files()) | set(watcher.directories())
+        if current - paths:
+            watcher.removePaths(list(current - paths))
+        if paths - current:
+            watcher.addPaths(list(paths - current))
+
+    def _on_source_changed(self, path: str):
+        if self._watch_target is None:
+            return
+        self._watch_changed.add(path)
+        self._watch_timer.start()
+
+    def _run_watch_export(self):
+        if len(self._watch_tasks) > 0:
+            # one watch export at a time, changes seen meanwhile are picked up once it is done
+            return
+        changed, self._watch_changed = self._watch_changed, set()
+        edited, self._watch_stages = self._watch_stages, set()
+        stages = None
+        if not self._watch_full:
+            stages = DataCollector.get_changed_stages(self._props, changed) | edited
+        self._watch_full = False
+
+        for path in changed:
+            invalidate_dir_index(path if os.path.isdir(path) else os.path.dirname(path))
+
+        self._watch_tasks.add(self.start_export(self._watch_target, stages))
+
+    def _on_watch_export_finished(self, task: JxExportTask, exported: str):
+        self._watch_tasks.discard(task)
+        if self._watch_target is None:
+            return
+        self._sync_export_watcher()
+        if exported is None:
+            self._watch_status.setText(f"{time.strftime('%H:%M:%S')} 自动导出失败")
+        else:
+            self._watch_status.setText(f"{time.strftime('%H:%M:%S')} 已自动导出（{task.elapsed:.0f} ms）")
+        if self._watch_full or len(self._watch_changed) > 0 or len(self._watch_stages) > 0:
+            self._watch_timer.start()
+
+    def _on_dbg_btn_clicked(self):
+        log.info("Props: %r", self._props)
+
+
+class WaterSortConfigApp(QApplication):
+    def __init__(self):
+        super().__init__(sys.argv)
+        self.setStyle("Fusion")
+        self.wsc = WaterSortConfigWidget()
+
+    def run(self):
+        self.wsc.show()
+        sys.exit(self.exec())
+
+
+def main():
+    setup_logging(default_log_file())
+    # WSC_TRACE=1 writes the stage timings to the log, a .json path also gets a chrome trace
+    trace = os.environ.get("WSC_TRACE", "")
+    if len(trace) == 0:
+        WaterSortConfigApp().run()
+        return
+
+    tracer = get_tracer()
+    tracer.start(trace if trace.endswith(".json") else None)
+    try:
+        WaterSortConfigApp().run()
+    finally:
+        tracer.stop()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Dict,
+    List,
+    Union,
+)
+
+from wsc.tracing import span
+
+_BUFFER_SIZE = 1024 * 1024
+
+# a fingerprint only tells versions of one asset apart, a short prefix of a fast hash is enough
+FINGERPRINT_ALGO = "blake2b"
+FINGERPRINT_LENGTH = 16
+
+
+def default_cache_dir():
+    if os.environ.get("WSC_CACHE_DIR"):
+        return os.environ["WSC_CACHE_DIR"]
+    if sys.platform == "win32":
+        return os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "wsc")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches/wsc")
+    return os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "wsc")
+
+
+def _file_key(st: os.stat_result) -> List[int]:
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+class HashCache:
+    VERSION = 1
+    MAX_ENTRIES = 100000
+
+    _entries: Dict[str, list]
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        self._entries = {}
+        if self.path is None:
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == self.VERSION:
+            self._entries = data.get("entries", {})
+
+    def lookup(self, path: str, algo: str = "md5", st: os.stat_result = None):
+        path = os.path.abspath(path)
+        st = st or os.stat(path)
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            entry = self._entries.get(path)
+            if entry is None or entry[:3] != _file_key(st):
+                return None
+            return entry[3].get(algo)
+
+    def store(self, path: str, digest: str, algo: str = "md5", st: os.stat_result = None):
+        path = os.path.abspath(path)
+        st = st or os.stat(path)
+        key = _file_key(st)
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            entry = self._entries.pop(path, None)
+            digests = entry[3] if entry is not None and entry[:3] == key else {}
+            digests[algo] = digest
+            self._entries[path] = key + [digests]
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if self.path is None or not self._dirty:
+                return
+            # a snapshot, lookups and stores go on while it is written
+            items = list(self._entries.items())[-self.MAX_ENTRIES :]
+            entries = {path: entry[:3] + [dict(entry[3])] for path, entry in items}
+            data = {"version": self.VERSION, "entries": entries}
+            self._dirty = False
+
+        # every save writes its own temp file, saves from two threads must not share one
+        folder = os.path.dirname(self.path)
+        os.makedirs(folder, exist_ok=True)
+        fd, temp_file = tempfile.mkstemp(
+            prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", dir=folder
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_file, self.path)
+        except BaseException:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            raise
+
+
+_HASH_CACHE = None
+
+
+def get_hash_cache() -> HashCache:
+    global _HASH_CACHE
+    if _HASH_CACHE is None:
+        _HASH_CACHE = HashCache(os.path.join(default_cache_dir(), "hash_cache.json"))
+    return _HASH_CACHE
+
+
+def set_hash_cache(cache: HashCache):
+    global _HASH_CACHE
+    _HASH_CACHE = cache
+
+
+def calc_file_digest(path: str, algo: str = "md5") -> str:
+    cache = get_hash_cache()
+    st = os.stat(path)
+    digest = cache.lookup(path, algo, st)
+    if digest is not None:
+        return digest
+
+    with span("hash_file", "io", files=1, bytes=st.st_size), open(path, "rb") as f:
+        digest = hashlib.file_digest(f, algo).hexdigest()
+
+    cache.store(path, digest, algo, st)
+    return digest
+
+
+def calc_fingerprints(sources: Dict[str, Union[str, bytes]], max_workers: int = None) -> Dict[str, str]:
+    # name -> file path or content, the result is sorted by name so it serializes the same every time
+    def _fingerprint(source: Union[str, bytes]) -> str:
+        if isinstance(source, bytes):
+            digest = hashlib.new(FINGERPRINT_ALGO, source).hexdigest()
+        else:
+            digest = calc_file_digest(source, FINGERPRINT_ALGO)
+        return digest[:FINGERPRINT_LENGTH]
+
+    names = sorted(sources.keys())
+    with span("fingerprint", files=len(names)):
+        if len(names) <= 1:
+            digests = [_fingerprint(sources[name]) for name in names]
+        else:
+            # file_digest releases the gil, so threads hash files side by side
+            with ThreadPoolExecutor(
+                max_workers=max_workers or min(len(names), 8), thread_name_prefix="wsc-hash"
+            ) as pool:
+                digests = list(pool.map(_fingerprint, [sources[name] for name in names]))
+    return dict(zip(names, digests))
+
+
+def copy_and_hash(src: str, dst: str, algo: str = "md5") -> str:
+    st = os.stat(src)
+    hasher = hashlib.new(algo)
+    buffer = bytearray(_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with (
+        span("copy_and_hash", "io", files=1, bytes=st.st_size),
+        open(src, "rb", buffering=0) as fsrc,
+        open(dst, "wb") as fdst,
+    ):
+        while n := fsrc.readinto(buffer):
+            hasher.update(view[:n])
+            fdst.write(view[:n])
+
+    digest = hasher.hexdigest()
+    get_hash_cache().store(src, digest, algo, st)
+    return digest
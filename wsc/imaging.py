@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+import os
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from wsc.atlas import SpineAtlas
+from wsc.copier import CopyModeEnum, copy_file
+from wsc.hashing import calc_file_digest
+from wsc.packer import pack_rects
+from wsc.probe import (
+    ImageInfo,
+    probe_images,
+)
+from wsc.store import (
+    STORE_ALGO,
+    AssetStore,
+    get_asset_store,
+)
+from wsc.tracing import log, span
+from wsc.workers import run_jobs
+
+
+def webp_settings(quality: int = 0) -> Dict[str, Any]:
+    # quality 0 means lossless, where "quality" is the encoder effort
+    if not quality:
+        return {"lossless": True, "quality": 80, "method": 4, "exact": True}
+    return {"lossless": False, "quality": int(quality), "method": 6}
+
+
+def _encode_webp(src: str, dst: str, settings: Dict[str, Any]):
+    from PIL import Image
+
+    temp_file = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        with Image.open(src) as img:
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+            img.save(temp_file, "WEBP", **settings)
+        os.replace(temp_file, dst)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def webp_derived_key(src: str, settings: Dict[str, Any]) -> str:
+    return AssetStore.derived_key("webp", calc_file_digest(src, STORE_ALGO), settings)
+
+
+def transcode_webp_files(
+    jobs: List[Tuple[str, str, Dict[str, Any]]],
+    mode: CopyModeEnum = CopyModeEnum.REFLINK,
+) -> List[str]:
+    # pillow is only needed when something has to be encoded
+    import PIL  # noqa: F401
+
+    store = get_asset_store()
+    keys = [webp_derived_key(src, settings) for src, _, settings in jobs]
+    cached_files = {}
+    encode_jobs = {}
+    for (src, dst, settings), key in zip(jobs, keys):
+        if key in cached_files or key in encode_jobs:
+            continue
+        cached = store.lookup_derived(key)
+        if cached is not None:
+            cached_files[key] = cached
+        else:
+            encode_jobs[key] = (src, store.temp_path(".webp"), settings)
+
+    with span("encode_webp", files=len(encode_jobs)):
+        run_jobs(_encode_webp, list(encode_jobs.values()))
+    for key, (src, temp_file, settings) in encode_jobs.items():
+        cached_files[key] = store.store_derived(key, temp_file)
+    store.save()
+
+    # without a destination the caller reads the cached file directly
+    for (src, dst, settings), key in zip(jobs, keys):
+        if dst is None:
+            continue
+        log.info("Transcode file: %s => %s", src, dst)
+        copy_file(cached_files[key], dst, mode)
+
+    return [cached_files[key] for key in keys]
+
+
+def repack_texture(
+    atlas: SpineAtlas,
+    image_path: str,
+    padding: int = 2,
+    allow_rotate: bool = True,
+    power_of_two: bool = False,
+    max_size: int = 4096,
+) -> str:
+    from PIL import Image
+
+    # spine stores rotated regions turned counter-clockwise, undo it to get the upright image
+    unrotate = {
+        90: Image.Transpose.ROTATE_270,
+        180: Image.Transpose.ROTATE_180,
+        270: Image.Transpose.ROTATE_90,
+    }
+
+    page = atlas.pages[0]
+    rects = {}
+    for region in page.regions:
+        rects.setdefault((tuple(region.xy), tuple(region.size), region.rotate), []).append(region)
+
+    # regions aliased to the same pixels by the original packer stay shared
+    sources = list(rects.keys())
+    width, height, placements = pack_rects(
+        [size for _, size, _ in sources],
+        padding=padding,
+        allow_rotate=allow_rotate,
+        power_of_two=power_of_two,
+        max_size=max_size,
+    )
+    if not power_of_two and isinstance(page.size, tuple) and width * height >= page.size[0] * page.size[1]:
+        log.info("Keep texture layout: %s %dx%d", image_path, page.size[0], page.size[1])
+        return image_path
+
+    store = get_asset_store()
+    key = AssetStore.derived_key(
+        "repack", calc_file_digest(image_path, STORE_ALGO), sources, placements, width, height
+    )
+    cached = store.lookup_derived(key)
+
+    if cached is None:
+        with (
+            span("repack_texture", files=1, bytes=os.path.getsize(image_path)),
+            Image.open(image_path) as src,
+        ):
+            src = src.convert("RGBA")
+            out = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+            for (xy, size, rotate), (x, y, rotated) in zip(sources, placements):
+                w, h = (size[1], size[0]) if rotate in (90, 270) else size
+                img = src.crop((xy[0], xy[1], xy[0] + w, xy[1] + h))
+                if rotate in unrotate:
+                    img = img.transpose(unrotate[rotate])
+                if rotated:
+                    img = img.transpose(Image.Transpose.ROTATE_90)
+                out.paste(img, (x, y))
+
+        temp_file = store.temp_path(".png")
+        try:
+            out.save(temp_file, "PNG", compress_level=1)
+            cached = store.store_derived(key, temp_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+        store.save()
+
+    for source, (x, y, rotated) in zip(sources, placements):
+        for region in rects[source]:
+            region.set_rect(x, y, rotated)
+    page.set_size(width, height)
+
+    log.info("Repack texture: %s => %dx%d", image_path, width, height)
+    return cached
+
+
+def layout_title_atlas(
+    png_files: List[str], padding: int = 2, max_size: int = 4096
+) -> Tuple[int, int, Dict[str, Tuple[int, int, int, int]]]:
+    infos = probe_images(png_files)
+    for png_file in png_files:
+        if not isinstance(infos[png_file], ImageInfo):
+            raise ValueError(f"语言标题文件【{png_file} 】不是可识别的图片")
+
+    # titles are text, they are never stored turned
+    sizes = [infos[png_file].size for png_file in png_files]
+    width, height, placements = pack_rects(sizes, padding=padding, allow_rotate=False, max_size=max_size)
+    rects = {png_file: (x, y, w, h) for png_file, (w, h), (x, y, _) in zip(png_files, sizes, placements)}
+    return width, height, rects
+
+
+def render_title_atlas(png_files: List[str], padding: int = 2) -> str:
+    from PIL import Image
+
+    width, height, rects = layout_title_atlas(png_files, padding)
+    store = get_asset_store()
+    key = AssetStore.derived_key(
+        "titles",
+        [calc_file_digest(png_file, STORE_ALGO) for png_file in png_files],
+        [rects[png_file] for png_file in png_files],
+        width,
+        height,
+    )
+    cached = store.lookup_derived(key)
+    if cached is not None:
+        return cached
+
+    with span(
+        "render_title_atlas",
+        files=len(png_files),
+        bytes=sum(os.path.getsize(png_file) for png_file in png_files),
+    ):
+        out = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        for png_file in png_files:
+            with Image.open(png_file) as img:
+                out.paste(img.convert("RGBA"), rects[png_file][:2])
+
+        # titles are mostly palette images, keep the atlas one when no color is lost
+        if out.getcolors(256) is not None:
+            indexed = out.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+            if indexed.convert("RGBA").tobytes() == out.tobytes():
+                out = indexed
+
+    # the atlas is shipped as it is, so it is worth the slower compression
+    temp_file = store.temp_path(".png")
+    try:
+        out.save(temp_file, "PNG", optimize=True)
+        cached = store.store_derived(key, temp_file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    store.save()
+
+    log.info("Pack title atlas: %d files => %dx%d", len(png_files), width, height)
+    return cached
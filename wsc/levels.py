@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import json
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+_BOTTLE_KEYS = ("bottles", "tubes", "bottle", "tube", "cups", "glasses", "data", "level", "layout", "map")
+_CAPACITY_KEYS = ("capacity", "maxcount", "height", "bottleheight", "tubeheight", "layers", "max")
+
+
+class LevelFormatError(ValueError):
+    pass
+
+
+class WaterSortLevel:
+    __slots__ = ("bottles", "capacity", "colors")
+
+    # bottles are listed bottom to top, colors are renumbered from 1 in order of appearance
+    bottles: Tuple[Tuple[int, ...], ...]
+    capacity: int
+    colors: List[Any]
+
+    def __init__(self, bottles: Sequence[Sequence[Any]], capacity: int = None):
+        colors = {}
+        normalized = []
+        for bottle in bottles:
+            normalized.append(tuple(colors.setdefault(c, len(colors) + 1) for c in bottle))
+        self.bottles = tuple(normalized)
+        self.colors = list(colors.keys())
+
+        counts = self.color_counts()
+        longest = max((len(b) for b in self.bottles), default=0)
+        self.capacity = capacity or max([longest] + list(counts.values()))
+        if any(len(b) > self.capacity for b in self.bottles):
+            raise LevelFormatError(f"瓶子中的水超过容量 {self.capacity}")
+        if any(n > self.capacity for n in counts.values()):
+            raise LevelFormatError(f"某种颜色的数量超过瓶子容量 {self.capacity}")
+
+    def color_counts(self) -> Dict[int, int]:
+        counts = {}
+        for bottle in self.bottles:
+            for c in bottle:
+                counts[c] = counts.get(c, 0) + 1
+        return counts
+
+    @classmethod
+    def from_data(cls, data: Any) -> "WaterSortLevel":
+        capacity = _find_capacity(data)
+        bottles = _find_bottles(data)
+        if bottles is None:
+            raise LevelFormatError("没有找到瓶子数据")
+        bottles = [_parse_bottle(b) for b in bottles]
+        if _is_zero_padded(bottles):
+            capacity = capacity or len(bottles[0])
+            bottles = [[v for v in b if v not in (0, "0")] for b in bottles]
+        return cls(bottles, capacity)
+
+    @classmethod
+    def load(cls, path: str) -> "WaterSortLevel":
+        with open(path, "r", encoding="utf-8-sig") as f:
+            try:
+                data = json.load(f)
+            except ValueError as e:
+                raise LevelFormatError(f"JSON 格式错误：{e}")
+        return cls.from_data(data)
+
+
+def _is_empty_cell(value: Any) -> bool:
+    if value is None or value == "":
+        return True
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value < 0
+
+
+def _parse_bottle(bottle: Any) -> List[Any]:
+    if isinstance(bottle, str):
+        bottle = [v.strip() for v in bottle.split(",")]
+    elif isinstance(bottle, dict):
+        bottle = next((v for v in bottle.values() if isinstance(v, list)), [])
+    return [v for v in bottle if not _is_empty_cell(v)]
+
+
+def _is_zero_padded(bottles: List[List[Any]]) -> bool:
+    # fixed size rows where 0 fills the space above the water
+    if len({len(b) for b in bottles}) != 1:
+        return False
+    padded = False
+    for bottle in bottles:
+        zeros = [v in (0, "0") for v in bottle]
+        if any(zeros):
+            first = zeros.index(True)
+            if not all(zeros[first:]):
+                return False
+            padded = True
+    return padded
+
+
+def _is_bottle_list(value: Any) -> bool:
+    if not isinstance(value, list) or len(value) == 0:
+        return False
+    for bottle in value:
+        if isinstance(bottle, str):
+            continue
+        if isinstance(bottle, dict):
+            bottle = next((v for v in bottle.values() if isinstance(v, list)), None)
+        if not isinstance(bottle, list) or any(isinstance(v, (list, dict)) for v in bottle):
+            return False
+    return True
+
+
+def _find_bottles(data: Any) -> Optional[list]:
+    if _is_bottle_list(data):
+        return data
+    if isinstance(data, dict):
+        items = sorted(data.items(), key=lambda kv: f"{kv[0]}".lower() not in _BOTTLE_KEYS)
+        for _, value in items:
+            found = _find_bottles(value)
+            if found is not None:
+                return found
+    return None
+
+
+def _find_capacity(data: Any) -> Optional[int]:
+    if not isinstance(data, dict):
+        return None
+    for key, value in data.items():
+        if f"{key}".lower() in _CAPACITY_KEYS and isinstance(value, int) and not isinstance(value, bool):
+            return value
+    for value in data.values():
+        found = _find_capacity(value)
+        if found is not None:
+            return found
+    return None
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+
+class LevelEntry:
+    __slots__ = ("id", "path", "key")
+
+    # key is the project parameter the path came from, used to point errors at it
+    id: int
+    path: str
+    key: Any
+
+    def __init__(self, id: int, path: str = None, key: Any = None):
+        self.id = id
+        self.path = path or ""
+        self.key = key
+
+    @property
+    def configured(self) -> bool:
+        return len(self.path) > 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.id}-1"
+
+    @property
+    def asset_name(self) -> str:
+        return f"lv{self.name}.json"
+
+    @property
+    def label(self) -> str:
+        return f"关卡{self.id}"
+
+    def __repr__(self):
+        return f"LevelEntry({self.id}, {self.path!r})"
+
+
+class LevelTable:
+    __slots__ = ("_entries", "_index", "_count", "_gap")
+
+    _entries: List[LevelEntry]
+    _index: Dict[int, LevelEntry]
+
+    def __init__(self, slots: Sequence[Tuple[Any, str]] = ()):
+        # slots are (key, path) pairs in level order, ids start from 1
+        self._entries = [LevelEntry(i + 1, path, key) for i, (key, path) in enumerate(slots)]
+        self._index = {entry.id: entry for entry in self._entries}
+
+        # one pass for everything the checks and the config ask for
+        self._count = 0
+        self._gap = None
+        empty_seen = False
+        for entry in self._entries:
+            if not entry.configured:
+                empty_seen = True
+                continue
+            self._count += 1
+            if empty_seen and self._gap is None:
+                self._gap = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[LevelEntry]:
+        return iter(self._entries)
+
+    def get(self, id: int) -> Optional[LevelEntry]:
+        return self._index.get(id)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def first_gap(self) -> Optional[LevelEntry]:
+        return self._gap
+
+    def configured(self) -> List[LevelEntry]:
+        return [entry for entry in self._entries if entry.configured]
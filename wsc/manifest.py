@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+from typing import Any, Dict, Set
+
+from wsc.hashing import calc_file_digest
+from wsc.tracing import log
+
+
+class ExportManifest:
+    FILE_NAME = ".wsc_manifest.json"
+    VERSION = 1
+
+    _entries: Dict[str, Dict[str, Any]]
+    _touched: Set[str]
+
+    def __init__(self, target_dir: str):
+        self._target_dir = os.path.abspath(target_dir)
+        self._entries = {}
+        self._touched = set()
+        self.stats = {"copied": 0, "skipped": 0, "removed": 0}
+        self.load()
+
+    @property
+    def path(self):
+        return os.path.join(self._target_dir, self.FILE_NAME)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == self.VERSION:
+            self._entries = data.get("outputs", {})
+
+    def save(self):
+        data = {"version": self.VERSION, "outputs": dict(sorted(self._entries.items()))}
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(temp_file, self.path)
+
+    def _target(self, name: str):
+        return os.path.join(self._target_dir, name)
+
+    def is_fresh(self, name: str, source: str, params: Dict[str, Any] = None):
+        entry = self._entries.get(name)
+        if entry is None or entry["src"] != source or entry.get("params") != params:
+            return False
+
+        try:
+            src_stat = os.stat(source)
+            dst_stat = os.stat(self._target(name))
+        except OSError:
+            return False
+
+        if dst_stat.st_size != entry["dst_size"] or dst_stat.st_mtime_ns != entry["dst_mtime_ns"]:
+            return False
+
+        if src_stat.st_size != entry["size"]:
+            return False
+
+        # touched but not modified, e.g. re-saved or checked out again
+        if src_stat.st_mtime_ns != entry["mtime_ns"]:
+            if calc_file_digest(source) != entry["hash"]:
+                return False
+            entry["mtime_ns"] = src_stat.st_mtime_ns
+
+        return True
+
+    def keep(self, name: str):
+        self._touched.add(name)
+        self.stats["skipped"] += 1
+
+    def record(self, name: str, source: str, params: Dict[str, Any] = None, digest: str = None):
+        src_stat = os.stat(source)
+        dst_stat = os.stat(self._target(name))
+        self._entries[name] = {
+            "src": source,
+            "size": src_stat.st_size,
+            "mtime_ns": src_stat.st_mtime_ns,
+            "hash": digest or calc_file_digest(source),
+            "params": params,
+            "dst_size": dst_stat.st_size,
+            "dst_mtime_ns": dst_stat.st_mtime_ns,
+        }
+        self._touched.add(name)
+        self.stats["copied"] += 1
+
+    def prune(self):
+        for name in sorted(set(self._entries.keys()) - self._touched):
+            del self._entries[name]
+            if os.path.basename(name) != name:
+                continue
+
+            path = self._target(name)
+            if os.path.isfile(path):
+                log.info("Remove stale file: %s", path)
+                os.remove(path)
+                self.stats["removed"] += 1
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import enum
+import math
+from typing import (
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+# (x, y, rotated)
+Placement = Tuple[int, int, bool]
+
+_SEARCH_BUDGET = 600000
+
+
+class HeuristicEnum(enum.StrEnum):
+    BSSF = "best_short_side_fit"
+    BAF = "best_area_fit"
+    BL = "bottom_left"
+
+
+def _score(heuristic: HeuristicEnum, fx: int, fy: int, fw: int, fh: int, rw: int, rh: int):
+    if heuristic == HeuristicEnum.BL:
+        return fy + rh, fx
+    short, long = sorted((fw - rw, fh - rh))
+    if heuristic == HeuristicEnum.BAF:
+        return fw * fh - rw * rh, short
+    return short, long, fy + rh, fx
+
+
+class MaxRectsPacker:
+    __slots__ = ("width", "height", "allow_rotate", "heuristic", "free_rects", "used_width", "used_height")
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        allow_rotate: bool = True,
+        heuristic: HeuristicEnum = HeuristicEnum.BSSF,
+    ):
+        self.width = width
+        self.height = height
+        self.allow_rotate = allow_rotate
+        self.heuristic = heuristic
+        self.free_rects = [(0, 0, width, height)]
+        self.used_width = 0
+        self.used_height = 0
+
+    def _find_position(self, w: int, h: int) -> Optional[Tuple[int, int, int, int, bool]]:
+        best = None
+        best_score = None
+        for fx, fy, fw, fh in self.free_rects:
+            for rw, rh, rotated in ((w, h, False), (h, w, True)):
+                if rotated and (not self.allow_rotate or w == h):
+                    continue
+                if rw > fw or rh > fh:
+                    continue
+                score = _score(self.heuristic, fx, fy, fw, fh, rw, rh)
+                if best_score is None or score < best_score:
+                    best_score = score
+                    best = (fx, fy, rw, rh, rotated)
+        return best
+
+    def _split(self, x: int, y: int, w: int, h: int):
+        kept = []
+        pieces = []
+        for fx, fy, fw, fh in self.free_rects:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                kept.append((fx, fy, fw, fh))
+                continue
+            if x > fx:
+                pieces.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                pieces.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                pieces.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                pieces.append((fx, y + h, fw, fy + fh - y - h))
+
+        # the list is kept pruned, only the new pieces can be contained in another rectangle
+        pieces.sort(key=lambda r: r[2] * r[3], reverse=True)
+        for rx, ry, rw, rh in pieces:
+            rr, rb = rx + rw, ry + rh
+            if not any(
+                px <= rx and py <= ry and rr <= px + pw and rb <= py + ph for px, py, pw, ph in kept
+            ):
+                kept.append((rx, ry, rw, rh))
+        self.free_rects = kept
+
+    def insert(self, w: int, h: int) -> Optional[Placement]:
+        found = self._find_position(w, h)
+        if found is None:
+            return None
+        x, y, rw, rh, rotated = found
+        self._split(x, y, rw, rh)
+        self.used_width = max(self.used_width, x + rw)
+        self.used_height = max(self.used_height, y + rh)
+        return x, y, rotated
+
+
+def _next_pot(value: int) -> int:
+    return 1 << max(0, value - 1).bit_length()
+
+
+def _try_pack(sizes, order, width, max_size, padding, allow_rotate, heuristic):
+    packer = MaxRectsPacker(width + padding, max_size + padding, allow_rotate, heuristic)
+    placements = [None] * len(sizes)
+    for i in order:
+        w, h = sizes[i]
+        placement = packer.insert(w + padding, h + padding)
+        if placement is None:
+            return None
+        placements[i] = placement
+    return packer.used_width - padding, packer.used_height - padding, placements
+
+
+def _candidate_widths(
+    min_width: int, area: int, max_size: int, power_of_two: bool, count: int
+) -> List[int]:
+    if power_of_two:
+        widths = []
+        w = _next_pot(min_width)
+        while w <= max_size:
+            widths.append(w)
+            w *= 2
+        return widths
+
+    # square-ish pages are the usual optimum, sample widths geometrically around it
+    side = math.sqrt(area)
+    if count == 1:
+        return [min(max_size, max(min_width, int(side)))]
+    ratio = 2.8 ** (1 / (count - 1))
+    return sorted({min(max_size, max(min_width, int(side * 0.7 * ratio**i))) for i in range(count)})
+
+
+def pack_rects(
+    sizes: Sequence[Tuple[int, int]],
+    padding: int = 2,
+    allow_rotate: bool = True,
+    power_of_two: bool = False,
+    max_size: int = 4096,
+) -> Tuple[int, int, List[Placement]]:
+    if not sizes:
+        return 0, 0, []
+
+    orders = [
+        sorted(range(len(sizes)), key=lambda i: (max(sizes[i]), min(sizes[i])), reverse=True),
+        sorted(range(len(sizes)), key=lambda i: (sizes[i][0] * sizes[i][1], max(sizes[i])), reverse=True),
+    ]
+    heuristics = [HeuristicEnum.BL, HeuristicEnum.BSSF]
+
+    # a single pass costs about n^2, keep the whole search within a fixed budget
+    passes = max(1, _SEARCH_BUDGET // len(sizes) ** 2)
+    if passes < 16:
+        heuristics, orders = heuristics[:1], orders[:1]
+    count = min(48, max(1, passes // (len(heuristics) * len(orders))))
+
+    area = sum((w + padding) * (h + padding) for w, h in sizes)
+    min_side = max(min(w, h) if allow_rotate else w for w, h in sizes)
+
+    best = None
+    for width in _candidate_widths(min_side, area, max_size, power_of_two, count):
+        for heuristic in heuristics:
+            for order in orders:
+                packed = _try_pack(sizes, order, width, max_size, padding, allow_rotate, heuristic)
+                if packed is None:
+                    continue
+                used_w, used_h, placements = packed
+                if power_of_two:
+                    used_w, used_h = _next_pot(used_w), _next_pot(used_h)
+                if used_w > max_size or used_h > max_size:
+                    continue
+                score = (used_w * used_h, max(used_w, used_h))
+                if best is None or score < best[0]:
+                    best = (score, used_w, used_h, placements)
+
+    if best is None:
+        raise ValueError(f"无法将 {len(sizes)} 个区域打包到 {max_size}x{max_size} 以内")
+
+    _, width, height, placements = best
+    return width, height, placements
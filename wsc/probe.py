@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+import enum
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    BinaryIO,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from wsc.tracing import span
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# SOF0..SOF15 without DHT (C4), JPG (C8) and DAC (CC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# markers without a length field
+_JPEG_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+# a header further in than this is not worth looking for
+_MAX_SCAN_BYTES = 16 * 1024 * 1024
+
+
+class ImageFormatEnum(enum.StrEnum):
+    PNG = "png"
+    JPEG = "jpeg"
+    WEBP = "webp"
+
+
+class ColorTypeEnum(enum.StrEnum):
+    GRAY = "gray"
+    GRAY_ALPHA = "gray_alpha"
+    RGB = "rgb"
+    RGBA = "rgba"
+    PALETTE = "palette"
+    CMYK = "cmyk"
+
+
+_PNG_COLOR_TYPES = {
+    0: ColorTypeEnum.GRAY,
+    2: ColorTypeEnum.RGB,
+    3: ColorTypeEnum.PALETTE,
+    4: ColorTypeEnum.GRAY_ALPHA,
+    6: ColorTypeEnum.RGBA,
+}
+
+_JPEG_COMPONENTS = {
+    1: ColorTypeEnum.GRAY,
+    3: ColorTypeEnum.RGB,
+    4: ColorTypeEnum.CMYK,
+}
+
+
+class ImageProbeError(ValueError):
+    pass
+
+
+class ImageInfo:
+    __slots__ = ("format", "width", "height", "color_type", "bit_depth", "has_alpha")
+
+    def __init__(
+        self,
+        format: ImageFormatEnum,
+        width: int,
+        height: int,
+        color_type: ColorTypeEnum,
+        bit_depth: int = 8,
+        has_alpha: bool = False,
+    ):
+        self.format = format
+        self.width = width
+        self.height = height
+        self.color_type = color_type
+        self.bit_depth = bit_depth
+        self.has_alpha = has_alpha
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def to_dict(self) -> Dict[str, Union[str, int, bool]]:
+        return {
+            "format": f"{self.format}",
+            "width": self.width,
+            "height": self.height,
+            "color_type": f"{self.color_type}",
+            "bit_depth": self.bit_depth,
+            "has_alpha": self.has_alpha,
+        }
+
+    def __repr__(self):
+        return f"ImageInfo({self.format}, {self.width}x{self.height}, {self.color_type})"
+
+
+def _read_exact(f: BinaryIO, n: int) -> bytes:
+    data = f.read(n)
+    if len(data) != n:
+        raise ImageProbeError("文件不完整")
+    return data
+
+
+def _probe_png(f: BinaryIO) -> ImageInfo:
+    length, kind = struct.unpack(">I4s", _read_exact(f, 8))
+    if kind != b"IHDR" or length != 13:
+        raise ImageProbeError("缺少 IHDR")
+    width, height, bit_depth, color = struct.unpack(">IIBB", _read_exact(f, 10))
+    if color not in _PNG_COLOR_TYPES:
+        raise ImageProbeError(f"未知的颜色类型 {color}")
+    color_type = _PNG_COLOR_TYPES[color]
+    has_alpha = color_type in (ColorTypeEnum.GRAY_ALPHA, ColorTypeEnum.RGBA)
+
+    # transparency of the other color types is a tRNS chunk, which comes before the pixel data
+    f.seek(3 + 4, os.SEEK_CUR)
+    while not has_alpha and f.tell() < _MAX_SCAN_BYTES:
+        header = f.read(8)
+        if len(header) != 8:
+            break
+        length, kind = struct.unpack(">I4s", header)
+        if kind in (b"IDAT", b"IEND"):
+            break
+        has_alpha = kind == b"tRNS"
+        f.seek(length + 4, os.SEEK_CUR)
+
+    return ImageInfo(ImageFormatEnum.PNG, width, height, color_type, bit_depth, has_alpha)
+
+
+def _probe_jpeg(f: BinaryIO) -> ImageInfo:
+    while f.tell() < _MAX_SCAN_BYTES:
+        byte = _read_exact(f, 1)
+        if byte != b"\xff":
+            continue
+        marker = _read_exact(f, 1)[0]
+        # fill bytes before a marker
+        while marker == 0xFF:
+            marker = _read_exact(f, 1)[0]
+        if marker == 0x00 or marker in _JPEG_STANDALONE:
+            continue
+        # the pixel data starts without the frame header having been seen
+        if marker in (0xD9, 0xDA):
+            break
+
+        (length,) = struct.unpack(">H", _read_exact(f, 2))
+        if marker in _JPEG_SOF:
+            bit_depth, height, width, components = struct.unpack(">BHHB", _read_exact(f, 6))
+            if components not in _JPEG_COMPONENTS:
+                raise ImageProbeError(f"未知的颜色分量数 {components}")
+            return ImageInfo(ImageFormatEnum.JPEG, width, height, _JPEG_COMPONENTS[components], bit_depth)
+        f.seek(length - 2, os.SEEK_CUR)
+
+    raise ImageProbeError("缺少 SOF")
+
+
+def _probe_webp(f: BinaryIO) -> ImageInfo:
+    kind, length = struct.unpack("<4sI", _read_exact(f, 8))
+    data = _read_exact(f, min(length, 10))
+    if kind == b"VP8X":
+        flags = data[0]
+        width = int.from_bytes(data[4:7], "little") + 1
+        height = int.from_bytes(data[7:10], "little") + 1
+        has_alpha = bool(flags & 0x10)
+    elif kind == b"VP8L":
+        if data[0] != 0x2F:
+            raise ImageProbeError("VP8L 签名错误")
+        bits = int.from_bytes(data[1:5], "little")
+        width = (bits & 0x3FFF) + 1
+        height = ((bits >> 14) & 0x3FFF) + 1
+        has_alpha = bool(bits >> 28 & 1)
+    elif kind == b"VP8 ":
+        if data[3:6] != b"\x9d\x01\x2a":
+            raise ImageProbeError("VP8 起始码错误")
+        width, height = struct.unpack("<HH", data[6:10])
+        width, height = width & 0x3FFF, height & 0x3FFF
+        has_alpha = False
+    else:
+        raise ImageProbeError(f"未知的 WebP 数据块 {kind!r}")
+
+    color_type = ColorTypeEnum.RGBA if has_alpha else ColorTypeEnum.RGB
+    return ImageInfo(ImageFormatEnum.WEBP, width, height, color_type, 8, has_alpha)
+
+
+def read_image_info(path: str) -> Optional[ImageInfo]:
+    # only the header is read, the pixels are never decoded
+    with span("probe_image", "io", files=1), open(path, "rb") as f:
+        head = f.read(12)
+        if head[:8] == _PNG_SIGNATURE:
+            f.seek(8)
+            return _probe_png(f)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _probe_jpeg(f)
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _probe_webp(f)
+    return None
+
+
+_PROBES = {}
+_LOCK = threading.Lock()
+
+
+def _file_key(st: os.stat_result) -> Tuple[int, int, int]:
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def probe_image(path: str) -> Optional[ImageInfo]:
+    # results are kept per file identity, a rewritten file is probed again
+    path = os.path.abspath(path)
+    key = _file_key(os.stat(path))
+    with _LOCK:
+        cached = _PROBES.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    info = read_image_info(path)
+    with _LOCK:
+        _PROBES[path] = (key, info)
+    return info
+
+
+def probe_images(paths: List[str], max_workers: int = None) -> Dict[str, Union[ImageInfo, None, Exception]]:
+    # an unreadable file maps to its error instead of failing the others
+    def _probe(path: str):
+        try:
+            return probe_image(path)
+        except (OSError, ImageProbeError) as e:
+            return e
+
+    results = {}
+    todo = []
+    for path in dict.fromkeys(paths):
+        try:
+            key = _file_key(os.stat(path))
+        except OSError as e:
+            results[path] = e
+            continue
+        with _LOCK:
+            cached = _PROBES.get(os.path.abspath(path))
+        if cached is not None and cached[0] == key:
+            results[path] = cached[1]
+        else:
+            todo.append(path)
+
+    # only files not probed before are opened, the headers are read in parallel
+    if len(todo) == 1:
+        results[todo[0]] = _probe(todo[0])
+    elif len(todo) > 1:
+        with ThreadPoolExecutor(
+            max_workers=max_workers or min(len(todo), 8), thread_name_prefix="wsc-probe"
+        ) as pool:
+            results.update(zip(todo, pool.map(_probe, todo)))
+    return {path: results[path] for path in dict.fromkeys(paths)}
+
+
+def clear_probe_cache():
+    with _LOCK:
+        _PROBES.clear()
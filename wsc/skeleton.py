@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+import enum
+import struct
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+_FLOAT = struct.Struct(">f")
+_INT = struct.Struct(">i")
+
+
+class AttachmentTypeEnum(enum.IntEnum):
+    REGION = 0
+    BOUNDING_BOX = 1
+    MESH = 2
+    LINKED_MESH = 3
+    PATH = 4
+    POINT = 5
+    CLIPPING = 6
+
+
+# attachments drawn with a texture region from the atlas
+_TEXTURED = {AttachmentTypeEnum.REGION, AttachmentTypeEnum.MESH, AttachmentTypeEnum.LINKED_MESH}
+
+
+class SkeletonFormatError(ValueError):
+    pass
+
+
+class _SkelInput:
+    __slots__ = ("data", "pos", "strings")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+        self.strings = []
+
+    def _take(self, count: int) -> bytes:
+        end = self.pos + count
+        if end > len(self.data):
+            raise SkeletonFormatError(f"文件在偏移 {self.pos} 处意外结束")
+        chunk = self.data[self.pos : end]
+        self.pos = end
+        return chunk
+
+    def byte(self) -> int:
+        return struct.unpack(">b", self._take(1))[0]
+
+    def boolean(self) -> bool:
+        return self._take(1) != b"\x00"
+
+    def int32(self) -> int:
+        return _INT.unpack(self._take(4))[0]
+
+    def varint(self, optimize_positive: bool = True) -> int:
+        result = 0
+        for shift in range(0, 35, 7):
+            b = self._take(1)[0]
+            result |= (b & 0x7F) << shift
+            if not b & 0x80:
+                break
+        if not optimize_positive:
+            return (result >> 1) ^ -(result & 1)
+        return result
+
+    def float32(self) -> float:
+        return _FLOAT.unpack(self._take(4))[0]
+
+    def skip(self, count: int):
+        self._take(count)
+
+    def string(self) -> Optional[str]:
+        count = self.varint()
+        if count == 0:
+            return None
+        return self._take(count - 1).decode("utf-8")
+
+    def string_ref(self) -> Optional[str]:
+        index = self.varint()
+        if index == 0:
+            return None
+        if index > len(self.strings):
+            raise SkeletonFormatError(f"字符串索引 {index} 越界")
+        return self.strings[index - 1]
+
+
+class SkelAttachment:
+    __slots__ = ("name", "type", "path")
+
+    def __init__(self, name: str, type: AttachmentTypeEnum, path: Optional[str]):
+        self.name = name
+        self.type = type
+        self.path = path
+
+
+class SpineSkeleton:
+    __slots__ = (
+        "hash",
+        "version",
+        "nonessential",
+        "bones",
+        "slots",
+        "setup",
+        "skins",
+        "events",
+        "animations",
+        "_data",
+        "_anim_offset",
+        "_anim_spans",
+    )
+
+    SUPPORTED_VERSION = "3.8"
+
+    hash: str
+    version: str
+    bones: List[str]
+    slots: List[str]
+    setup: Dict[int, str]
+    skins: Dict[str, Dict[Tuple[int, str], SkelAttachment]]
+    events: List[Tuple[str, bool]]
+    animations: Dict[str, Set[Tuple[int, str]]]
+
+    def __init__(self):
+        self.hash = ""
+        self.version = ""
+        self.nonessential = False
+        self.bones = []
+        self.slots = []
+        self.setup = {}
+        self.skins = {}
+        self.events = []
+        self.animations = {}
+        self._data = b""
+        self._anim_offset = 0
+        self._anim_spans = {}
+
+    @classmethod
+    def loads(cls, data: bytes) -> "SpineSkeleton":
+        skel = cls()
+        skel._data = data
+        inp = _SkelInput(data)
+        try:
+            skel._read(inp)
+        except (struct.error, UnicodeDecodeError, IndexError) as e:
+            raise SkeletonFormatError(f"在偏移 {inp.pos} 处解析失败：{e}")
+        return skel
+
+    @classmethod
+    def load(cls, path: str) -> "SpineSkeleton":
+        with open(path, "rb") as f:
+            return cls.loads(f.read())
+
+    def _read(self, inp: _SkelInput):
+        self.hash = inp.string() or ""
+        self.version = inp.string() or ""
+        if not self.version.startswith(f"{self.SUPPORTED_VERSION}."):
+            raise SkeletonFormatError(f"不支持的 Spine 版本【{self.version} 】，只支持 3.8 的二进制格式")
+
+        inp.skip(16)  # x, y, width, height
+        self.nonessential = inp.boolean()
+        if self.nonessential:
+            inp.skip(4)  # fps
+            inp.string()  # images path
+            inp.string()  # audio path
+
+        inp.strings = [inp.string() for _ in range(inp.varint())]
+
+        for i in range(inp.varint()):
+            self.bones.append(inp.string())
+            if i > 0:
+                inp.varint()  # parent
+            inp.skip(32)  # rotation, x, y, scaleX, scaleY, shearX, shearY, length
+            inp.varint()  # transform mode
+            inp.boolean()  # skin required
+            if self.nonessential:
+                inp.skip(4)  # color
+
+        for i in range(inp.varint()):
+            self.slots.append(inp.string())
+            inp.varint()  # bone
+            inp.skip(8)  # color, dark color
+            attachment = inp.string_ref()
+            if attachment is not None:
+                self.setup[i] = attachment
+            inp.varint()  # blend mode
+
+        self._read_constraints(inp)
+
+        default_skin = self._read_skin(inp, default=True)
+        if default_skin is not None:
+            self.skins["default"] = default_skin
+        for _ in range(inp.varint()):
+            name = inp.string_ref()
+            self.skins[name] = self._read_skin(inp, default=False)
+
+        for _ in range(inp.varint()):
+            name = inp.string_ref()
+            inp.varint(optimize_positive=False)
+            inp.skip(4)  # float value
+            inp.string()
+            audio = inp.string()
+            if audio is not None:
+                inp.skip(8)  # volume, balance
+            self.events.append((name, audio is not None))
+
+        self._anim_offset = inp.pos
+        for _ in range(inp.varint()):
+            start = inp.pos
+            name = inp.string()
+            self.animations[name] = self._read_animation(inp)
+            self._anim_spans[name] = (start, inp.pos)
+
+        if inp.pos != len(inp.data):
+            raise SkeletonFormatError(f"文件末尾有 {len(inp.data) - inp.pos} 字节无法识别")
+
+    def _read_constraints(self, inp: _SkelInput):
+        # ik
+        for _ in range(inp.varint()):
+            inp.string()
+            inp.varint()  # order
+            inp.boolean()  # skin required
+            for _ in range(inp.varint()):
+                inp.varint()
+            inp.varint()  # target
+            inp.skip(8)  # mix, softness
+            inp.skip(4)  # bend direction, compress, stretch, uniform
+
+        # transform
+        for _ in range(inp.varint()):
+            inp.string()
+            inp.varint()
+            inp.boolean()
+            for _ in range(inp.varint()):
+                inp.varint()
+            inp.varint()
+            inp.skip(2)  # local, relative
+            inp.skip(40)  # 6 offsets, 4 mixes
+
+        # path
+        for _ in range(inp.varint()):
+            inp.string()
+            inp.varint()
+            inp.boolean()
+            for _ in range(inp.varint()):
+                inp.varint()
+            inp.varint()  # target slot
+            inp.varint()  # position mode
+            inp.varint()  # spacing mode
+            inp.varint()  # rotate mode
+            inp.skip(20)  # offset rotation, position, spacing, rotate mix, translate mix
+
+    def _read_skin(self, inp: _SkelInput, default: bool) -> Optional[Dict[Tuple[int, str], SkelAttachment]]:
+        if default:
+            slot_count = inp.varint()
+            if slot_count == 0:
+                return None
+        else:
+            for _ in range(4):  # bones, ik, transform and path constraints
+                for _ in range(inp.varint()):
+                    inp.varint()
+            slot_count = inp.varint()
+
+        skin = {}
+        for _ in range(slot_count):
+            slot = inp.varint()
+            for _ in range(inp.varint()):
+                key = inp.string_ref()
+                skin[(slot, key)] = self._read_attachment(inp, key)
+        return skin
+
+    def _read_vertices(self, inp: _SkelInput, vertex_count: int):
+        if not inp.boolean():
+            inp.skip(vertex_count * 8)
+            return
+        for _ in range(vertex_count):
+            for _ in range(inp.varint()):
+                inp.varint()  # bone
+                inp.skip(12)  # x, y, weight
+
+    def _read_attachment(self, inp: _SkelInput, key: str) -> SkelAttachment:
+        name = inp.string_ref() or key
+        try:
+            type = AttachmentTypeEnum(inp.byte())
+        except ValueError as e:
+            raise SkeletonFormatError(f"附件【{name} 】类型无效：{e}")
+
+        path = None
+        nonessential = self.nonessential
+        if type == AttachmentTypeEnum.REGION:
+            path = inp.string_ref()
+            inp.skip(28)  # rotation, x, y, scaleX, scaleY, width, height
+            inp.skip(4)  # color
+        elif type == AttachmentTypeEnum.BOUNDING_BOX:
+            self._read_vertices(inp, inp.varint())
+            if nonessential:
+                inp.skip(4)
+        elif type == AttachmentTypeEnum.MESH:
+            path = inp.string_ref()
+            inp.skip(4)  # color
+            vertex_count = inp.varint()
+            inp.skip(vertex_count * 8)  # uvs
+            inp.skip(inp.varint() * 2)  # triangles
+            self._read_vertices(inp, vertex_count)
+            inp.varint()  # hull length
+            if nonessential:
+                inp.skip(inp.varint() * 2)  # edges
+                inp.skip(8)  # width, height
+        elif type == AttachmentTypeEnum.LINKED_MESH:
+            path = inp.string_ref()
+            inp.skip(4)  # color
+            inp.string_ref()  # skin
+            inp.string_ref()  # parent
+            inp.boolean()  # inherit deform
+            if nonessential:
+                inp.skip(8)
+        elif type == AttachmentTypeEnum.PATH:
+            inp.skip(2)  # closed, constant speed
+            vertex_count = inp.varint()
+            self._read_vertices(inp, vertex_count)
+            inp.skip(vertex_count // 3 * 4)  # lengths
+            if nonessential:
+                inp.skip(4)
+        elif type == AttachmentTypeEnum.POINT:
+            inp.skip(12)
+            if nonessential:
+                inp.skip(4)
+        elif type == AttachmentTypeEnum.CLIPPING:
+            inp.varint()  # end slot
+            self._read_vertices(inp, inp.varint())
+            if nonessential:
+                inp.skip(4)
+
+        if type in _TEXTURED and path is None:
+            path = name
+        return SkelAttachment(name, type, path)
+
+    @staticmethod
+    def _skip_curve(inp: _SkelInput, frame: int, frame_count: int):
+        if frame < frame_count - 1 and inp.byte() == 2:  # bezier
+            inp.skip(16)
+
+    def _read_frames(self, inp: _SkelInput, frame_size: int):
+        frame_count = inp.varint()
+        for frame in range(frame_count):
+            inp.skip(frame_size)
+            self._skip_curve(inp, frame, frame_count)
+
+    def _read_animation(self, inp: _SkelInput) -> Set[Tuple[int, str]]:
+        used = set()
+
+        # slot timelines
+        for _ in range(inp.varint()):
+            slot = inp.varint()
+            for _ in range(inp.varint()):
+                timeline = inp.byte()
+                if timeline == 0:  # attachment
+                    for _ in range(inp.varint()):
+                        inp.skip(4)
+                        name = inp.string_ref()
+                        if name is not None:
+                            used.add((slot, name))
+                elif timeline == 1:  # color
+                    self._read_frames(inp, 8)
+                elif timeline == 2:  # two color
+                    self._read_frames(inp, 12)
+                else:
+                    raise SkeletonFormatError(f"未知的插槽时间线类型 {timeline}")
+
+        # bone timelines: rotate has one value, translate, scale and shear have two
+        for _ in range(inp.varint()):
+            inp.varint()
+            for _ in range(inp.varint()):
+                timeline = inp.byte()
+                if timeline not in (0, 1, 2, 3):
+                    raise SkeletonFormatError(f"未知的骨骼时间线类型 {timeline}")
+                self._read_frames(inp, 8 if timeline == 0 else 12)
+
+        # ik: time, mix, softness, bend direction, compress, stretch
+        for _ in range(inp.varint()):
+            inp.varint()
+            self._read_frames(inp, 15)
+
+        # transform: time and 4 mixes
+        for _ in range(inp.varint()):
+            inp.varint()
+            self._read_frames(inp, 20)
+
+        # path: position and spacing have one value, mix has two
+        for _ in range(inp.varint()):
+            inp.varint()
+            for _ in range(inp.varint()):
+                timeline = inp.byte()
+                if timeline not in (0, 1, 2):
+                    raise SkeletonFormatError(f"未知的路径时间线类型 {timeline}")
+                self._read_frames(inp, 12 if timeline == 2 else 8)
+
+        # deform
+        for _ in range(inp.varint()):
+            inp.varint()  # skin
+            for _ in range(inp.varint()):
+                slot = inp.varint()
+                for _ in range(inp.varint()):
+                    used.add((slot, inp.string_ref()))
+                    frame_count = inp.varint()
+                    for frame in range(frame_count):
+                        inp.skip(4)
+                        end = inp.varint()
+                        if end != 0:
+                            inp.varint()  # start
+                            inp.skip(end * 4)
+                        self._skip_curve(inp, frame, frame_count)
+
+        # draw order
+        for _ in range(inp.varint()):
+            inp.skip(4)
+            for _ in range(inp.varint()):
+                inp.varint()
+                inp.varint()
+
+        # events
+        for _ in range(inp.varint()):
+            inp.skip(4)
+            index = inp.varint()
+            if index >= len(self.events):
+                raise SkeletonFormatError(f"事件索引 {index} 越界")
+            inp.varint(optimize_positive=False)
+            inp.skip(4)
+            if inp.boolean():
+                inp.string()
+            if self.events[index][1]:
+                inp.skip(8)
+
+        return used
+
+    def _lookup(self, slot: int, name: str) -> Iterable[SkelAttachment]:
+        for skin in self.skins.values():
+            attachment = skin.get((slot, name))
+            if attachment is not None:
+                yield attachment
+
+    def region_names(self, animations: Iterable[str] = None) -> Set[str]:
+        names = set()
+        if animations is None:
+            for skin in self.skins.values():
+                names.update(a.path for a in skin.values() if a.path is not None)
+            return names
+
+        keys = set(self.setup.items())
+        for animation in animations:
+            keys.update(self.animations[animation])
+        for slot, name in keys:
+            names.update(a.path for a in self._lookup(slot, name) if a.path is not None)
+        return names
+
+    def animation_regions(self, animation: str) -> Set[str]:
+        return {
+            a.path for slot, name in self.animations[animation] for a in self._lookup(slot, name) if a.path
+        }
+
+    def drop_animations(self, names: Iterable[str]) -> int:
+        names = set(names) & set(self.animations)
+        for name in names:
+            del self.animations[name]
+        return len(names)
+
+    def dumps(self) -> bytes:
+        # animations are the tail of the file, kept ones are copied byte for byte
+        kept = [self._anim_spans[name] for name in self.animations]
+        count = len(kept)
+        prefix = bytearray()
+        while True:
+            b = count & 0x7F
+            count >>= 7
+            prefix.append(b | (0x80 if count else 0))
+            if not count:
+                break
+        parts = [self._data[: self._anim_offset], bytes(prefix)]
+        parts.extend(self._data[start:end] for start, end in kept)
+        return b"".join(parts)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.dumps())
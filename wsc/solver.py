@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+import heapq
+import itertools
+import time
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from wsc.hashing import calc_file_digest
+from wsc.levels import WaterSortLevel
+from wsc.workers import run_jobs
+
+State = Tuple[Tuple[int, ...], ...]
+Move = Tuple[int, int]
+
+_RESULTS = {}
+
+
+class SolveResult:
+    __slots__ = ("solvable", "moves", "optimal", "solution", "expanded", "elapsed")
+
+    # solvable is None when the search ran out of budget before finding anything
+    solvable: Optional[bool]
+    moves: Optional[int]
+    optimal: bool
+    solution: List[Move]
+
+    def __init__(self, solvable=None, moves=None, optimal=False, solution=None, expanded=0, elapsed=0.0):
+        self.solvable = solvable
+        self.moves = moves
+        self.optimal = optimal
+        self.solution = solution or []
+        self.expanded = expanded
+        self.elapsed = elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "solvable": self.solvable,
+            "moves": self.moves,
+            "optimal": self.optimal,
+            "solution": [list(m) for m in self.solution],
+            "expanded": self.expanded,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+def _canonical(state: State) -> State:
+    # bottles are interchangeable, so permutations of a state are the same node
+    return tuple(sorted(state))
+
+
+def _heuristic(state: State) -> int:
+    # the goal has one run per color and every pour merges at most one pair of runs,
+    # a color that is not at the bottom of any bottle also needs a pour into an empty one
+    runs = 0
+    bottoms = set()
+    for bottle in state:
+        if bottle:
+            bottoms.add(bottle[0])
+            prev = None
+            for c in bottle:
+                if c != prev:
+                    runs += 1
+                    prev = c
+    return runs - len(bottoms)
+
+
+def _is_solved(state: State) -> bool:
+    seen = set()
+    for bottle in state:
+        if not bottle:
+            continue
+        color = bottle[0]
+        if color in seen or any(c != color for c in bottle):
+            return False
+        seen.add(color)
+    return True
+
+
+def _moves(state: State, capacity: int, counts: Dict[int, int]):
+    for i, src in enumerate(state):
+        if not src:
+            continue
+        color = src[-1]
+        run = 1
+        while run < len(src) and src[-run - 1] == color:
+            run += 1
+        uniform = run == len(src)
+        if uniform and run == counts[color]:
+            # the color is already gathered in this bottle
+            continue
+
+        tried_empty = False
+        for j, dst in enumerate(state):
+            if i == j or len(dst) == capacity:
+                continue
+            if dst:
+                if dst[-1] != color:
+                    continue
+            else:
+                # any empty bottle is as good as another, and moving a whole bottle changes nothing
+                if uniform or tried_empty:
+                    continue
+                tried_empty = True
+
+            amount = min(run, capacity - len(dst))
+            child = list(state)
+            child[i] = src[:-amount]
+            child[j] = dst + (color,) * amount
+            yield (i, j), tuple(child)
+
+
+def _replay(start: State, keys: List[State], capacity: int, counts: Dict[int, int]) -> List[Move]:
+    # the search stores canonical states only, map them back to moves on the real bottles
+    solution = []
+    state = start
+    for key in keys[1:]:
+        for move, child in _moves(state, capacity, counts):
+            if _canonical(child) == key:
+                solution.append(move)
+                state = child
+                break
+    return solution
+
+
+def _greedy(start: State, capacity: int, counts: Dict[int, int], max_nodes: int, deadline: float):
+    # depth first search ordered by the heuristic, finds some solution when A* runs out of budget
+    stack = [(start, [])]
+    seen = {_canonical(start)}
+    expanded = 0
+    while stack:
+        state, path = stack.pop()
+        if _is_solved(state):
+            return True, path, expanded
+        expanded += 1
+        if expanded > max_nodes or time.monotonic() > deadline:
+            return None, [], expanded
+        children = []
+        for move, child in _moves(state, capacity, counts):
+            key = _canonical(child)
+            if key not in seen:
+                seen.add(key)
+                children.append((_heuristic(child), move, child))
+        children.sort(key=lambda c: c[0], reverse=True)
+        stack.extend((child, path + [move]) for _, move, child in children)
+    return False, [], expanded
+
+
+def solve(
+    bottles: Sequence[Sequence[int]],
+    capacity: int,
+    max_nodes: int = 300000,
+    time_limit: float = 5.0,
+) -> SolveResult:
+    started = time.monotonic()
+    deadline = started + time_limit
+    start = tuple(tuple(b) for b in bottles)
+    counts = {}
+    for bottle in start:
+        for c in bottle:
+            counts[c] = counts.get(c, 0) + 1
+
+    start_key = _canonical(start)
+    best_g = {start_key: 0}
+    parents = {start_key: None}
+    tie = itertools.count()
+    queue = [(_heuristic(start), 0, next(tie), start)]
+    expanded = 0
+
+    while queue:
+        _, g, _, state = heapq.heappop(queue)
+        g = -g
+        key = _canonical(state)
+        if g > best_g[key]:
+            continue
+        if _is_solved(state):
+            keys = []
+            while key is not None:
+                keys.append(key)
+                key = parents[key]
+            solution = _replay(start, keys[::-1], capacity, counts)
+            return SolveResult(True, g, True, solution, expanded, time.monotonic() - started)
+
+        expanded += 1
+        if expanded > max_nodes or time.monotonic() > deadline:
+            break
+
+        for _, child in _moves(state, capacity, counts):
+            child_key = _canonical(child)
+            if g + 1 < best_g.get(child_key, g + 2):
+                best_g[child_key] = g + 1
+                parents[child_key] = key
+                f = g + 1 + _heuristic(child)
+                # prefer deeper nodes on equal f, they are closer to a solution
+                heapq.heappush(queue, (f, -(g + 1), next(tie), child))
+    else:
+        return SolveResult(False, None, True, [], expanded, time.monotonic() - started)
+
+    solvable, path, more = _greedy(start, capacity, counts, max_nodes, deadline + time_limit)
+    elapsed = time.monotonic() - started
+    if not solvable:
+        return SolveResult(solvable, None, solvable is False, [], expanded + more, elapsed)
+    return SolveResult(True, len(path), False, path, expanded + more, elapsed)
+
+
+def solve_level(level: WaterSortLevel, max_nodes: int = 300000, time_limit: float = 5.0) -> SolveResult:
+    return solve(level.bottles, level.capacity, max_nodes, time_limit)
+
+
+def _solve_file(path: str, max_nodes: int, time_limit: float) -> Dict[str, Any]:
+    try:
+        level = WaterSortLevel.load(path)
+    except (OSError, ValueError) as e:
+        return {"error": f"{e}"}
+
+    result = solve_level(level, max_nodes, time_limit).to_dict()
+    result["bottles"] = len(level.bottles)
+    result["capacity"] = level.capacity
+    result["colors"] = len(level.colors)
+    return result
+
+
+def solve_level_files(
+    paths: Sequence[str],
+    max_nodes: int = 300000,
+    time_limit: float = 5.0,
+) -> List[Dict[str, Any]]:
+    # results are kept per file content, the inline checks ask again on every edit
+    keys = [(calc_file_digest(path), max_nodes, time_limit) for path in paths]
+    todo = {}
+    for path, key in zip(paths, keys):
+        if key not in _RESULTS and key not in todo:
+            todo[key] = (path, max_nodes, time_limit)
+
+    for key, result in zip(todo.keys(), run_jobs(_solve_file, list(todo.values()))):
+        _RESULTS[key] = result
+
+    return [_RESULTS[key] for key in keys]
+
+
+def clear_solver_cache():
+    _RESULTS.clear()
+
+
+def suggest_n_value(moves: int) -> int:
+    # the jump should fire before a perfect player can finish the last level
+    return max(1, moves - 1)
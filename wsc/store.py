@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+from wsc.copier import (
+    CopyModeEnum,
+    CopyStrategyEnum,
+    copy_file,
+)
+from wsc.hashing import (
+    copy_and_hash,
+    default_cache_dir,
+    get_hash_cache,
+)
+
+STORE_ALGO = "sha256"
+
+# objects not used for this long are dropped first when the store is over its size cap
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# leftovers of interrupted writes
+_TEMP_MAX_AGE_NS = 3600 * 1_000_000_000
+
+
+def _max_bytes_from_env() -> int:
+    try:
+        return int(os.environ["WSC_STORE_MAX_BYTES"])
+    except (KeyError, ValueError):
+        return DEFAULT_MAX_BYTES
+
+
+class AssetStore:
+    VERSION = 1
+
+    # digest -> [size, last_used_ns], derivation key -> digest
+    _objects: Dict[str, List[int]]
+    _derived: Dict[str, str]
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self._objects = None
+        self._derived = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root, "index.json")
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest[2:])
+
+    def temp_path(self, suffix: str = "") -> str:
+        # producers write here, the same file system lets a finished file be renamed into place
+        folder = os.path.join(self.root, "tmp")
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, f"{uuid.uuid4().hex}{suffix}")
+
+    @staticmethod
+    def derived_key(kind: str, *parts: Any) -> str:
+        text = json.dumps([kind, parts], sort_keys=True, ensure_ascii=False)
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=20).hexdigest()
+
+    def _load(self):
+        self._objects = {}
+        self._derived = {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == self.VERSION:
+            self._objects = data.get("objects", {})
+            self._derived = data.get("derived", {})
+
+    def _ensure_loaded(self):
+        if self._objects is None:
+            self._load()
+
+    def _touch(self, digest: str, size: int):
+        with self._lock:
+            self._ensure_loaded()
+            self._objects[digest] = [size, time.time_ns()]
+            self._dirty = True
+
+    def _commit(self, temp_file: str, digest: str) -> str:
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            os.remove(temp_file)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_file, path)
+        self._touch(digest, os.path.getsize(path))
+        return digest
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self.object_path(digest))
+
+    def put_file(self, src: str) -> str:
+        src = os.path.abspath(src)
+        # an unchanged source whose content is already stored is not read again
+        digest = get_hash_cache().lookup(src, STORE_ALGO)
+        if digest is not None and self.has(digest):
+            self._touch(digest, os.path.getsize(src))
+            return digest
+
+        temp_file = self.temp_path()
+        try:
+            digest = copy_and_hash(src, temp_file, STORE_ALGO)
+            return self._commit(temp_file, digest)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    def lookup_derived(self, key: str) -> Optional[str]:
+        with self._lock:
+            self._ensure_loaded()
+            digest = self._derived.get(key)
+        if digest is None or not self.has(digest):
+            return None
+        self._touch(digest, os.path.getsize(self.object_path(digest)))
+        return self.object_path(digest)
+
+    def store_derived(self, key: str, temp_file: str) -> str:
+        with open(temp_file, "rb") as f:
+            digest = hashlib.file_digest(f, STORE_ALGO).hexdigest()
+        self._commit(temp_file, digest)
+        with self._lock:
+            self._derived[key] = digest
+            self._dirty = True
+        return self.object_path(digest)
+
+    def materialize(
+        self, digest: str, dst: str, mode: CopyModeEnum = CopyModeEnum.REFLINK
+    ) -> CopyStrategyEnum:
+        return copy_file(self.object_path(digest), dst, mode)
+
+    def _scan(self) -> Dict[str, List[int]]:
+        # the index may miss objects written by another process, the folder is the truth
+        found = {}
+        objects_dir = os.path.join(self.root, "objects")
+        if not os.path.isdir(objects_dir):
+            return found
+        with os.scandir(objects_dir) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as it:
+                    for entry in it:
+                        st = entry.stat()
+                        found[f"{shard.name}{entry.name}"] = [st.st_size, st.st_mtime_ns]
+        return found
+
+    def _remove_stale_temp(self):
+        folder = os.path.join(self.root, "tmp")
+        if not os.path.isdir(folder):
+            return
+        now = time.time_ns()
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    if now - entry.stat().st_mtime_ns > _TEMP_MAX_AGE_NS:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                "objects": len(self._objects),
+                "bytes": sum(size for size, _ in self._objects.values()),
+                "derived": len(self._derived),
+            }
+
+    def gc(self, max_bytes: int = None, max_age: float = None) -> Dict[str, int]:
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        self._remove_stale_temp()
+        found = self._scan()
+
+        with self._lock:
+            self._ensure_loaded()
+            objects = {}
+            for digest, (size, mtime_ns) in found.items():
+                known = self._objects.get(digest)
+                objects[digest] = [size, known[1] if known is not None else mtime_ns]
+
+            # least recently used first
+            order = sorted(objects.items(), key=lambda item: item[1][1])
+            total = sum(size for size, _ in objects.values())
+            oldest = None if max_age is None else time.time_ns() - int(max_age * 1_000_000_000)
+            removed = 0
+            freed = 0
+            for digest, (size, last_used) in order:
+                too_old = oldest is not None and last_used < oldest
+                if total <= max_bytes and not too_old:
+                    continue
+                try:
+                    # outputs hardlinked to the object keep their own link
+                    os.remove(self.object_path(digest))
+                except OSError:
+                    continue
+                del objects[digest]
+                total -= size
+                removed += 1
+                freed += size
+
+            self._objects = objects
+            self._derived = {k: d for k, d in self._derived.items() if d in objects}
+            self._dirty = True
+
+        self.save(collect=False)
+        return {"removed": removed, "freed": freed, "objects": len(objects), "bytes": total}
+
+    def save(self, collect: bool = True):
+        with self._lock:
+            if not self._dirty:
+                return
+            over = sum(size for size, _ in self._objects.values()) > self.max_bytes
+        if collect and over:
+            self.gc()
+            return
+
+        with self._lock:
+            data = {"version": self.VERSION, "objects": self._objects, "derived": self._derived}
+            self._dirty = False
+
+        os.makedirs(self.root, exist_ok=True)
+        temp_file = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_file, self.index_path)
+
+
+_ASSET_STORE = None
+
+
+def get_asset_store() -> AssetStore:
+    global _ASSET_STORE
+    # the cache folder can be switched through WSC_CACHE_DIR at any time
+    root = os.path.abspath(os.path.join(default_cache_dir(), "store"))
+    if _ASSET_STORE is None or _ASSET_STORE.root != root:
+        _ASSET_STORE = AssetStore(root, _max_bytes_from_env())
+    return _ASSET_STORE
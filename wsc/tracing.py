@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+)
+
+log = logging.getLogger("wsc")
+
+LOG_MAX_BYTES = 2 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_LOG_FORMAT = "%(asctime)s %(levelname)s [%(threadName)s] %(message)s"
+
+
+class Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start", "depth")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+        self.depth = 0
+
+    def add(self, **counters: int):
+        for key, value in counters.items():
+            self.args[key] = self.args.get(key, 0) + value
+
+    def set(self, **args: Any):
+        self.args.update(args)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._finish(self, end)
+        return False
+
+
+class _NullSpan:
+    # handed out while tracing is off, so an instrumented call costs one attribute check
+    __slots__ = ()
+
+    def add(self, **counters: int):
+        pass
+
+    def set(self, **args: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    # span name -> [count, nanoseconds, files, bytes]
+    _totals: Dict[str, List[int]]
+    _events: List[Dict[str, Any]]
+
+    def __init__(self):
+        self.enabled = False
+        self.chrome_file = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        self._totals = {}
+        self._events = []
+        self._threads = {}
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, cat: str = "export", **args: Any):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, cat, args)
+
+    def _finish(self, span: Span, end: int):
+        duration = end - span.start
+        with self._lock:
+            total = self._totals.setdefault(span.name, [0, 0, 0, 0])
+            total[0] += 1
+            total[1] += duration
+            total[2] += span.args.get("files", 0)
+            total[3] += span.args.get("bytes", 0)
+            if self.chrome_file is not None:
+                tid = threading.get_ident()
+                self._threads.setdefault(tid, threading.current_thread().name)
+                self._events.append(
+                    {
+                        "name": span.name,
+                        "cat": span.cat,
+                        "ph": "X",
+                        "ts": (span.start - self._origin) / 1000,
+                        "dur": duration / 1000,
+                        "pid": os.getpid(),
+                        "tid": tid,
+                        "args": span.args,
+                    }
+                )
+        log.debug("%s%s %.3f ms %s", "  " * span.depth, span.name, duration / 1e6, span.args)
+
+    def start(self, chrome_file: str = None):
+        with self._lock:
+            self._origin = time.perf_counter_ns()
+            self._totals = {}
+            self._events = []
+            self._threads = {}
+            self.chrome_file = chrome_file
+        self.enabled = True
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            totals = sorted(self._totals.items(), key=lambda item: -item[1][1])
+        return {
+            name: {"count": count, "seconds": round(ns / 1e9, 4), "files": files, "bytes": size}
+            for name, (count, ns, files, size) in totals
+        }
+
+    def write_chrome_trace(self, path: str):
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        # thread names make the rows readable in chrome://tracing and perfetto
+        meta = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+    def stop(self) -> Dict[str, Dict[str, Any]]:
+        self.enabled = False
+        summary = self.summary()
+        for name, item in summary.items():
+            log.debug(
+                "trace %s: %d calls, %.3f s, %d files, %d bytes",
+                name,
+                item["count"],
+                item["seconds"],
+                item["files"],
+                item["bytes"],
+            )
+        if self.chrome_file is not None:
+            self.write_chrome_trace(self.chrome_file)
+            self.chrome_file = None
+        return summary
+
+
+_TRACER = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _TRACER
+
+
+def span(name: str, cat: str = "export", **args: Any):
+    return _TRACER.span(name, cat, **args)
+
+
+def traced(name: str = None, cat: str = "export") -> Callable:
+    def decorate(fn: Callable) -> Callable:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _TRACER.enabled:
+                return fn(*args, **kwargs)
+            with Span(_TRACER, label, cat, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def default_log_file() -> str:
+    from wsc.hashing import default_cache_dir
+
+    return os.path.join(default_cache_dir(), "logs", "wsc.log")
+
+
+def setup_logging(log_file: str = None, verbosity: int = 0):
+    import logging.handlers
+
+    # a later call replaces the handlers of an earlier one
+    for handler in list(log.handlers):
+        if getattr(handler, "_wsc", False):
+            log.removeHandler(handler)
+            handler.close()
+    log.setLevel(logging.DEBUG)
+
+    handlers = []
+    if log_file is not None:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+        except OSError:
+            # a read-only cache folder must not stop the export
+            handler = None
+        if handler is not None:
+            handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+            handlers.append(handler)
+    if verbosity > 0:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler.setLevel(logging.INFO if verbosity == 1 else logging.DEBUG)
+        handlers.append(handler)
+
+    for handler in handlers:
+        handler._wsc = True
+        log.addHandler(handler)
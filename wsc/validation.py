@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from wsc.tracing import span
+
+
+class ValidationEngine:
+    _results: Dict[str, Tuple[tuple, list]]
+
+    def __init__(
+        self, factory: Callable[[], Any], checks: Dict[str, Sequence[Any]], max_workers: int = None
+    ):
+        self._factory = factory
+        self._checks = checks
+        self._results = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or min(len(checks), (os.cpu_count() or 1) + 4),
+            thread_name_prefix="wsc-check",
+        )
+        self._dispatch = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wsc-validate")
+
+    @staticmethod
+    def _signature(props: Dict[Any, Any], keys: Sequence[Any]) -> tuple:
+        return tuple(repr(props.get(key)) for key in keys)
+
+    def _run_check(self, name: str, props: Dict[Any, Any]) -> list:
+        collector = self._factory()
+        with span(name, "check"):
+            getattr(collector, name)(props)
+        return list(collector.errors)
+
+    def validate(self, props: Dict[Any, Any], fresh: Union[bool, Collection[str]] = False) -> list:
+        # fresh may name the checks whose inputs changed on disk, the rest are reused when cached
+        props = dict(props)
+        results = {}
+        todo = []
+        with self._lock:
+            for name, keys in self._checks.items():
+                signature = self._signature(props, keys)
+                cached = self._results.get(name)
+                forced = fresh if isinstance(fresh, bool) else name in fresh
+                if forced or cached is None or cached[0] != signature:
+                    todo.append((name, signature))
+                else:
+                    results[name] = cached[1]
+
+        futures = [
+            (name, signature, self._pool.submit(self._run_check, name, props)) for name, signature in todo
+        ]
+        for name, signature, future in futures:
+            results[name] = future.result()
+
+        with self._lock:
+            for name, signature, _ in futures:
+                self._results[name] = (signature, results[name])
+
+        return [diagnostic for name in self._checks for diagnostic in results[name]]
+
+    def submit(self, props: Dict[Any, Any], callback: Callable[[list], None] = None) -> Future:
+        future = self._dispatch.submit(self.validate, dict(props))
+        if callback is not None:
+
+            def _on_done(f: Future):
+                if f.exception() is None:
+                    callback(f.result())
+
+            future.add_done_callback(_on_done)
+        return future
+
+    def invalidate(self):
+        with self._lock:
+            self._results.clear()
+
+    def shutdown(self):
+        self._dispatch.shutdown(wait=True)
+        self._pool.shutdown(wait=True)
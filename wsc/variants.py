@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Tuple,
+)
+
+from wsc.copier import (
+    CopyModeEnum,
+    copy_file,
+)
+from wsc.core import (
+    CONFIG_ONLY_KEYS,
+    DataCollector,
+    ErrorCodeEnum,
+    ExportError,
+    ExportStageEnum,
+    PropKeyEnum,
+    parse_prop_key,
+    parse_prop_value,
+)
+from wsc.manifest import ExportManifest
+
+SHARED_DIR = ".shared"
+INDEX_FILE = "variants.json"
+
+# written per variant, everything else is a link into the shared export
+_VARIANT_FILES = {"GameConfig.json"}
+_UNSHARED_FILES = _VARIANT_FILES | {ExportManifest.FILE_NAME}
+
+_INVALID_NAME_CHARS = set('/\\:*?"<>|')
+
+
+class Variant:
+    __slots__ = ("index", "name", "values", "props")
+
+    # index is the position in the full cartesian product, so names stay stable when sampling
+    index: int
+    name: str
+    values: Dict[PropKeyEnum, Any]
+    props: Dict[PropKeyEnum, Any]
+
+    def __init__(
+        self, index: int, name: str, values: Dict[PropKeyEnum, Any], props: Dict[PropKeyEnum, Any]
+    ):
+        self.index = index
+        self.name = name
+        self.values = values
+        self.props = props
+
+    def __repr__(self):
+        return f"Variant({self.index}, {self.name!r})"
+
+
+def _name_field(value: Any) -> str:
+    if isinstance(value, str) and os.path.isabs(value):
+        return os.path.splitext(os.path.basename(value))[0]
+    if isinstance(value, list):
+        return "+".join(f"{v}" for v in value)
+    return f"{value}"
+
+
+class VariantMatrix:
+    axes: List[Tuple[PropKeyEnum, List[Any]]]
+
+    def __init__(
+        self,
+        axes: List[Tuple[PropKeyEnum, List[Any]]],
+        sample: int = None,
+        seed: int = 0,
+        name: str = None,
+    ):
+        self.axes = list(axes)
+        self.sample = sample
+        self.seed = seed
+        self.name = name
+
+    @classmethod
+    def load(cls, matrix_file: str) -> "VariantMatrix":
+        try:
+            with open(matrix_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ExportError(ErrorCodeEnum.E_PROJECT, f"无法读取变体矩阵【{matrix_file} 】：{e}")
+        if not isinstance(data, dict) or not isinstance(data.get("axes"), dict):
+            raise ExportError(ErrorCodeEnum.E_PROJECT, f"变体矩阵【{matrix_file} 】缺少 axes")
+
+        # paths in the matrix are relative to the matrix file, like paths in a project file
+        base_dir = os.path.dirname(os.path.abspath(matrix_file))
+        axes = []
+        for name, values in data["axes"].items():
+            key = parse_prop_key(name)
+            if not isinstance(values, list) or len(values) == 0:
+                raise ExportError(ErrorCodeEnum.E_PROJECT, f"变体维度【{name} 】必须是非空数组", key)
+            axes.append((key, [parse_prop_value(key, value, base_dir) for value in values]))
+
+        sample = data.get("sample")
+        if sample is not None and (not isinstance(sample, int) or sample <= 0):
+            raise ExportError(ErrorCodeEnum.E_PROJECT, f"抽样数量【{sample} 】必须是正整数")
+        return cls(axes, sample, data.get("seed", 0), data.get("name"))
+
+    @property
+    def size(self) -> int:
+        return math.prod(len(values) for _, values in self.axes)
+
+    def _decode(self, index: int) -> Dict[PropKeyEnum, Any]:
+        # mixed radix, the last axis changes fastest like in itertools.product
+        values = []
+        for key, choices in reversed(self.axes):
+            index, i = divmod(index, len(choices))
+            values.append((key, choices[i]))
+        return dict(reversed(values))
+
+    def indices(self) -> List[int]:
+        total = self.size
+        if self.sample is None or self.sample >= total:
+            return list(range(total))
+        # sampled by position, the full product is never built
+        return sorted(random.Random(self.seed).sample(range(total), self.sample))
+
+    def _variant_name(self, index: int, values: Dict[PropKeyEnum, Any]) -> str:
+        if self.name is None:
+            return f"v{index + 1:0{len(str(self.size))}d}"
+
+        try:
+            name = self.name.format(**{f"{key}": _name_field(value) for key, value in values.items()})
+        except (KeyError, IndexError, ValueError) as e:
+            raise ExportError(ErrorCodeEnum.E_PROJECT, f"变体命名【{self.name} 】无效：{e}")
+        if len(name) == 0 or name.startswith(".") or _INVALID_NAME_CHARS & set(name):
+            raise ExportError(ErrorCodeEnum.E_PROJECT, f"变体名称【{name} 】不能用作文件夹名")
+        return name
+
+    def expand(self, props: Dict[PropKeyEnum, Any]) -> List[Variant]:
+        variants = []
+        names = set()
+        for index in self.indices():
+            values = self._decode(index)
+            name = self._variant_name(index, values)
+            if name in names:
+                raise ExportError(ErrorCodeEnum.E_PROJECT, f"变体名称【{name} 】重复")
+            names.add(name)
+            variants.append(Variant(index, name, values, {**props, **values}))
+        return variants
+
+
+def asset_group(props: Dict[PropKeyEnum, Any]) -> str:
+    # variants that only differ in config values export byte identical assets
+    items = sorted((f"{key}", repr(value)) for key, value in props.items() if key not in CONFIG_ONLY_KEYS)
+    return hashlib.blake2b(repr(items).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _list_outputs(folder: str) -> List[str]:
+    outputs = []
+    for root, dirs, files in os.walk(folder):
+        for name in files:
+            rel = os.path.relpath(os.path.join(root, name), folder)
+            if rel not in _UNSHARED_FILES and not name.endswith(".tmp"):
+                outputs.append(rel)
+    return sorted(outputs)
+
+
+def _link_file(src: str, dst: str) -> bool:
+    try:
+        if os.path.samestat(os.stat(src), os.stat(dst)):
+            return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    # falls back to a reflink or a copy across file systems
+    copy_file(src, dst, CopyModeEnum.HARDLINK)
+    return True
+
+
+def _remove_stale(target_dir: str, outputs: List[str]):
+    keep = set(outputs) | _VARIANT_FILES
+    for rel in _list_outputs(target_dir):
+        if rel not in keep:
+            os.unlink(os.path.join(target_dir, rel))
+
+
+def _load_index(out_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(out_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_index(out_dir: str, data: Dict[str, Any]):
+    index_file = os.path.join(out_dir, INDEX_FILE)
+    temp_file = f"{index_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(temp_file, index_file)
+
+
+def _prune_previous(out_dir: str, previous: Dict[str, Any], names: List[str], groups: List[str]):
+    # only folders this exporter created before are removed
+    for item in previous.get("variants", []):
+        name = item.get("name")
+        if name and name not in names and not _INVALID_NAME_CHARS & set(name):
+            shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+    for group in previous.get("groups", []):
+        if group not in groups and not _INVALID_NAME_CHARS & set(group):
+            shutil.rmtree(os.path.join(out_dir, SHARED_DIR, group), ignore_errors=True)
+
+
+def export_variants(
+    props: Dict[PropKeyEnum, Any],
+    matrix: VariantMatrix,
+    out_dir: str,
+    collector_factory: Callable[..., DataCollector] = DataCollector,
+    max_workers: int = None,
+    progress: Callable[[int, int, str], None] = None,
+    cancelled: Callable[[], bool] = None,
+    **options,
+) -> Dict[str, Any]:
+    variants = matrix.expand(props)
+    os.makedirs(out_dir, exist_ok=True)
+
+    reports = {}
+    for v in variants:
+        reports[v.name] = {
+            "name": v.name,
+            "index": v.index,
+            "values": {f"{k}": value for k, value in v.values.items()},
+            "group": asset_group(v.props),
+            "target": os.path.join(out_dir, v.name),
+            "ok": False,
+            "linked": 0,
+            "errors": [],
+        }
+
+    # the first check reads the disk, later ones only re-run checks whose inputs differ
+    valid = []
+    for i, v in enumerate(variants):
+        collector = collector_factory(**options)
+        stages = None if i == 0 else {ExportStageEnum.CONFIG}
+        if collector.sanity_check(v.props, stages):
+            valid.append(v)
+        reports[v.name]["errors"] = [e.to_dict() for e in collector.errors]
+
+    # every asset group is exported once, its copies run in parallel inside the export
+    groups = {}
+    for v in valid:
+        groups.setdefault(reports[v.name]["group"], v)
+    shared = {}
+    group_reports = []
+    # progress counts the shared exports and the variants stored from them
+    total = len(groups) + len(valid)
+    done = [0]
+    done_lock = threading.Lock()
+
+    def _advance(name: str):
+        if progress is None:
+            return
+        with done_lock:
+            done[0] += 1
+            count = done[0]
+        progress(count, total, name)
+
+    for group, v in groups.items():
+        if cancelled is not None and cancelled():
+            break
+        shared_dir = os.path.join(out_dir, SHARED_DIR, group)
+        os.makedirs(shared_dir, exist_ok=True)
+        collector = collector_factory(max_workers=max_workers, **options)
+        exported = collector.export(v.props, shared_dir)
+        if exported is not None:
+            shared[group] = (shared_dir, _list_outputs(shared_dir))
+        group_reports.append(
+            {"name": group, "ok": exported is not None, "errors": [e.to_dict() for e in collector.errors]}
+        )
+        _advance(shared_dir)
+
+    # a cancelled run stops before touching the variant folders, the previous export stays as it was
+    if cancelled is not None and cancelled():
+        return {
+            "target": out_dir,
+            "cancelled": True,
+            "groups": group_reports,
+            "variants": [reports[v.name] for v in variants],
+        }
+
+    def _store_variant(v: Variant):
+        try:
+            _store_variant_files(v)
+        finally:
+            _advance(reports[v.name]["target"])
+
+    def _store_variant_files(v: Variant):
+        report = reports[v.name]
+        if report["group"] not in shared:
+            report["errors"].append(
+                ExportError(ErrorCodeEnum.E_IO, f"变体【{v.name} 】的共享资源导出失败").to_dict()
+            )
+            return
+
+        shared_dir, outputs = shared[report["group"]]
+        target_dir = report["target"]
+        collector = collector_factory(**options)
+        try:
+            os.makedirs(target_dir, exist_ok=True)
+            report["linked"] = sum(
+                _link_file(os.path.join(shared_dir, rel), os.path.join(target_dir, rel)) for rel in outputs
+            )
+            _remove_stale(target_dir, outputs)
+            collector.store_config(v.props, target_dir)
+        except OSError as e:
+            collector.warn(ErrorCodeEnum.E_IO, f"变体【{v.name} 】导出失败：{e}")
+        report["errors"] += [e.to_dict() for e in collector.errors]
+        report["ok"] = not any(e.fatal for e in collector.errors)
+
+    workers = max_workers or min(16, (os.cpu_count() or 1) * 2)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wsc-variant") as pool:
+        list(pool.map(_store_variant, valid))
+
+    names = [v.name for v in variants]
+    _prune_previous(out_dir, _load_index(out_dir), names, list(groups.keys()))
+    _save_index(
+        out_dir,
+        {
+            "axes": {f"{key}": values for key, values in matrix.axes},
+            "groups": list(groups.keys()),
+            "variants": [
+                {k: reports[name][k] for k in ("name", "index", "group", "values")} for name in names
+            ],
+        },
+    )
+
+    return {
+        "target": out_dir,
+        "cancelled": False,
+        "groups": group_reports,
+        "variants": [reports[name] for name in names],
+    }
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Set,
+)
+
+
+def _snapshot(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    if not os.path.isdir(path):
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    # a folder changes when any direct child is added, removed or rewritten
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    child = entry.stat()
+                except OSError:
+                    continue
+                entries.append((entry.name, child.st_size, child.st_mtime_ns))
+    except OSError:
+        return None
+    return tuple(sorted(entries))
+
+
+class PollingWatcher:
+    # plain stat polling, the command line has no event loop to hang a QFileSystemWatcher on
+    _snapshots: Dict[str, object]
+
+    def __init__(self, paths: Iterable[str], interval: float = 0.1, quiet: float = 0.15):
+        self.interval = interval
+        self.quiet = quiet
+        self._snapshots = {}
+        self.set_paths(paths)
+
+    def set_paths(self, paths: Iterable[str]):
+        self._snapshots = {os.path.abspath(p): _snapshot(os.path.abspath(p)) for p in paths}
+
+    def poll(self) -> Set[str]:
+        changed = set()
+        for path, old in self._snapshots.items():
+            new = _snapshot(path)
+            if new != old:
+                self._snapshots[path] = new
+                changed.add(path)
+        return changed
+
+    def wait(self, stop: Callable[[], bool] = None, timeout: float = None) -> Optional[Set[str]]:
+        # block until something changes, then keep collecting until the burst has been quiet for a while
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed = set()
+        last_change = None
+        while True:
+            if stop is not None and stop():
+                return None
+
+            found = self.poll()
+            now = time.monotonic()
+            if found:
+                changed |= found
+                last_change = now
+            elif last_change is not None and now - last_change >= self.quiet:
+                return changed
+            elif last_change is None and deadline is not None and now >= deadline:
+                return set()
+
+            time.sleep(self.interval)
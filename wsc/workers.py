@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import os
+from typing import (
+    Any,
+    Callable,
+    List,
+    Sequence,
+)
+
+_POOL = None
+
+
+def get_process_pool():
+    global _POOL
+    if _POOL is None:
+        # multiprocessing is slow to import, it is only loaded once there is work for it
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # fork is unsafe once the Qt and copy threads are running
+        _POOL = ProcessPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _POOL
+
+
+def run_jobs(fn: Callable[..., Any], jobs: Sequence[Sequence[Any]]) -> List[Any]:
+    global _POOL
+    if len(jobs) == 0:
+        return []
+
+    from concurrent.futures.process import BrokenProcessPool
+
+    try:
+        futures = [get_process_pool().submit(fn, *job) for job in jobs]
+        return [future.result() for future in futures]
+    except (BrokenProcessPool, NotImplementedError):
+        # no usable process pool, e.g. a sandbox without semaphores
+        _POOL = None
+        return [fn(*job) for job in jobs]